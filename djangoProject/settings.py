@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import configparser
 import os
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'priceapp.perf.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,7 +63,10 @@ ROOT_URLCONF = 'djangoProject.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'priceapp.perf.TimedDjangoTemplates',
+        # Имя по умолчанию берется из пути бэкенда ('perf'), код обращается
+        # к движку по стандартному имени.
+        'NAME': 'django',
         'DIRS': [BASE_DIR / 'templates']
         ,
         'APP_DIRS': True,
@@ -86,9 +91,30 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': DATABASE_DIR / 'db.sqlite3',
+        # Сервер разработки создает поток на каждый запрос, поэтому
+        # постоянные соединения используются только без DEBUG.
+        'CONN_MAX_AGE': 0 if DEBUG else 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Время ожидания блокировки БД, сек.
+            'timeout': 20,
+        },
     }
 }
 
+# PRAGMA, выполняемые при открытии каждого соединения с SQLite
+# (см. priceapp/signals.py). WAL позволяет читать БД во время записи,
+# поэтому печать не ждет сканирования на других терминалах.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    # Отрицательное значение - размер кеша в КиБ.
+    'cache_size': -32000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -135,3 +161,37 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Версии индексов в памяти процесса (товары, поиск, справочники) хранятся
+# в кеше, общем для всех процессов сервера: изменение, сделанное в одном
+# процессе, сбрасывает индексы во всех (см. priceapp/lookup.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'priceapp_index': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': DATABASE_DIR / 'index_cache',
+    },
+}
+PRICEAPP_INDEX_CACHE = 'priceapp_index'
+
+# Алгоритм раскладки ценников по листам печати: 'shelf' или 'guillotine'
+# (см. priceapp/layout.py)
+PRICEAPP_LAYOUT_ENGINE = 'shelf'
+
+# Количество запросов, показатели которых хранятся по каждому URL для отчета
+# о производительности (см. priceapp/perf.py)
+PRICEAPP_PERF_BUFFER_SIZE = 500
+
+# Файлы обновления цен от этого размера (в байтах) обрабатываются в фоновой
+# задаче, количество одновременно обрабатываемых файлов и каталог для
+# загруженных файлов (по умолчанию - системный временный каталог), время
+# без изменения хода, после которого задача считается прерванной, и время
+# хранения завершенных задач (см. priceapp/jobs.py)
+PRICEAPP_IMPORT_BACKGROUND_SIZE = 512 * 1024
+PRICEAPP_IMPORT_WORKERS = 1
+PRICEAPP_IMPORT_DIR = None
+PRICEAPP_IMPORT_TIMEOUT = timedelta(minutes=30)
+PRICEAPP_IMPORT_JOB_RETENTION = timedelta(days=7)
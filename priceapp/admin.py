@@ -7,9 +7,57 @@
 from django.contrib import admin
 from django.db.models import QuerySet
 
+from .history import HISTORY_FIELDS, record_price_history
 from .models import Tag, PrintSheet, Product, Category, Country
 
 
+class PriceHistoryAdminMixin:
+    """Примесь записывает в историю цен товары, созданные \
+    или с измененной ценой через админку (в том числе во встроенных \
+    формах категорий и стран). Админка сохраняет объект и встроенные \
+    формы в одной транзакции, поэтому история пишется в той же \
+    транзакции."""
+
+    def save_model(self, request, obj, form, change) -> None:
+        """
+        Сохраняет объект и, если это товар с новой ценой, \
+        записывает цену в историю.
+
+        :param request: HttpRequest.
+        :param obj: Model.
+        :param form: ModelForm.
+        :param change: bool - объект изменяется, а не создается.
+        :return: None.
+        """
+        super().save_model(request, obj, form, change)
+        if isinstance(obj, Product) and (
+                not change
+                or set(form.changed_data) & set(HISTORY_FIELDS)
+        ):
+            record_price_history([obj])
+
+    def save_formset(self, request, form, formset, change) -> None:
+        """
+        Сохраняет встроенные формы и записывает в историю цены \
+        созданных товаров и товаров с измененной ценой.
+
+        :param request: HttpRequest.
+        :param form: ModelForm.
+        :param formset: BaseInlineFormSet.
+        :param change: bool - объект изменяется, а не создается.
+        :return: None.
+        """
+        super().save_formset(request, form, formset, change)
+        if formset.model is Product:
+            record_price_history(
+                formset.new_objects + [
+                    obj
+                    for obj, changed_data in formset.changed_objects
+                    if set(changed_data) & set(HISTORY_FIELDS)
+                ]
+            )
+
+
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     """Класс для отображения модели Ценники в админке."""
@@ -60,7 +108,7 @@ class PrintSheetAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(PriceHistoryAdminMixin, admin.ModelAdmin):
     """Класс реализует возможность отображения объектов Product\
     в административной панели."""
 
@@ -111,7 +159,7 @@ class ProductTabularInline(admin.TabularInline):
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(PriceHistoryAdminMixin, admin.ModelAdmin):
     """Класс для отображения Категорий товаров в админке."""
 
     list_display = 'name',
@@ -122,7 +170,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Country)
-class CountryAdmin(admin.ModelAdmin):
+class CountryAdmin(PriceHistoryAdminMixin, admin.ModelAdmin):
     """Класс для отображения Стран производства товаров в админке."""
 
     list_display = 'name',
@@ -5,3 +5,7 @@ class PriceappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'priceapp'
     verbose_name = 'печать ценников'
+
+    def ready(self) -> None:
+        """Подключает обработчики сигналов приложения."""
+        from . import signals  # noqa: F401
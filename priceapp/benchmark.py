@@ -0,0 +1,520 @@
+"""
+Модуль реализует замеры основных сценариев работы приложения.
+
+Каждый сценарий выполняется через тестовый клиент Django на синтетическом
+каталоге (см. synthetic.py): подготовка состояния не замеряется, для самого
+запроса сохраняются время выполнения, количество SQL запросов и пиковый
+объем выделенной памяти (отдельным прогоном под tracemalloc, чтобы
+трассировка не искажала время). Результат - словарь, который сохраняется
+в JSON и сравнивается с результатом предыдущего запуска.
+"""
+
+import platform
+import random
+import sqlite3
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Iterable
+
+import django
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import PrintSheet, Tag, UpdateProduct
+from .perf import percentile
+from .synthetic import (
+    clear_catalogue,
+    generate_catalogue,
+    product_ean,
+    product_name,
+    product_sku,
+)
+from .views import ProductConfirmUpdateView
+
+SCALES = (1000, 10000, 100000)
+# Доля строк файла обновления, которых нет в каталоге.
+MISSING_SHARE = 0.05
+
+
+class Scenario:
+    """Сценарий замера: подготовка (без замера) и замеряемый запрос."""
+
+    name = ''
+
+    def __init__(self, bench: 'WorkflowBenchmark') -> None:
+        """
+        Создает сценарий.
+
+        :param bench: WorkflowBenchmark - общие параметры замера.
+        """
+        self.bench = bench
+        self.client = bench.client
+
+    def setup(self) -> None:
+        """
+        Подготавливает состояние перед каждым запросом.
+
+        :return: None.
+        """
+
+    def request(self):
+        """
+        Выполняет замеряемый запрос.
+
+        :return: HttpResponse.
+        """
+        raise NotImplementedError
+
+
+class ScanScenario(Scenario):
+    """Сканирование штрихкода на странице формирования печати \
+    (без запроса страницы после перенаправления)."""
+
+    name = 'scan'
+
+    def data(self) -> dict:
+        """
+        Данные скана случайного товара.
+
+        :return: dict.
+        """
+        return {
+            'input_line': product_ean(self.bench.random_number()),
+            'size': 'big',
+            'is_discount': 'false',
+        }
+
+    def request(self):
+        """
+        Добавляет в печать случайный товар.
+
+        :return: HttpResponse.
+        """
+        return self.client.post(
+            reverse('priceapp:printsheet_create'), self.data()
+        )
+
+
+class ScanCycleScenario(ScanScenario):
+    """Полный цикл сканирования через страницу: отправка формы, \
+    перенаправление и отрисовка страницы сканирования."""
+
+    name = 'scan_cycle'
+
+    def request(self):
+        """
+        Добавляет в печать случайный товар и запрашивает страницу.
+
+        :return: HttpResponse.
+        """
+        return self.client.post(
+            reverse('priceapp:printsheet_create'), self.data(), follow=True
+        )
+
+
+class ScanAPIScenario(ScanScenario):
+    """Сканирование через JSON API, которое использует страница \
+    сканирования."""
+
+    name = 'scan_api'
+
+    def request(self):
+        """
+        Добавляет в печать случайный товар.
+
+        :return: HttpResponse.
+        """
+        return self.client.post(
+            reverse('priceapp:printsheet_scan'), self.data()
+        )
+
+
+class SearchScenario(Scenario):
+    """Подсказки товаров по началу наименования."""
+
+    name = 'search'
+
+    def request(self):
+        """
+        Ищет товары по началу наименования случайного товара.
+
+        :return: HttpResponse.
+        """
+        query = product_name(self.bench.random_number())[:5]
+        return self.client.get(
+            reverse('priceapp:product_search'), {'q': query}
+        )
+
+
+class PrintScenario(Scenario):
+    """Страница печати с заполненным списком ценников."""
+
+    name = 'print'
+    url_name = 'priceapp:printsheet_print'
+
+    def setup(self) -> None:
+        """
+        Заполняет список печати терминала, если он пуст.
+
+        :return: None.
+        """
+        terminal = self.bench.terminal
+        if PrintSheet.objects.filter(terminal=terminal).exists():
+            return
+        tag_list = list(Tag.objects.all())
+        PrintSheet.objects.bulk_create([
+            PrintSheet(
+                name=product_name(number),
+                category='Категория',
+                country='Страна',
+                price=10000 + number,
+                old_price=20000 + number,
+                tag=tag_list[number % len(tag_list)],
+                terminal=terminal,
+            )
+            for number in range(self.bench.tags)
+        ])
+
+    def request(self):
+        """
+        Запрашивает страницу печати.
+
+        :return: HttpResponse.
+        """
+        return self.client.get(reverse(self.url_name))
+
+
+class PDFScenario(PrintScenario):
+    """Формирование PDF для печати."""
+
+    name = 'pdf'
+    url_name = 'priceapp:printsheet_pdf'
+
+
+class CSVUpdateScenario(Scenario):
+    """Загрузка файла обновления цен."""
+
+    name = 'csv_update'
+
+    def setup(self) -> None:
+        """
+        Очищает очереди терминала открытием страницы обновления.
+
+        :return: None.
+        """
+        self.client.get(reverse('priceapp:product_update'))
+
+    def request(self):
+        """
+        Отправляет файл обновления цен.
+
+        :return: HttpResponse.
+        """
+        lines = ['sku;price;old_price']
+        for index, number in enumerate(self.bench.random_numbers()):
+            sku = product_sku(number)
+            if index < self.bench.rows * MISSING_SHARE:
+                sku = f'NEW{number:06d}'
+            lines.append(f'{sku};{self.bench.random_price()};0')
+        file = SimpleUploadedFile(
+            'product_update.csv',
+            '\n'.join(lines).encode()
+        )
+        return self.client.post(
+            reverse('priceapp:product_update'), {'file': file}
+        )
+
+
+class ICQUpdateScenario(Scenario):
+    """Обновление цен из текста ICQ."""
+
+    name = 'icq_update'
+
+    def setup(self) -> None:
+        """
+        Очищает очереди терминала открытием страницы обновления.
+
+        :return: None.
+        """
+        self.client.get(reverse('priceapp:product_icq_update'))
+
+    def text(self) -> str:
+        """
+        Формирует текст обновления со случайными ценами.
+
+        :return: str.
+        """
+        return '\r\n'.join(
+            f'{product_name(number)} - {self.bench.random_price()}'
+            for number in self.bench.random_numbers()
+        )
+
+    def request(self):
+        """
+        Отправляет текст обновления.
+
+        :return: HttpResponse.
+        """
+        return self.client.post(
+            reverse('priceapp:product_icq_update'), {'text': self.text()}
+        )
+
+
+class ConfirmScenario(ICQUpdateScenario):
+    """Подтверждение страницы обновления цен."""
+
+    name = 'confirm'
+
+    def setup(self) -> None:
+        """
+        Формирует очередь обновления и данные формы первой страницы.
+
+        :return: None.
+        """
+        super().setup()
+        super().request()
+        page = (
+            UpdateProduct.objects
+            .filter(terminal=self.bench.terminal)
+            .order_by('update_at', 'pk')
+        )[:ProductConfirmUpdateView.paginate_by]
+        data = {
+            'form-INITIAL_FORMS': len(page),
+            'form-TOTAL_FORMS': len(page),
+        }
+        for index, row in enumerate(page):
+            data.update({
+                f'form-{index}-id': row.pk,
+                f'form-{index}-name': row.name,
+                f'form-{index}-price': row.price,
+                f'form-{index}-old_price': row.old_price,
+            })
+            if row.red_price:
+                data[f'form-{index}-red_price'] = 'on'
+        self.data = data
+
+    def request(self):
+        """
+        Подтверждает страницу обновления.
+
+        :return: HttpResponse.
+        """
+        return self.client.post(
+            reverse('priceapp:product_confirm_update'), self.data
+        )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        ScanScenario,
+        ScanCycleScenario,
+        ScanAPIScenario,
+        SearchScenario,
+        PrintScenario,
+        PDFScenario,
+        CSVUpdateScenario,
+        ICQUpdateScenario,
+        ConfirmScenario,
+    )
+}
+
+
+def summarize(values: Iterable) -> dict:
+    """
+    Рассчитывает сводные значения ряда замеров.
+
+    :param values: Iterable[float].
+    :return: dict.
+    """
+    values = sorted(values)
+    return {
+        'min': values[0],
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'mean': round(sum(values) / len(values), 3),
+        'max': values[-1],
+    }
+
+
+class WorkflowBenchmark:
+    """Выполняет сценарии на синтетическом каталоге заданного размера."""
+
+    def __init__(
+            self,
+            scale: int,
+            repeat: int = 10,
+            rows: int = 1000,
+            tags: int = 300,
+            seed: int = 0,
+    ) -> None:
+        """
+        Создает объект замера.
+
+        :param scale: int - количество товаров в каталоге.
+        :param repeat: int - количество замеряемых запросов сценария.
+        :param rows: int - количество строк в обновлении цен.
+        :param tags: int - количество ценников на странице печати.
+        :param seed: int - начальное значение генератора.
+        """
+        self.scale = scale
+        self.repeat = repeat
+        self.rows = min(rows, scale)
+        self.tags = tags
+        self.seed = seed
+        self.generator = random.Random(seed)
+        self.client = Client()
+        self.terminal = ''
+
+    def random_number(self) -> int:
+        """
+        Номер случайного товара каталога.
+
+        :return: int.
+        """
+        return self.generator.randrange(self.scale)
+
+    def random_numbers(self) -> list:
+        """
+        Номера `rows` разных случайных товаров каталога.
+
+        :return: list[int].
+        """
+        return self.generator.sample(range(self.scale), self.rows)
+
+    def random_price(self) -> int:
+        """
+        Случайная цена.
+
+        :return: int.
+        """
+        return self.generator.randrange(990, 99990, 10)
+
+    def prepare(self) -> float:
+        """
+        Создает каталог и сессию терминала.
+
+        :return: float - время создания каталога в секундах.
+        """
+        start = perf_counter()
+        clear_catalogue()
+        generate_catalogue(self.scale, self.seed)
+        elapsed = perf_counter() - start
+        self.client.get(reverse('priceapp:printsheet_delete'))
+        self.terminal = self.client.session['terminal']
+        return elapsed
+
+    def measure(self, scenario: Scenario) -> dict:
+        """
+        Выполняет сценарий и возвращает сводку замеров.
+
+        :param scenario: Scenario.
+        :return: dict.
+        """
+        # Первый запрос строит индексы в памяти процесса, его время
+        # сохраняется отдельно и не входит в ряд замеров.
+        scenario.setup()
+        start = perf_counter()
+        scenario.request()
+        cold = round((perf_counter() - start) * 1000, 3)
+        latency = []
+        queries = []
+        for _ in range(self.repeat):
+            scenario.setup()
+            with CaptureQueriesContext(connection) as context:
+                start = perf_counter()
+                response = scenario.request()
+                latency.append(round((perf_counter() - start) * 1000, 3))
+            if response.status_code >= 400:
+                raise RuntimeError(
+                    f'{scenario.name}: статус ответа {response.status_code}'
+                )
+            queries.append(len(context))
+        scenario.setup()
+        tracemalloc.start()
+        try:
+            scenario.request()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            'cold_ms': cold,
+            'latency_ms': summarize(latency),
+            'queries': summarize(queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def run(self, names: Iterable[str], progress: Callable = None) -> dict:
+        """
+        Создает каталог и выполняет сценарии.
+
+        :param names: Iterable[str] - имена сценариев из SCENARIOS.
+        :param progress: Callable[[str, dict], None] | None - вызывается \
+        после каждого сценария.
+        :return: dict.
+        """
+        result = {
+            'scale': self.scale,
+            'generate_s': round(self.prepare(), 3),
+            'scenarios': {},
+        }
+        for name in names:
+            scenario_result = self.measure(SCENARIOS[name](self))
+            result['scenarios'][name] = scenario_result
+            if progress is not None:
+                progress(name, scenario_result)
+        return result
+
+
+def environment() -> dict:
+    """
+    Описание окружения запуска для сравнения результатов.
+
+    :return: dict.
+    """
+    return {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+    }
+
+
+def compare(current: dict, previous: dict) -> list:
+    """
+    Сравнивает медианы времени и количество запросов с предыдущим \
+    результатом.
+
+    :param current: dict - результат текущего запуска.
+    :param previous: dict - результат предыдущего запуска.
+    :return: list[tuple[int, str, float, float, float, int, int]] - \
+    масштаб, сценарий, медиана до, медиана после, отношение, \
+    запросов до, запросов после.
+    """
+    previous_runs = {run['scale']: run for run in previous.get('runs', ())}
+    rows = []
+    for run in current['runs']:
+        previous_run = previous_runs.get(run['scale'])
+        if previous_run is None:
+            continue
+        for name, scenario in run['scenarios'].items():
+            before = previous_run['scenarios'].get(name)
+            if before is None:
+                continue
+            old = before['latency_ms']['p50']
+            new = scenario['latency_ms']['p50']
+            rows.append((
+                run['scale'],
+                name,
+                old,
+                new,
+                round(new / old, 2) if old else 0,
+                before['queries']['max'],
+                scenario['queries']['max'],
+            ))
+    return rows
@@ -0,0 +1,336 @@
+"""
+Модуль реализует потоковую выгрузку и загрузку каталога товаров.
+
+Каталог передается в CSV (разделитель `;`, как в файле поставки) или JSONL
+(один товар на строку). Категории и страны указываются по названию и
+сопоставляются с id через словари в памяти, недостающие создаются. Товары
+записываются пакетами: одним INSERT ... ON CONFLICT (ean) DO UPDATE на пакет,
+поэтому повторная загрузка того же файла обновляет товары, а не дублирует их.
+Новые товары и товары с изменившейся ценой записываются в историю цен.
+"""
+
+import json
+from csv import DictReader, DictWriter
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .importer import BULK_BATCH_SIZE, IMPORT_CHUNK_SIZE
+from .choices import invalidate_choices
+from .history import HISTORY_FIELDS, price_changed, record_price_history
+from .lookup import invalidate_product_index
+from .models import Category, Country, Product
+from .reconcile import chunked, to_decimal
+
+CATALOGUE_FORMATS = ('csv', 'jsonl')
+CATALOGUE_FIELDS = (
+    'sku',
+    'ean',
+    'name',
+    'category',
+    'country',
+    'price',
+    'old_price',
+    'red_price',
+)
+# Поля товара, которые обновляются при совпадении штрихкода.
+UPSERT_FIELDS = (
+    'sku',
+    'name',
+    'name_key',
+    'category',
+    'country',
+    'price',
+    'old_price',
+    'red_price',
+    'updated_at',
+)
+CSV_DELIMITER = ';'
+TRUE_VALUES = {'1', 'true', 'yes', 'да', '+'}
+
+
+class CatalogueError(ValueError):
+    """Ошибка в строке загружаемого каталога."""
+
+
+class CatalogueProgress(NamedTuple):
+    """Ход загрузки каталога после очередного пакета."""
+
+    rows: int
+    created_categories: int
+    created_countries: int
+
+
+def guess_format(path: str) -> str:
+    """
+    Определяет формат каталога по расширению файла.
+
+    :param path: str - путь к файлу.
+    :return: str - csv или jsonl.
+    """
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_catalogue(stream, fmt: str) -> Iterator[dict]:
+    """
+    Читает строки каталога из открытого текстового потока.
+
+    :param stream: TextIO.
+    :param fmt: str - csv или jsonl.
+    :return: Iterator[dict].
+    """
+    if fmt == 'csv':
+        yield from DictReader(stream, delimiter=CSV_DELIMITER)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def export_rows() -> Iterator[dict]:
+    """
+    Возвращает товары каталога с названиями категорий и стран, \
+    не загружая весь каталог в память.
+
+    :return: Iterator[dict].
+    """
+    queryset = (
+        Product.objects
+        .order_by('ean')
+        .values_list(
+            'sku',
+            'ean',
+            'name',
+            'category__name',
+            'country__name',
+            'price',
+            'old_price',
+            'red_price',
+        )
+    )
+    for values in queryset.iterator(chunk_size=IMPORT_CHUNK_SIZE):
+        yield dict(zip(CATALOGUE_FIELDS, values))
+
+
+def write_catalogue(stream, fmt: str, rows: Iterable[dict]) -> int:
+    """
+    Записывает строки каталога в открытый текстовый поток.
+
+    :param stream: TextIO.
+    :param fmt: str - csv или jsonl.
+    :param rows: Iterable[dict].
+    :return: int - количество записанных товаров.
+    """
+    count = 0
+    if fmt == 'csv':
+        writer = DictWriter(
+            stream,
+            fieldnames=CATALOGUE_FIELDS,
+            delimiter=CSV_DELIMITER
+        )
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, 'red_price': int(row['red_price'])})
+            count += 1
+        return count
+    for row in rows:
+        stream.write(
+            json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+        )
+        count += 1
+    return count
+
+
+def to_bool(value) -> bool:
+    """
+    Приводит значение признака из CSV или JSON к bool.
+
+    :param value: Any.
+    :return: bool.
+    """
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+class CatalogueImporter:
+    """Загружает товары каталога пакетами с созданием недостающих \
+    категорий и стран."""
+
+    def __init__(
+            self,
+            chunk_size: int = IMPORT_CHUNK_SIZE,
+            batch_size: int = BULK_BATCH_SIZE,
+    ) -> None:
+        """
+        Создает объект загрузки и словари название -> id.
+
+        :param chunk_size: int - количество строк в одном пакете.
+        :param batch_size: int - количество товаров в одном INSERT.
+        """
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.categories = dict(Category.objects.values_list('name', 'id'))
+        self.countries = dict(Country.objects.values_list('name', 'id'))
+        self.created_categories = 0
+        self.created_countries = 0
+
+    @staticmethod
+    def resolve(model, names: set, id_map: dict) -> int:
+        """
+        Создает недостающие объекты справочника одним INSERT \
+        и дополняет словарь название -> id.
+
+        :param model: Category | Country.
+        :param names: set[str] - названия из пакета.
+        :param id_map: dict - словарь название -> id.
+        :return: int - количество созданных объектов.
+        """
+        new_names = sorted(names - id_map.keys())
+        if not new_names:
+            return 0
+        for obj in model.objects.bulk_create(
+                [model(name=name) for name in new_names]
+        ):
+            id_map[obj.name] = obj.pk
+        return len(new_names)
+
+    def build_product(self, number: int, row: dict) -> Product:
+        """
+        Создает объект товара из строки каталога.
+
+        :param number: int - номер строки (для сообщения об ошибке).
+        :param row: dict.
+        :return: Product.
+        """
+        ean = str(row.get('ean') or '').strip()
+        name = str(row.get('name') or '').strip()
+        price = to_decimal(row.get('price'))
+        if not all((ean, name, row['category'], row['country'])) \
+                or price is None:
+            raise CatalogueError(
+                f'Строка {number}: не указан штрихкод, наименование, '
+                f'категория, страна или цена: {row!r}'
+            )
+        return Product(
+            sku=str(row.get('sku') or '').strip() or None,
+            ean=ean,
+            name=name,
+            category_id=self.categories[row['category']],
+            country_id=self.countries[row['country']],
+            price=price,
+            old_price=to_decimal(row.get('old_price') or 0) or 0,
+            red_price=to_bool(row.get('red_price')),
+        )
+
+    def load_prices(self, eans: Iterable[str]) -> dict:
+        """
+        Загружает id и цены товаров по штрихкодам пакетными запросами.
+
+        :param eans: Iterable[str].
+        :return: dict - штрихкод -> Product.
+        """
+        products = {}
+        for chunk in chunked(eans, self.batch_size):
+            products.update(
+                (product.ean, product)
+                for product in Product.objects
+                .only('ean', *HISTORY_FIELDS)
+                .filter(ean__in=chunk)
+            )
+        return products
+
+    def import_chunk(self, start: int, chunk: list) -> int:
+        """
+        Записывает пакет строк одной транзакцией.
+
+        :param start: int - номер первой строки пакета.
+        :param chunk: list[dict].
+        :return: int - количество записанных товаров.
+        """
+        with transaction.atomic():
+            self.created_categories += self.resolve(
+                Category,
+                {row['category'] for row in chunk} - {''},
+                self.categories
+            )
+            self.created_countries += self.resolve(
+                Country,
+                {row['country'] for row in chunk} - {''},
+                self.countries
+            )
+            # Повторяющиеся штрихкоды схлопываются, используется
+            # последняя строка.
+            products = {}
+            for number, row in enumerate(chunk, start):
+                product = self.build_product(number, row)
+                products[product.ean] = product
+            current = self.load_prices(products)
+            changed_eans = []
+            for ean, product in products.items():
+                prices = {
+                    field: getattr(product, field) for field in HISTORY_FIELDS
+                }
+                if ean not in current or price_changed(current[ean], prices):
+                    changed_eans.append(ean)
+            Product.objects.bulk_create(
+                products.values(),
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=('ean',),
+                update_fields=UPSERT_FIELDS,
+            )
+            # При обновлении по конфликту id товаров не возвращаются,
+            # поэтому для записи истории они загружаются отдельно.
+            record_price_history(
+                self.load_prices(changed_eans).values(),
+                batch_size=self.batch_size
+            )
+        return len(products)
+
+    def run(
+            self,
+            rows: Iterable[dict],
+            progress: Optional[Callable] = None,
+    ) -> CatalogueProgress:
+        """
+        Загружает строки каталога пакетами.
+
+        :param rows: Iterable[dict] - строки каталога.
+        :param progress: Callable[[CatalogueProgress], None] | None - \
+        вызывается после каждого пакета.
+        :return: CatalogueProgress - итог загрузки.
+        """
+        total = 0
+        start = 1
+        try:
+            for chunk in chunked(rows, self.chunk_size):
+                for row in chunk:
+                    for field in ('category', 'country'):
+                        row[field] = str(row.get(field) or '').strip()
+                total += self.import_chunk(start, chunk)
+                start += len(chunk)
+                if progress is not None:
+                    progress(self.result(total))
+        finally:
+            if self.created_categories or self.created_countries:
+                invalidate_choices()
+            if total:
+                invalidate_product_index()
+        return self.result(total)
+
+    def result(self, rows: int) -> CatalogueProgress:
+        """
+        Возвращает ход загрузки.
+
+        :param rows: int - количество записанных товаров.
+        :return: CatalogueProgress.
+        """
+        return CatalogueProgress(
+            rows,
+            self.created_categories,
+            self.created_countries
+        )
@@ -0,0 +1,85 @@
+"""
+Модуль реализует общий кеш вариантов выбора категории и страны.
+
+В форм-сете Ненайденных товаров каждая форма содержит списки категорий и
+стран. Вместо запроса и отрисовки `<option>` в каждой форме списки
+загружаются один раз, хранятся в памяти процесса вместе с готовым HTML
+вариантов и перестраиваются при изменении категорий или стран (см.
+signals.py).
+"""
+
+from typing import NamedTuple
+
+from django.utils.html import format_html, format_html_join
+
+from .lookup import VersionedIndex, invalidate_index
+from .models import Category, Country
+
+CHOICES_VERSION_KEY = 'priceapp:choices_version'
+EMPTY_LABEL = '---------'
+
+
+def invalidate_choices() -> None:
+    """
+    Сбрасывает кеш вариантов выбора категории и страны.
+
+    :return: None.
+    """
+    invalidate_index(CHOICES_VERSION_KEY)
+
+
+class ModelChoices(NamedTuple):
+    """Варианты выбора справочника: объекты по строковому id \
+    и HTML всех `<option>` без выбранного значения."""
+
+    objects: dict
+    options: str
+
+
+class ChoiceIndex(VersionedIndex):
+    """Кеш вариантов выбора категории и страны товара."""
+
+    version_key = CHOICES_VERSION_KEY
+    models = {
+        'category': Category,
+        'country': Country,
+    }
+
+    def __init__(self) -> None:
+        """Создает пустой кеш, заполнение происходит при первом обращении."""
+        super().__init__()
+        self._choices: dict = {}
+
+    def _build(self) -> None:
+        """
+        Загружает справочники и формирует HTML вариантов выбора.
+
+        :return: None.
+        """
+        choices = {}
+        for field, model in self.models.items():
+            objects = {str(obj.pk): obj for obj in model.objects.all()}
+            options = format_html(
+                '<option value="">{}</option>{}',
+                EMPTY_LABEL,
+                format_html_join(
+                    '',
+                    '<option value="{}">{}</option>',
+                    ((pk, obj) for pk, obj in objects.items())
+                )
+            )
+            choices[field] = ModelChoices(objects, options)
+        self._choices = choices
+
+    def get(self, field: str) -> ModelChoices:
+        """
+        Возвращает варианты выбора для поля.
+
+        :param field: str - category или country.
+        :return: ModelChoices.
+        """
+        self._refresh()
+        return self._choices[field]
+
+
+choice_index = ChoiceIndex()
@@ -4,33 +4,261 @@
 Помимо обычных форм. В модуле используется объявление форм-сетов.
 """
 
+from collections import Counter
+from decimal import Decimal
+
 from django import forms
-from django.forms import modelformset_factory
+from django.core.exceptions import ValidationError
+from django.forms import BaseModelFormSet, modelformset_factory
+from django.forms.utils import flatatt
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+from .choices import choice_index
+from .models import MissingProduct, Product, Tag, UpdateProduct
+
+
+class CachedSelect(forms.Select):
+    """Виджет выбора, который выводит заранее отрисованный HTML \
+    вариантов вместо отрисовки каждого `<option>` по шаблону."""
+
+    def __init__(self, options: str, attrs: dict = None) -> None:
+        """
+        Создает виджет.
+
+        :param options: str - HTML вариантов без выбранного значения.
+        :param attrs: dict | None - атрибуты тега select.
+        """
+        super().__init__(attrs)
+        self.options = options
+
+    def render(self, name, value, attrs=None, renderer=None) -> str:
+        """
+        Выводит тег select, отмечая выбранный вариант в готовом HTML.
+
+        :param name: str - имя поля.
+        :param value: Any - выбранное значение.
+        :param attrs: dict | None - дополнительные атрибуты.
+        :param renderer: Any - не используется.
+        :return: SafeString.
+        """
+        options = self.options
+        if value not in (None, ''):
+            option = f'<option value="{escape(value)}">'
+            options = options.replace(
+                option, option[:-1] + ' selected>', 1
+            )
+        return format_html(
+            '<select name="{}"{}>{}</select>',
+            name,
+            flatatt(self.build_attrs(self.attrs, attrs)),
+            mark_safe(options)
+        )
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """Поле выбора объекта, которое проверяет значение по заранее \
+    загруженным объектам без запроса к БД."""
+
+    def __init__(self, objects: dict, **kwargs) -> None:
+        """
+        Создает поле по загруженным объектам.
+
+        :param objects: dict - объекты по строковому id.
+        :param kwargs: Any - параметры ModelChoiceField.
+        """
+        super().__init__(**kwargs)
+        self.objects = objects
+
+    def to_python(self, value):
+        """
+        Возвращает объект по выбранному id.
 
-from .models import Tag, UpdateProduct, MissingProduct
+        :param value: Any - id объекта.
+        :return: Model | None.
+        """
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objects[str(value)]
+        except KeyError:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            ) from None
+
+
+class MissingProductForm(forms.ModelForm):
+    """Форма Ненайденного товара, по которой создается товар. Поля, \
+    обязательные для товара, обязательны и в форме. Категория и страна \
+    не входят в поля модели формы: они выбираются полями с общим кешем \
+    и проверяются форм-сетом одним запросом на справочник."""
+
+    required_fields = ('ean', 'name', 'price')
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Создает форму и отмечает обязательные поля.
+
+        :param args: Any.
+        :param kwargs: Any.
+        """
+        super().__init__(*args, **kwargs)
+        for name in self.required_fields:
+            self.fields[name].required = True
+
+    def clean_old_price(self) -> Decimal:
+        """
+        Пустая старая цена сохраняется как 0.
+
+        :return: Decimal.
+        """
+        return self.cleaned_data['old_price'] or 0
+
+
+class PageModelFormSet(BaseModelFormSet):
+    """Форм-сет страницы объектов, в котором скрытое поле id каждой \
+    формы проверяется по уже загруженной странице, а не отдельным \
+    запросом на каждую форму."""
+
+    def get_page_objects(self) -> dict:
+        """
+        Возвращает объекты страницы по строковому id.
+
+        :return: dict.
+        """
+        if not hasattr(self, '_page_objects'):
+            self._page_objects = {
+                str(obj.pk): obj for obj in self.get_queryset()
+            }
+        return self._page_objects
+
+    def add_fields(self, form, index) -> None:
+        """
+        Заменяет поле id на поле, проверяемое по объектам страницы.
+
+        :param form: ModelForm.
+        :param index: int | None - номер формы.
+        :return: None.
+        """
+        super().add_fields(form, index)
+        name = self._pk_field.name
+        field = form.fields[name]
+        form.fields[name] = CachedModelChoiceField(
+            self.get_page_objects(),
+            queryset=field.queryset,
+            required=False,
+            initial=field.initial,
+            widget=field.widget,
+        )
 
 
 # Formset используется при подтверждении обновления цен Товаров.
 ProductConfirmUpdateSet = modelformset_factory(
     UpdateProduct,
-    fields=('name', 'price', 'old_price', 'red_price')
+    formset=PageModelFormSet,
+    fields=('name', 'price', 'old_price', 'red_price'),
+    extra=0
 )
 
 
+# Поля формы Ненайденного товара в порядке вывода.
+MISSING_PRODUCT_FIELDS = (
+    'sku',
+    'ean',
+    'name',
+    'category',
+    'country',
+    'price',
+    'old_price',
+    'red_price',
+)
+
+
+class BaseMissingProductFormSet(PageModelFormSet):
+    """Форм-сет Ненайденных товаров, в котором поля категории и страны \
+    всех форм используют один кеш вариантов выбора."""
+
+    def add_fields(self, form, index) -> None:
+        """
+        Добавляет поля категории и страны с общим кешем, начальные \
+        значения берутся из Ненайденного товара.
+
+        :param form: ModelForm.
+        :param index: int | None - номер формы.
+        :return: None.
+        """
+        super().add_fields(form, index)
+        for name in choice_index.models:
+            field = Product._meta.get_field(name).formfield()
+            choices = choice_index.get(name)
+            form.fields[name] = CachedModelChoiceField(
+                choices.objects,
+                queryset=field.queryset,
+                required=field.required,
+                label=field.label,
+                widget=CachedSelect(choices.options),
+            )
+            form.initial.setdefault(name, getattr(form.instance, f'{name}_id'))
+        form.order_fields(MISSING_PRODUCT_FIELDS)
+
+    def clean(self) -> None:
+        """
+        Проверяет, что выбранные категории и страны не удалены после \
+        загрузки кеша вариантов, а штрихкоды не повторяются на странице \
+        и не заняты товарами. Выполняется по одному запросу на \
+        справочник и один запрос штрихкодов для всей страницы.
+
+        :return: None.
+        """
+        super().clean()
+        data_list = [
+            (form, dict(form.cleaned_data))
+            for form in self.forms
+            if form.is_valid() and form.cleaned_data
+        ]
+        for name, model in choice_index.models.items():
+            existing = set(
+                model.objects
+                .filter(pk__in={data[name].pk for _, data in data_list})
+                .values_list('pk', flat=True)
+            )
+            for form, data in data_list:
+                if data[name].pk not in existing:
+                    form.add_error(name, ValidationError(
+                        form.fields[name].error_messages['invalid_choice'],
+                        code='invalid_choice',
+                        params={'value': data[name].pk},
+                    ))
+        ean_count = Counter(data['ean'] for _, data in data_list)
+        taken = set(
+            Product.objects
+            .filter(ean__in=ean_count)
+            .values_list('ean', flat=True)
+        )
+        for form, data in data_list:
+            if data['ean'] in taken:
+                form.add_error(
+                    'ean', 'Товар с таким штрихкодом уже существует.'
+                )
+            elif ean_count[data['ean']] > 1:
+                form.add_error(
+                    'ean', 'Штрихкод повторяется на странице.'
+                )
+
+
 # FormSet используется для добавления всех Товаров, ненайденных в БД при
 # обновлении.
 MissingProductFormSet = modelformset_factory(
     MissingProduct,
-    fields=(
-        'sku',
-        'ean',
-        'name',
-        'category',
-        'country',
-        'price',
-        'old_price',
-        'red_price'
-    )
+    form=MissingProductForm,
+    formset=BaseMissingProductFormSet,
+    fields=tuple(
+        name for name in MISSING_PRODUCT_FIELDS
+        if name not in choice_index.models
+    ),
+    extra=0
 )
 
 
@@ -40,7 +268,13 @@ class PrintSheetForm(forms.Form):
 
     input_line = forms.CharField(
         max_length=100,
-        label='Штрихкод/Название'
+        label='Штрихкод/Название',
+        widget=forms.TextInput(
+            attrs={
+                'list': 'product-search',
+                'autocomplete': 'off',
+            }
+        )
     )
     size = forms.CharField(
         max_length=5,
@@ -52,6 +286,41 @@ class PrintSheetForm(forms.Form):
     )
 
 
+class PrintSheetScanForm(PrintSheetForm):
+    """Форма JSON API сканирования. Товар передается штрихкодом `ean`, \
+    наименованием `name` или строкой `input_line`, как в форме \
+    сканирования; размер и признак двойного ценника проверяются \
+    по допустимым значениям."""
+
+    input_line = forms.CharField(max_length=100, required=False)
+    ean = forms.CharField(max_length=13, required=False)
+    name = forms.CharField(max_length=100, required=False)
+    size = forms.ChoiceField(choices=Tag._meta.get_field('size').choices)
+    is_discount = forms.ChoiceField(
+        choices=(('false', 'false'), ('true', 'true'))
+    )
+
+    def clean(self) -> dict:
+        """
+        Переносит штрихкод или наименование в `input_line`.
+
+        :return: dict.
+        """
+        cleaned_data = super().clean()
+        input_line = (
+            cleaned_data.get('ean')
+            or cleaned_data.get('name')
+            or cleaned_data.get('input_line')
+        )
+        if not input_line:
+            raise ValidationError(
+                'Укажите штрихкод или наименование товара.',
+                code='required'
+            )
+        cleaned_data['input_line'] = input_line
+        return cleaned_data
+
+
 class PrintSheetFreeForm(forms.Form):
     """Форма для добавления в Лист печати ценников товаров по уценки."""
 
@@ -0,0 +1,105 @@
+"""
+Модуль реализует запись и сжатие истории цен товаров.
+
+История только дополняется: при подтверждении обновления цен, добавлении
+ненайденных товаров, загрузке каталога, создании товара и изменении его
+цены в админке записи создаются массовым INSERT и только для новых товаров
+и товаров, цена которых действительно изменилась. Старые записи можно
+проредить, оставив одну запись на товар за день или месяц.
+"""
+
+from datetime import datetime
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils import timezone
+
+from .models import PriceHistory
+
+# Количество записей в одном INSERT при массовой записи истории.
+HISTORY_BATCH_SIZE = 500
+# Поля товара, изменения которых сохраняются в истории.
+HISTORY_FIELDS = ('price', 'old_price', 'red_price')
+# Периоды, до которых прореживается история.
+COMPACT_PERIODS = {
+    'day': TruncDay,
+    'month': TruncMonth,
+}
+
+
+def price_changed(product, data: dict) -> bool:
+    """
+    Проверяет, отличаются ли новые цены от текущих цен товара.
+
+    :param product: Product.
+    :param data: dict - новые значения полей HISTORY_FIELDS.
+    :return: bool.
+    """
+    return any(
+        getattr(product, field) != data[field]
+        for field in HISTORY_FIELDS
+        if field in data
+    )
+
+
+def record_price_history(
+        products: Iterable,
+        recorded_at: datetime = None,
+        batch_size: int = HISTORY_BATCH_SIZE,
+) -> int:
+    """
+    Добавляет в историю текущие цены товаров.
+
+    :param products: Iterable[Product] - товары с уже присвоенными ценами.
+    :param recorded_at: datetime | None - момент изменения, по умолчанию \
+    текущее время.
+    :param batch_size: int - количество записей в одном INSERT.
+    :return: int - количество добавленных записей.
+    """
+    recorded_at = recorded_at or timezone.now()
+    history = PriceHistory.objects.bulk_create(
+        [
+            PriceHistory(
+                product_id=product.pk,
+                price=product.price,
+                old_price=product.old_price or 0,
+                red_price=product.red_price,
+                recorded_at=recorded_at,
+            )
+            for product in products
+        ],
+        batch_size=batch_size
+    )
+    return len(history)
+
+
+def compact_price_history(before: datetime, period: str = 'day') -> int:
+    """
+    Прореживает историю старше указанной даты, оставляя для каждого \
+    товара последнюю запись за период.
+
+    Цена на конец каждого периода сохраняется, поэтому запросы \
+    "цена на дату" для дат старше `before` остаются точными с \
+    точностью до периода.
+
+    :param before: datetime - записи новее этой даты не изменяются.
+    :param period: str - период прореживания (day или month).
+    :return: int - количество удаленных записей.
+    """
+    trunc = COMPACT_PERIODS[period]
+    old_history = PriceHistory.objects.filter(recorded_at__lt=before)
+    # Записи добавляются только в конец, поэтому последняя запись
+    # периода - запись с наибольшим id.
+    keep = (
+        old_history
+        .order_by()
+        .annotate(period=trunc('recorded_at'))
+        .values('product', 'period')
+        .annotate(last_id=Max('id'))
+        .values('last_id')
+    )
+    with transaction.atomic():
+        deleted, _ = old_history.exclude(id__in=keep).delete()
+    return deleted
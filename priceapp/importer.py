@@ -0,0 +1,137 @@
+"""
+Модуль реализует потоковый импорт строк обновления цен.
+
+Строки читаются пакетами фиксированного размера, каждый пакет сверяется
+с товарами и сразу записывается в `UpdateProduct` и `MissingProduct`,
+поэтому в памяти хранятся только пакет и ключи уже записанных товаров.
+
+Повторяющийся ключ в файле, как и внутри пакета, определяется последней
+строкой: записи очереди из следующих пакетов заменяют прежние, поэтому
+результат не зависит от размера пакета.
+"""
+
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from .models import MissingProduct, UpdateProduct
+from .reconcile import ProductReconciler, chunked
+
+# Количество строк файла, обрабатываемых за один проход.
+IMPORT_CHUNK_SIZE = 2000
+# Количество объектов в одном INSERT при массовом создании.
+BULK_BATCH_SIZE = 500
+# Поля, заменяемые при повторной записи товара в очередь терминала.
+UPDATE_PRODUCT_UPDATE_FIELDS = ('price', 'old_price', 'red_price')
+MISSING_PRODUCT_UPDATE_FIELDS = tuple(
+    field.name for field in MissingProduct._meta.concrete_fields
+    if not field.primary_key and field.name not in ('terminal', 'ean')
+)
+
+
+class ImportResult(NamedTuple):
+    """Количество записанных Обновляемых и Ненайденных товаров \
+    и найденных товаров, цены которых не изменились."""
+
+    updated: int
+    missing: int
+    unchanged: int
+
+
+def import_price_rows(
+        rows: Iterable[dict],
+        key: str = 'sku',
+        terminal: str = '',
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        batch_size: int = BULK_BATCH_SIZE,
+        progress: Optional[Callable[[int], None]] = None,
+) -> ImportResult:
+    """
+    Сверяет строки с товарами пакетами и записывает результат \
+    в Обновляемые и Ненайденные товары.
+
+    В Обновляемые товары попадают только товары, цены которых \
+    отличаются от текущих. Для повторяющегося ключа используется \
+    последняя строка, в том числе если повторы попали в разные пакеты.
+
+    :param rows: Iterable[dict] - строки файла (например, DictReader).
+    :param key: str - поле сверки строк с товарами.
+    :param terminal: str - терминал, в очередь которого пишутся товары.
+    :param chunk_size: int - количество строк в одном пакете.
+    :param batch_size: int - количество объектов в одном INSERT.
+    :param progress: Callable[[int], None] | None - вызывается после \
+    каждого пакета с количеством обработанных строк.
+    :return: ImportResult - количество записанных в очереди товаров.
+    """
+    reconciler = ProductReconciler(key=key)
+    # Наименования Обновляемых товаров, записанных в очередь.
+    updated_names = set()
+    missing_keys = set()
+    unchanged_pks = set()
+    processed = 0
+    for chunk in chunked(rows, chunk_size):
+        result = reconciler.reconcile(chunk)
+        changed_products = result.changed_products()
+        changed_names = {product.name for product, _ in changed_products}
+        unchanged_products = [
+            product
+            for product_list, _ in result.matched.values()
+            for product in product_list
+            if product.pk not in result.changed
+        ]
+        # Товар, цена которого изменилась в одном из прежних пакетов,
+        # а в последней строке совпадает с текущей, удаляется из очереди.
+        stale_names = (
+            {product.name for product in unchanged_products}
+            & updated_names
+        ) - changed_names
+        if stale_names:
+            UpdateProduct.objects.filter(
+                terminal=terminal, name__in=stale_names
+            ).delete()
+        # Ненайденный товар из прежнего пакета заменяется последней
+        # строкой (штрихкода в строке может не быть).
+        repeated_keys = missing_keys.intersection(result.missing)
+        if repeated_keys:
+            MissingProduct.objects.filter(
+                terminal=terminal, **{f'{key}__in': repeated_keys}
+            ).delete()
+        update_product_list = [
+            UpdateProduct(
+                name=product.name,
+                price=row['price'],
+                old_price=row['old_price'],
+                red_price=product.red_price,
+                terminal=terminal,
+            )
+            for product, row in changed_products
+        ]
+        missing_product_list = [
+            MissingProduct(terminal=terminal, **row)
+            for row in result.missing.values()
+        ]
+        if missing_product_list:
+            MissingProduct.objects.bulk_create(
+                missing_product_list,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=('terminal', 'ean'),
+                update_fields=MISSING_PRODUCT_UPDATE_FIELDS
+            )
+        if update_product_list:
+            UpdateProduct.objects.bulk_create(
+                update_product_list,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=('terminal', 'name'),
+                update_fields=UPDATE_PRODUCT_UPDATE_FIELDS
+            )
+        updated_names -= stale_names
+        updated_names |= changed_names
+        missing_keys.update(result.missing)
+        unchanged_pks.update(product.pk for product in unchanged_products)
+        unchanged_pks -= result.changed
+        processed += len(chunk)
+        if progress is not None:
+            progress(processed)
+    return ImportResult(
+        len(updated_names), len(missing_keys), len(unchanged_pks)
+    )
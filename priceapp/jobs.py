@@ -0,0 +1,217 @@
+"""
+Модуль реализует фоновую загрузку больших файлов обновления цен.
+
+Загруженный файл сохраняется на диск, создается задача `ImportJob`, после
+чего файл обрабатывается в пуле потоков процесса, а пользователь видит
+страницу с ходом загрузки. Состояние задачи хранится в БД, поэтому ход
+загрузки доступен из любого процесса сервера.
+
+Задача, ход которой не менялся дольше `IMPORT_TIMEOUT` (процесс сервера
+был остановлен во время загрузки), отмечается ошибкой при следующем
+обращении к ней. Завершенные задачи удаляются через `IMPORT_JOB_RETENTION`
+при запуске новой загрузки или командой cleanup_import_jobs.
+"""
+
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from csv import DictReader
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .importer import import_price_rows
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Размер файла в байтах, начиная с которого файл обрабатывается в фоне.
+BACKGROUND_IMPORT_SIZE = getattr(
+    settings, 'PRICEAPP_IMPORT_BACKGROUND_SIZE', 512 * 1024
+)
+# Количество одновременно обрабатываемых файлов. SQLite допускает только
+# одну пишущую транзакцию, поэтому по умолчанию задачи выполняются по одной.
+IMPORT_WORKERS = getattr(settings, 'PRICEAPP_IMPORT_WORKERS', 1)
+# Время без изменения хода загрузки, после которого задача в очереди
+# или в работе считается прерванной.
+IMPORT_TIMEOUT = getattr(
+    settings, 'PRICEAPP_IMPORT_TIMEOUT', timedelta(minutes=30)
+)
+# Время хранения завершенных задач.
+IMPORT_JOB_RETENTION = getattr(
+    settings, 'PRICEAPP_IMPORT_JOB_RETENTION', timedelta(days=7)
+)
+ACTIVE_STATUSES = (ImportJob.PENDING, ImportJob.RUNNING)
+
+executor = ThreadPoolExecutor(
+    max_workers=IMPORT_WORKERS,
+    thread_name_prefix='priceapp-import'
+)
+
+
+def save_upload(upload) -> str:
+    """
+    Сохраняет загруженный файл во временный каталог.
+
+    :param upload: UploadedFile.
+    :return: str - путь к сохраненному файлу.
+    """
+    directory = getattr(settings, 'PRICEAPP_IMPORT_DIR', None)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    descriptor, path = tempfile.mkstemp(
+        suffix='.csv', prefix='price-update-', dir=directory
+    )
+    with os.fdopen(descriptor, 'wb') as file:
+        for chunk in upload.chunks():
+            file.write(chunk)
+    return path
+
+
+def remove_file(path: str) -> None:
+    """
+    Удаляет файл задачи, если он существует.
+
+    :param path: str - путь к файлу.
+    :return: None.
+    """
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def fail_stale_jobs(jobs=None) -> int:
+    """
+    Отмечает ошибкой задачи в очереди или в работе, ход которых \
+    не менялся дольше IMPORT_TIMEOUT, и удаляет их файлы.
+
+    :param jobs: QuerySet | None - проверяемые задачи, по умолчанию все.
+    :return: int - количество прерванных задач.
+    """
+    now = timezone.now()
+    if jobs is None:
+        jobs = ImportJob.objects.all()
+    stale = jobs.filter(
+        status__in=ACTIVE_STATUSES,
+        updated_at__lt=now - IMPORT_TIMEOUT
+    )
+    paths = list(stale.values_list('file_path', flat=True))
+    if not paths:
+        return 0
+    count = stale.update(
+        status=ImportJob.FAILED,
+        error='загрузка прервана при перезапуске сервера',
+        updated_at=now,
+        finished_at=now
+    )
+    for path in paths:
+        remove_file(path)
+    return count
+
+
+def refresh_stale_job(job: ImportJob) -> ImportJob:
+    """
+    Отмечает задачу ошибкой, если она прервана (см. fail_stale_jobs). \
+    Для выполняющейся задачи запросы к БД не выполняются.
+
+    :param job: ImportJob.
+    :return: ImportJob.
+    """
+    if job.status in ACTIVE_STATUSES \
+            and job.updated_at < timezone.now() - IMPORT_TIMEOUT:
+        fail_stale_jobs(ImportJob.objects.filter(pk=job.pk))
+        job.refresh_from_db()
+    return job
+
+
+def delete_finished_jobs(retention: timedelta = IMPORT_JOB_RETENTION) -> int:
+    """
+    Удаляет завершенные задачи старше указанного времени.
+
+    :param retention: timedelta - время хранения завершенных задач.
+    :return: int - количество удаленных задач.
+    """
+    deleted, _ = ImportJob.objects.filter(
+        status__in=(ImportJob.DONE, ImportJob.FAILED),
+        finished_at__lt=timezone.now() - retention
+    ).delete()
+    return deleted
+
+
+def start_import(upload, terminal: str, encoding: str = None) -> ImportJob:
+    """
+    Создает задачу загрузки файла и ставит ее в очередь пула потоков \
+    после фиксации транзакции.
+
+    :param upload: UploadedFile - загруженный CSV файл.
+    :param terminal: str - терминал, в очередь которого пишутся товары.
+    :param encoding: str | None - кодировка файла.
+    :return: ImportJob.
+    """
+    fail_stale_jobs()
+    delete_finished_jobs()
+    job = ImportJob.objects.create(
+        terminal=terminal,
+        file_path=save_upload(upload)
+    )
+    transaction.on_commit(
+        partial(
+            executor.submit,
+            run_import_job,
+            job.pk,
+            encoding or settings.DEFAULT_CHARSET
+        )
+    )
+    return job
+
+
+def run_import_job(job_id, encoding: str) -> None:
+    """
+    Выполняет задачу загрузки: сверяет строки файла с товарами \
+    и записывает ход и результат загрузки в задачу.
+
+    :param job_id: UUID - id задачи.
+    :param encoding: str - кодировка файла.
+    :return: None.
+    """
+    jobs = ImportJob.objects.filter(pk=job_id)
+
+    def update(**fields) -> None:
+        jobs.update(updated_at=timezone.now(), **fields)
+
+    try:
+        job = jobs.get()
+        update(status=ImportJob.RUNNING)
+        with open(job.file_path, encoding=encoding, newline='') as file:
+            # Первый проход считает записи CSV: запись может занимать
+            # несколько строк (перевод строки в кавычках), пустые строки
+            # пропускаются.
+            total = sum(1 for _ in DictReader(file, delimiter=';'))
+            update(total=total)
+            file.seek(0)
+            result = import_price_rows(
+                DictReader(file, delimiter=';'),
+                terminal=job.terminal,
+                progress=lambda processed: update(processed=processed)
+            )
+        update(
+            status=ImportJob.DONE,
+            processed=total,
+            updated=result.updated,
+            missing=result.missing,
+            unchanged=result.unchanged,
+            finished_at=timezone.now()
+        )
+    except Exception as error:
+        logger.exception('Ошибка загрузки файла обновления %s', job_id)
+        update(
+            status=ImportJob.FAILED,
+            error=str(error) or error.__class__.__name__,
+            finished_at=timezone.now()
+        )
+    finally:
+        remove_file(jobs.values_list('file_path', flat=True).first())
+        connection.close()
@@ -0,0 +1,306 @@
+"""
+Модуль реализует раскладку ценников по листам печати.
+
+Каждый ценник - прямоугольник размером `Tag.width` * `Tag.height` (мм),
+который размещается на листе A4 с рабочей областью PAGE_WIDTH * PAGE_HEIGHT.
+Алгоритм раскладки выбирается настройкой `PRICEAPP_LAYOUT_ENGINE`
+(см. LAYOUT_ENGINES). Все алгоритмы детерминированы: при одинаковом
+списке ценников результат раскладки всегда одинаковый.
+"""
+
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+from django.conf import settings
+
+PAGE_WIDTH = 180
+PAGE_HEIGHT = 290
+
+
+class TagSizeError(ValueError):
+    """Ценник не помещается на лист печати."""
+
+
+class Placement(NamedTuple):
+    """Положение ценника на листе (координаты от левого верхнего угла)."""
+
+    item: Any
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class Page:
+    """Лист печати с размещенными на нем ценниками."""
+
+    def __init__(self, width: int = PAGE_WIDTH, height: int = PAGE_HEIGHT):
+        """
+        Создает пустой лист.
+
+        :param width: int - ширина рабочей области, мм.
+        :param height: int - высота рабочей области, мм.
+        """
+        self.width = width
+        self.height = height
+        self.placements: list[Placement] = []
+
+    def __iter__(self):
+        """
+        Перебор ценников листа в порядке сверху вниз и слева направо.
+
+        :return: Iterator[Placement].
+        """
+        return iter(sorted(self.placements, key=lambda p: (p.y, p.x)))
+
+    def __len__(self) -> int:
+        """
+        Количество ценников на листе.
+
+        :return: int.
+        """
+        return len(self.placements)
+
+    @property
+    def used_height(self) -> int:
+        """
+        Высота занятой части листа.
+
+        :return: int.
+        """
+        return max((p.y + p.height for p in self.placements), default=0)
+
+    @property
+    def fill_ratio(self) -> float:
+        """
+        Доля площади листа, занятая ценниками.
+
+        :return: float.
+        """
+        area = sum(p.width * p.height for p in self.placements)
+        return area / (self.width * self.height)
+
+
+def tag_size(item) -> tuple[int, int]:
+    """
+    Возвращает размер ценника для объекта PrintSheet.
+
+    :param item: PrintSheet.
+    :return: tuple[int, int] - ширина и высота.
+    """
+    return item.tag.width, item.tag.height
+
+
+class LayoutEngine:
+    """Базовый класс алгоритма раскладки ценников по листам."""
+
+    def __init__(
+            self,
+            page_width: int = PAGE_WIDTH,
+            page_height: int = PAGE_HEIGHT
+    ):
+        """
+        Создает алгоритм раскладки для листов заданного размера.
+
+        :param page_width: int - ширина рабочей области листа, мм.
+        :param page_height: int - высота рабочей области листа, мм.
+        """
+        self.page_width = page_width
+        self.page_height = page_height
+
+    def prepare(
+            self,
+            items: Iterable,
+            get_size: Callable
+    ) -> list[tuple[int, int, Any]]:
+        """
+        Формирует список (ширина, высота, ценник), отсортированный \
+        по убыванию высоты и ширины. При равных размерах сохраняется \
+        исходный порядок ценников.
+
+        :param items: Iterable - ценники.
+        :param get_size: Callable - функция получения размера ценника.
+        :return: list.
+        :raises TagSizeError: ценник больше рабочей области листа.
+        """
+        prepared = []
+        for item in items:
+            width, height = get_size(item)
+            if width > self.page_width or height > self.page_height:
+                raise TagSizeError(
+                    f'Ценник {width}*{height} не помещается на лист '
+                    f'{self.page_width}*{self.page_height}'
+                )
+            prepared.append((width, height, item))
+        prepared.sort(key=lambda elem: (-elem[1], -elem[0]))
+        return prepared
+
+    def pack(self, items: Iterable, get_size: Callable = tag_size) -> list:
+        """
+        Раскладывает ценники по листам.
+
+        :param items: Iterable - ценники.
+        :param get_size: Callable - функция получения размера ценника.
+        :return: list[Page].
+        """
+        raise NotImplementedError
+
+
+class ShelfLayoutEngine(LayoutEngine):
+    """Раскладка полками (First Fit Decreasing Height).
+
+    Ценники, отсортированные по убыванию высоты, ставятся в первую полку, \
+    в которой хватает места по ширине. Новая полка открывается на первом \
+    листе, где хватает места по высоте.
+    """
+
+    def pack(self, items: Iterable, get_size: Callable = tag_size) -> list:
+        """
+        Раскладывает ценники по листам полками.
+
+        :param items: Iterable - ценники.
+        :param get_size: Callable - функция получения размера ценника.
+        :return: list[Page].
+        """
+        pages: list[Page] = []
+        # Открытые полки: [лист, y, высота, занятая ширина].
+        shelves: list[list] = []
+        page_heights: list[int] = []
+        prepared = self.prepare(items, get_size)
+        min_width = min((elem[0] for elem in prepared), default=0)
+        min_height = min((elem[1] for elem in prepared), default=0)
+        for width, height, item in prepared:
+            shelf = next(
+                (
+                    shelf for shelf in shelves
+                    if shelf[3] + width <= self.page_width
+                    and height <= shelf[2]
+                ),
+                None
+            )
+            if shelf is None:
+                index = next(
+                    (
+                        index for index, used in enumerate(page_heights)
+                        if used + height <= self.page_height
+                    ),
+                    None
+                )
+                if index is None:
+                    pages.append(Page(self.page_width, self.page_height))
+                    page_heights.append(0)
+                    index = len(pages) - 1
+                shelf = [index, page_heights[index], height, 0]
+                page_heights[index] += height
+                shelves.append(shelf)
+            index, y, _, x = shelf
+            pages[index].placements.append(
+                Placement(item, x, y, width, height)
+            )
+            shelf[3] += width
+            # Заполненные полки и листы больше не участвуют в поиске.
+            if shelf[3] + min_width > self.page_width:
+                shelves.remove(shelf)
+            if page_heights[index] + min_height > self.page_height:
+                page_heights[index] = self.page_height
+        return pages
+
+
+class GuillotineLayoutEngine(LayoutEngine):
+    """Гильотинная раскладка (Best Area Fit).
+
+    Свободное место каждого листа хранится списком прямоугольников. \
+    Ценник ставится в свободный прямоугольник с наименьшим остатком \
+    площади, после чего остаток делится одним резом вдоль короткой \
+    стороны. Такие листы всегда можно разрезать сквозными резами.
+    """
+
+    @staticmethod
+    def split(free: tuple, width: int, height: int) -> list[tuple]:
+        """
+        Делит свободный прямоугольник после размещения ценника \
+        в его левом верхнем углу.
+
+        :param free: tuple - свободный прямоугольник (x, y, w, h).
+        :param width: int - ширина ценника.
+        :param height: int - высота ценника.
+        :return: list[tuple] - новые свободные прямоугольники.
+        """
+        x, y, free_width, free_height = free
+        right_width = free_width - width
+        bottom_height = free_height - height
+        if right_width < bottom_height:
+            right = (x + width, y, right_width, height)
+            bottom = (x, y + height, free_width, bottom_height)
+        else:
+            right = (x + width, y, right_width, free_height)
+            bottom = (x, y + height, width, bottom_height)
+        return [
+            rect for rect in (right, bottom)
+            if rect[2] > 0 and rect[3] > 0
+        ]
+
+    def pack(self, items: Iterable, get_size: Callable = tag_size) -> list:
+        """
+        Раскладывает ценники по листам гильотинным методом.
+
+        :param items: Iterable - ценники.
+        :param get_size: Callable - функция получения размера ценника.
+        :return: list[Page].
+        """
+        pages: list[Page] = []
+        free_list: list[list[tuple]] = []
+        prepared = self.prepare(items, get_size)
+        min_width = min((elem[0] for elem in prepared), default=0)
+        min_height = min((elem[1] for elem in prepared), default=0)
+        # Индексы листов, на которых еще есть свободное место.
+        open_pages: list[int] = []
+        for width, height, item in prepared:
+            best: Optional[tuple] = None
+            for index in open_pages:
+                free_rects = free_list[index]
+                for rect_index, rect in enumerate(free_rects):
+                    if rect[2] < width or rect[3] < height:
+                        continue
+                    waste = rect[2] * rect[3] - width * height
+                    if best is None or waste < best[0]:
+                        best = (waste, index, rect_index)
+                if best is not None and best[0] == 0:
+                    break
+            if best is None:
+                pages.append(Page(self.page_width, self.page_height))
+                free_list.append(
+                    [(0, 0, self.page_width, self.page_height)]
+                )
+                open_pages.append(len(pages) - 1)
+                best = (0, len(pages) - 1, 0)
+            _, index, rect_index = best
+            rect = free_list[index].pop(rect_index)
+            free_list[index].extend(
+                free for free in self.split(rect, width, height)
+                if free[2] >= min_width and free[3] >= min_height
+            )
+            if not free_list[index]:
+                open_pages.remove(index)
+            pages[index].placements.append(
+                Placement(item, rect[0], rect[1], width, height)
+            )
+        return pages
+
+
+LAYOUT_ENGINES = {
+    'shelf': ShelfLayoutEngine,
+    'guillotine': GuillotineLayoutEngine,
+}
+
+
+def get_layout_engine(name: Optional[str] = None) -> LayoutEngine:
+    """
+    Возвращает алгоритм раскладки по имени или из настройки \
+    `PRICEAPP_LAYOUT_ENGINE` (по умолчанию 'shelf').
+
+    :param name: str | None - имя алгоритма из LAYOUT_ENGINES.
+    :return: LayoutEngine.
+    """
+    if name is None:
+        name = getattr(settings, 'PRICEAPP_LAYOUT_ENGINE', 'shelf')
+    return LAYOUT_ENGINES[name]()
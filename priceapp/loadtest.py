@@ -0,0 +1,163 @@
+"""
+Модуль реализует нагрузочный тест сканирования под WSGI и ASGI.
+
+Несколько терминалов одновременно сканируют случайные товары синтетического
+каталога (см. synthetic.py): каждый терминал отправляет следующий скан
+после ответа на предыдущий. Запросы выполняются в процессе, без сетевого
+сервера:
+
+* WSGI - через обработчик тестового клиента Django из потоков терминалов,
+  при этом одновременно обрабатывается не больше `workers` запросов, как
+  у WSGI сервера с пулом из `workers` потоков;
+* ASGI - через асинхронный обработчик тестового клиента в одном цикле
+  событий, как у ASGI сервера с одним процессом.
+
+Результат - пропускная способность (запросов в секунду) и задержка
+запроса для каждого режима.
+"""
+
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from .benchmark import summarize
+from .synthetic import product_ean
+
+MODES = ('wsgi', 'asgi')
+ENDPOINTS = {
+    'page': 'priceapp:printsheet_create',
+    'api': 'priceapp:printsheet_scan',
+}
+
+
+class ScanLoadTest:
+    """Нагрузочный тест сканирования одного адреса под WSGI и ASGI."""
+
+    def __init__(
+            self,
+            scale: int,
+            clients: int,
+            requests: int = 50,
+            workers: int = 4,
+            endpoint: str = 'api',
+            seed: int = 0,
+    ) -> None:
+        """
+        Создает нагрузочный тест.
+
+        :param scale: int - количество товаров в каталоге.
+        :param clients: int - количество одновременно работающих терминалов.
+        :param requests: int - количество сканов каждого терминала.
+        :param workers: int - количество потоков WSGI сервера.
+        :param endpoint: str - адрес сканирования из ENDPOINTS.
+        :param seed: int - начальное значение генератора.
+        """
+        self.scale = scale
+        self.clients = clients
+        self.requests = requests
+        self.workers = workers
+        self.url = reverse(ENDPOINTS[endpoint])
+        self.seed = seed
+
+    def scans(self, client_number: int) -> list:
+        """
+        Данные сканов терминала.
+
+        :param client_number: int - номер терминала.
+        :return: list[dict].
+        """
+        generator = random.Random(self.seed * 1000 + client_number)
+        return [
+            {
+                'input_line': product_ean(generator.randrange(self.scale)),
+                'size': 'big',
+                'is_discount': 'false',
+            }
+            for _ in range(self.requests)
+        ]
+
+    def run_wsgi(self) -> tuple:
+        """
+        Выполняет сканы терминалов из потоков через WSGI обработчик.
+
+        :return: tuple[list[float], int, float] - задержки в мс, \
+        количество ошибок, общее время в секундах.
+        """
+        server = threading.Semaphore(self.workers)
+
+        def terminal(client_number: int) -> tuple:
+            client = Client()
+            latency = []
+            errors = 0
+            try:
+                for data in self.scans(client_number):
+                    start = perf_counter()
+                    with server:
+                        response = client.post(self.url, data)
+                    latency.append((perf_counter() - start) * 1000)
+                    errors += response.status_code >= 500
+            finally:
+                connections.close_all()
+            return latency, errors
+
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=self.clients) as executor:
+            results = list(executor.map(terminal, range(self.clients)))
+        elapsed = perf_counter() - start
+        latency = [value for values, _ in results for value in values]
+        return latency, sum(errors for _, errors in results), elapsed
+
+    def run_asgi(self) -> tuple:
+        """
+        Выполняет сканы терминалов в одном цикле событий через ASGI \
+        обработчик.
+
+        :return: tuple[list[float], int, float] - задержки в мс, \
+        количество ошибок, общее время в секундах.
+        """
+        async def terminal(client_number: int) -> tuple:
+            client = AsyncClient()
+            latency = []
+            errors = 0
+            for data in self.scans(client_number):
+                start = perf_counter()
+                response = await client.post(self.url, data)
+                latency.append((perf_counter() - start) * 1000)
+                errors += response.status_code >= 500
+            return latency, errors
+
+        async def run() -> list:
+            return await asyncio.gather(
+                *(terminal(number) for number in range(self.clients))
+            )
+
+        start = perf_counter()
+        results = asyncio.run(run())
+        elapsed = perf_counter() - start
+        connections.close_all()
+        latency = [value for values, _ in results for value in values]
+        return latency, sum(errors for _, errors in results), elapsed
+
+    def run(self, mode: str) -> dict:
+        """
+        Выполняет тест в заданном режиме.
+
+        :param mode: str - режим из MODES.
+        :return: dict.
+        """
+        latency, errors, elapsed = getattr(self, f'run_{mode}')()
+        return {
+            'mode': mode,
+            'clients': self.clients,
+            'requests': len(latency),
+            'errors': errors,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(len(latency) / elapsed, 1),
+            'latency_ms': summarize(round(value, 3) for value in latency),
+        }
@@ -0,0 +1,302 @@
+"""
+Модуль реализует индекс товаров в памяти процесса.
+
+Индекс используется при сканировании штрихкодов: вместо нескольких запросов
+к БД на каждый скан (поиск товара, категории, страны и макета ценника)
+поиск выполняется по словарям, собранным одним запросом. Индекс
+перестраивается при изменении версии, которая меняется сигналами
+моделей `Product`, `Category`, `Country` и `Tag` (см. signals.py).
+Версия хранится в кеше PRICEAPP_INDEX_CACHE, общем для всех процессов
+сервера, поэтому изменение в одном процессе сбрасывает индексы во всех.
+Для асинхронных представлений у методов поиска есть варианты с префиксом
+`a`, которые не блокируют цикл событий.
+"""
+
+import threading
+from typing import Optional
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Product, Tag, normalize_name
+
+INDEX_VERSION_KEY = 'priceapp:product_index_version'
+# Кеш версий индексов. Кеш в памяти процесса (LocMemCache) подходит только
+# для сервера с одним процессом.
+INDEX_CACHE = getattr(settings, 'PRICEAPP_INDEX_CACHE', DEFAULT_CACHE_ALIAS)
+
+
+def new_version() -> str:
+    """
+    Создает новую версию индекса.
+
+    Версия - случайная строка, а не счетчик, поэтому одновременные \
+    изменения из разных процессов не могут записать одинаковую версию.
+
+    :return: str.
+    """
+    return uuid4().hex
+
+
+def get_index_version(key: str = INDEX_VERSION_KEY) -> str:
+    """
+    Возвращает текущую версию индекса.
+
+    :param key: str - ключ версии в кеше.
+    :return: str.
+    """
+    return caches[INDEX_CACHE].get_or_set(key, new_version, timeout=None)
+
+
+async def aget_index_version(key: str = INDEX_VERSION_KEY) -> str:
+    """
+    Асинхронный вариант `get_index_version`.
+
+    :param key: str - ключ версии в кеше.
+    :return: str.
+    """
+    return await caches[INDEX_CACHE].aget_or_set(
+        key, new_version, timeout=None
+    )
+
+
+def invalidate_index(key: str) -> None:
+    """
+    Меняет версию индекса, после чего индекс будет перестроен \
+    при следующем обращении.
+
+    Внутри транзакции версия меняется еще раз после ее фиксации: \
+    другой процесс мог перестроить индекс по данным до фиксации.
+
+    :param key: str - ключ версии в кеше.
+    :return: None.
+    """
+    def change_version() -> None:
+        caches[INDEX_CACHE].set(key, new_version(), timeout=None)
+
+    change_version()
+    if connection.in_atomic_block:
+        transaction.on_commit(change_version)
+
+
+def invalidate_product_index() -> None:
+    """
+    Сбрасывает индекс товаров.
+
+    Функцию необходимо вызывать после массовых операций (bulk_create, \
+    bulk_update, update), так как они не отправляют сигналы моделей.
+
+    :return: None.
+    """
+    invalidate_index(INDEX_VERSION_KEY)
+
+
+class VersionedIndex:
+    """Базовый класс индекса в памяти процесса, который перестраивается \
+    при изменении версии индекса (по умолчанию - индекса товаров)."""
+
+    version_key = INDEX_VERSION_KEY
+
+    def __init__(self) -> None:
+        """Создает пустой индекс, заполнение происходит при первом поиске."""
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+
+    def _build(self) -> None:
+        """
+        Заполняет индекс данными из БД.
+
+        :return: None.
+        """
+        raise NotImplementedError
+
+    def _refresh(self) -> None:
+        """
+        Перестраивает индекс, если его версия устарела.
+
+        :return: None.
+        """
+        version = get_index_version(self.version_key)
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._build()
+                self._version = version
+
+    async def _arefresh(self) -> None:
+        """
+        Асинхронный вариант `_refresh`: версия читается из кеша \
+        асинхронным методом, а перестроение индекса (запросы к БД) \
+        выполняется в потоке.
+
+        :return: None.
+        """
+        version = await aget_index_version(self.version_key)
+        if version != self._version:
+            await sync_to_async(self._refresh)()
+
+
+class ProductLookupIndex(VersionedIndex):
+    """Индекс товаров по штрихкоду и наименованию (без учета регистра) \
+    с уже подставленными названиями категории и страны."""
+
+    def __init__(self) -> None:
+        """Создает пустой индекс, заполнение происходит при первом поиске."""
+        super().__init__()
+        self._by_ean: dict = {}
+        self._by_name: dict = {}
+        self._tags: dict = {}
+
+    def _build(self) -> None:
+        """
+        Загружает товары и макеты ценников и формирует словари поиска.
+
+        Товары загружаются в порядке сортировки модели, поэтому при \
+        совпадении наименований в индекс попадает последний обновленный \
+        товар, как и при использовании `.first()`.
+
+        :return: None.
+        """
+        rows = (
+            Product.objects
+            .annotate(
+                category_name=F('category__name'),
+                country_name=F('country__name'),
+            )
+            .values(
+                'ean',
+                'name',
+                'name_key',
+                'category_name',
+                'country_name',
+                'price',
+                'old_price',
+                'red_price',
+            )
+        )
+        by_ean = {}
+        by_name = {}
+        for row in rows:
+            product = {
+                'name': row['name'],
+                'category': row['category_name'],
+                'country': row['country_name'],
+                'price': row['price'],
+                'old_price': row['old_price'],
+                'red_price': row['red_price'],
+            }
+            by_ean.setdefault(row['ean'], product)
+            by_name.setdefault(row['name_key'], product)
+        self._by_ean = by_ean
+        self._by_name = by_name
+        self._tags = {
+            (tag.size, tag.is_discount): tag
+            for tag in Tag.objects.all()
+        }
+
+    def _find(self, input_line: str) -> Optional[dict]:
+        """
+        Ищет товар в индексе без проверки версии.
+
+        :param input_line: str - штрихкод или наименование товара.
+        :return: dict | None - копия записи индекса.
+        """
+        product = self._by_ean.get(input_line)
+        if product is None:
+            product = self._by_name.get(normalize_name(input_line))
+        return dict(product) if product else None
+
+    def _find_by_name(self, name: str) -> Optional[dict]:
+        """
+        Ищет товар по наименованию в индексе без проверки версии.
+
+        :param name: str - наименование товара.
+        :return: dict | None - копия записи индекса.
+        """
+        product = self._by_name.get(normalize_name(name))
+        return dict(product) if product else None
+
+    def _get_tag(self, size: str, is_discount: bool) -> Tag:
+        """
+        Возвращает макет ценника из индекса без проверки версии.
+
+        :param size: str - размер ценника.
+        :param is_discount: bool - двойной ценник.
+        :return: Tag.
+        """
+        try:
+            return self._tags[(size, is_discount)]
+        except KeyError:
+            raise Tag.DoesNotExist(
+                f'Ценник {size!r} (is_discount={is_discount}) не найден'
+            ) from None
+
+    def find(self, input_line: str) -> Optional[dict]:
+        """
+        Ищет товар по штрихкоду или наименованию без учета регистра.
+
+        :param input_line: str - штрихкод или наименование товара.
+        :return: dict | None - копия записи индекса.
+        """
+        self._refresh()
+        return self._find(input_line)
+
+    def find_by_name(self, name: str) -> Optional[dict]:
+        """
+        Ищет товар по наименованию без учета регистра.
+
+        :param name: str - наименование товара.
+        :return: dict | None - копия записи индекса.
+        """
+        self._refresh()
+        return self._find_by_name(name)
+
+    def get_tag(self, size: str, is_discount: bool) -> Tag:
+        """
+        Возвращает макет ценника по размеру и признаку двойного ценника.
+
+        :param size: str - размер ценника.
+        :param is_discount: bool - двойной ценник.
+        :return: Tag.
+        """
+        self._refresh()
+        return self._get_tag(size, is_discount)
+
+    async def afind(self, input_line: str) -> Optional[dict]:
+        """
+        Асинхронный вариант `find`.
+
+        :param input_line: str - штрихкод или наименование товара.
+        :return: dict | None - копия записи индекса.
+        """
+        await self._arefresh()
+        return self._find(input_line)
+
+    async def afind_by_name(self, name: str) -> Optional[dict]:
+        """
+        Асинхронный вариант `find_by_name`.
+
+        :param name: str - наименование товара.
+        :return: dict | None - копия записи индекса.
+        """
+        await self._arefresh()
+        return self._find_by_name(name)
+
+    async def aget_tag(self, size: str, is_discount: bool) -> Tag:
+        """
+        Асинхронный вариант `get_tag`.
+
+        :param size: str - размер ценника.
+        :param is_discount: bool - двойной ценник.
+        :return: Tag.
+        """
+        await self._arefresh()
+        return self._get_tag(size, is_discount)
+
+
+product_index = ProductLookupIndex()
@@ -0,0 +1,64 @@
+"""Команда для сравнения алгоритмов раскладки ценников по листам."""
+
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from priceapp.layout import LAYOUT_ENGINES
+from priceapp.models import Tag
+
+# Размеры ценников, если в БД нет ни одного макета.
+DEFAULT_SIZES = ((90, 45), (45, 33))
+
+
+class Command(BaseCommand):
+    """Раскладывает случайный набор ценников всеми алгоритмами \
+    и выводит количество листов, заполнение и время работы."""
+
+    help = 'Сравнение алгоритмов раскладки ценников по листам A4.'
+
+    def add_arguments(self, parser) -> None:
+        """
+        Добавляет аргументы команды.
+
+        :param parser: ArgumentParser.
+        :return: None.
+        """
+        parser.add_argument('--count', type=int, default=3000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options) -> None:
+        """
+        Выполняет сравнение алгоритмов раскладки.
+
+        :param args: Any.
+        :param options: dict.
+        :return: None.
+        """
+        sizes = list(
+            Tag.objects
+            .values_list('width', 'height')
+            .distinct()
+            .order_by('width', 'height')
+        ) or list(DEFAULT_SIZES)
+        generator = random.Random(options['seed'])
+        items = [generator.choice(sizes) for _ in range(options['count'])]
+        self.stdout.write(
+            f'Ценников: {len(items)}, размеры: '
+            + ', '.join(f'{w}*{h}' for w, h in sizes)
+        )
+        for name, engine_class in LAYOUT_ENGINES.items():
+            engine = engine_class()
+            best = None
+            for _ in range(options['repeat']):
+                start = perf_counter()
+                pages = engine.pack(items, get_size=lambda item: item)
+                elapsed = perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            fill = sum(page.fill_ratio for page in pages) / len(pages)
+            self.stdout.write(
+                f'{name:>10}: листов {len(pages)}, '
+                f'заполнение {fill:.1%}, {best * 1000:.1f} мс'
+            )
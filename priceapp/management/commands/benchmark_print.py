@@ -0,0 +1,118 @@
+"""Команда для замера времени отрисовки страницы печати ценников."""
+
+import random
+from decimal import Decimal
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+
+from priceapp.layout import get_layout_engine
+from priceapp.models import PrintSheet, Tag
+from priceapp.tag_render import TagHTMLRenderer
+
+# Прежний способ отрисовки: проверки макета и `{% include %}` на каждый
+# ценник. Используется только для сравнения.
+INCLUDE_TEMPLATE = '''
+{% for page in page_list %}{% for placement in page %}
+{% with tag=placement.item %}
+{% if tag.tag.size == 'big' and tag.tag.is_discount == False %}
+{% include 'priceapp/big_tags.html' %}{% endif %}
+{% if tag.tag.size == 'big' and tag.tag.is_discount == True %}
+{% include 'priceapp/big_sale_tags.html' %}{% endif %}
+{% if tag.tag.size == 'small' and tag.tag.is_discount == False %}
+{% include 'priceapp/small_tags.html' %}{% endif %}
+{% if tag.tag.size == 'small' and tag.tag.is_discount == True %}
+{% include 'priceapp/small_sale_tags.html' %}{% endif %}
+{% endwith %}{% endfor %}{% endfor %}
+'''
+FRAGMENT_TEMPLATE = '''
+{% for page, tag_list in page_list %}{% for placement, html in tag_list %}
+{{ html }}{% endfor %}{% endfor %}
+'''
+TAG_LIST = (
+    Tag(name='Большой', width=90, height=45, size='big'),
+    Tag(name='Большой двойной', width=90, height=45, size='big',
+        is_discount=True),
+    Tag(name='Маленький', width=45, height=33, size='small'),
+    Tag(name='Маленький двойной', width=45, height=33, size='small',
+        is_discount=True),
+)
+
+
+class Command(BaseCommand):
+    """Сравнивает отрисовку страницы печати через `{% include %}` \
+    и через TagHTMLRenderer на синтетическом списке ценников."""
+
+    help = 'Замер времени отрисовки страницы печати ценников.'
+
+    def add_arguments(self, parser) -> None:
+        """
+        Добавляет аргументы команды.
+
+        :param parser: ArgumentParser.
+        :return: None.
+        """
+        parser.add_argument('--count', type=int, default=1000)
+        parser.add_argument(
+            '--unique',
+            type=int,
+            default=None,
+            help='Количество разных товаров (по умолчанию все разные).'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options) -> None:
+        """
+        Выполняет замер.
+
+        :param args: Any.
+        :param options: dict.
+        :return: None.
+        """
+        generator = random.Random(options['seed'])
+        unique = options['unique'] or options['count']
+        items = []
+        for index in range(options['count']):
+            number = index % unique
+            items.append(
+                PrintSheet(
+                    name=f'WH-{number}XM5',
+                    category='наушники',
+                    country='Малайзия',
+                    price=Decimal(10000 + number),
+                    old_price=Decimal(20000 + number),
+                    red_price=bool(number % 2),
+                    discount_type='Акция !!!',
+                    tag=TAG_LIST[number % len(TAG_LIST)],
+                )
+            )
+        generator.shuffle(items)
+        page_list = get_layout_engine().pack(items)
+        engine = engines['django']
+        include_template = engine.from_string(INCLUDE_TEMPLATE)
+        fragment_template = engine.from_string(FRAGMENT_TEMPLATE)
+
+        def render_include() -> str:
+            return include_template.render({'page_list': page_list})
+
+        def render_fragments() -> str:
+            return fragment_template.render(
+                {'page_list': TagHTMLRenderer().render_pages(page_list)}
+            )
+
+        self.stdout.write(
+            f'Ценников: {len(items)}, разных товаров: {unique}'
+        )
+        for name, render in (
+                ('include', render_include),
+                ('renderer', render_fragments),
+        ):
+            best = None
+            for _ in range(options['repeat']):
+                start = perf_counter()
+                render()
+                elapsed = perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            self.stdout.write(f'{name:>10}: {best * 1000:.1f} мс')
@@ -0,0 +1,117 @@
+"""Команда для замера основных сценариев работы на синтетическом каталоге."""
+
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from priceapp.benchmark import (
+    SCALES,
+    SCENARIOS,
+    WorkflowBenchmark,
+    compare,
+    environment,
+)
+
+
+class Command(BaseCommand):
+    """Выполняет сценарии сканирования, печати, обновления цен \
+    и подтверждения на синтетических каталогах во временной БД \
+    и сохраняет результат в JSON."""
+
+    help = 'Замер сценариев работы на синтетическом каталоге.'
+
+    def add_arguments(self, parser) -> None:
+        """
+        Добавляет аргументы команды.
+
+        :param parser: ArgumentParser.
+        :return: None.
+        """
+        parser.add_argument(
+            '--scale',
+            type=int,
+            action='append',
+            help=f'Размер каталога, можно указать несколько раз '
+                 f'(по умолчанию {", ".join(map(str, SCALES))}).'
+        )
+        parser.add_argument(
+            '--scenario',
+            choices=tuple(SCENARIOS),
+            action='append',
+            help='Сценарий, можно указать несколько раз (по умолчанию все).'
+        )
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--tags', type=int, default=300)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для сохранения JSON.')
+        parser.add_argument(
+            '--compare',
+            help='JSON предыдущего запуска для сравнения.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Создает временную БД, выполняет замеры и выводит результат.
+
+        :param args: Any.
+        :param options: dict.
+        :return: None.
+        """
+        names = options['scenario'] or list(SCENARIOS)
+        result = {
+            'environment': environment(),
+            'options': {
+                'repeat': options['repeat'],
+                'rows': options['rows'],
+                'tags': options['tags'],
+                'seed': options['seed'],
+            },
+            'runs': [],
+        }
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            for scale in options['scale'] or SCALES:
+                bench = WorkflowBenchmark(
+                    scale,
+                    repeat=options['repeat'],
+                    rows=options['rows'],
+                    tags=options['tags'],
+                    seed=options['seed'],
+                )
+
+                def report(name: str, scenario: dict) -> None:
+                    self.stderr.write(
+                        f'{scale:>7} {name:<11} '
+                        f'p50 {scenario["latency_ms"]["p50"]:>9.1f} мс  '
+                        f'p95 {scenario["latency_ms"]["p95"]:>9.1f} мс  '
+                        f'запросов {scenario["queries"]["max"]:>4}  '
+                        f'память {scenario["peak_memory_kb"]:>9.1f} КБ'
+                    )
+
+                result['runs'].append(bench.run(names, report))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        output = json.dumps(result, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                previous = json.load(file)
+            for row in compare(result, previous):
+                self.stderr.write(
+                    '{:>7} {:<11} p50 {:>9.1f} -> {:>9.1f} мс (x{}), '
+                    'запросов {} -> {}'.format(*row)
+                )
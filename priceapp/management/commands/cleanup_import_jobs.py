@@ -0,0 +1,45 @@
+"""Команда для очистки задач фоновой загрузки файлов."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from priceapp.jobs import (
+    IMPORT_JOB_RETENTION,
+    delete_finished_jobs,
+    fail_stale_jobs,
+)
+
+
+class Command(BaseCommand):
+    """Отмечает ошибкой прерванные задачи загрузки и удаляет \
+    завершенные задачи старше указанного количества дней."""
+
+    help = 'Очистка задач фоновой загрузки файлов обновления цен.'
+
+    def add_arguments(self, parser) -> None:
+        """
+        Добавляет аргументы команды.
+
+        :param parser: ArgumentParser.
+        :return: None.
+        """
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=IMPORT_JOB_RETENTION.days
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Выполняет очистку задач загрузки.
+
+        :param args: Any.
+        :param options: dict.
+        :return: None.
+        """
+        failed = fail_stale_jobs()
+        deleted = delete_finished_jobs(timedelta(days=options['days']))
+        self.stdout.write(
+            f'Прервано задач: {failed}, удалено задач: {deleted}'
+        )
@@ -0,0 +1,23 @@
+"""Команда для удаления очередей терминалов без активной сессии."""
+
+from django.core.management.base import BaseCommand
+
+from priceapp.state import delete_abandoned_queues
+
+
+class Command(BaseCommand):
+    """Удаляет очереди печати и обновления цен терминалов, сессии \
+    которых истекли или удалены, и очереди без терминала."""
+
+    help = 'Удаление очередей терминалов без активной сессии.'
+
+    def handle(self, *args, **options) -> None:
+        """
+        Выполняет удаление очередей.
+
+        :param args: Any.
+        :param options: dict.
+        :return: None.
+        """
+        for name, deleted in delete_abandoned_queues().items():
+            self.stdout.write(f'{name}: удалено записей {deleted}')
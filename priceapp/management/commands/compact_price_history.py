@@ -0,0 +1,44 @@
+"""Команда для прореживания старых записей истории цен."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from priceapp.history import COMPACT_PERIODS, compact_price_history
+
+
+class Command(BaseCommand):
+    """Оставляет в истории цен старше указанного количества дней \
+    одну запись на товар за период."""
+
+    help = 'Прореживание истории цен старше указанного количества дней.'
+
+    def add_arguments(self, parser) -> None:
+        """
+        Добавляет аргументы команды.
+
+        :param parser: ArgumentParser.
+        :return: None.
+        """
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument(
+            '--period',
+            choices=tuple(COMPACT_PERIODS),
+            default='day'
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Выполняет прореживание истории цен.
+
+        :param args: Any.
+        :param options: dict.
+        :return: None.
+        """
+        before = timezone.now() - timedelta(days=options['days'])
+        deleted = compact_price_history(before, options['period'])
+        self.stdout.write(
+            f'Удалено записей истории цен: {deleted} '
+            f'(старше {before:%d.%m.%Y}, период: {options["period"]})'
+        )
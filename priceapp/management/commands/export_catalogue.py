@@ -0,0 +1,55 @@
+"""Команда для выгрузки каталога товаров в CSV или JSONL."""
+
+import sys
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from priceapp.catalogue import (
+    CATALOGUE_FORMATS,
+    export_rows,
+    guess_format,
+    write_catalogue,
+)
+
+
+class Command(BaseCommand):
+    """Выгружает все товары с названиями категорий и стран \
+    в формате, который принимает import_catalogue."""
+
+    help = 'Выгрузка каталога товаров в CSV (разделитель ;) или JSONL.'
+
+    def add_arguments(self, parser) -> None:
+        """
+        Добавляет аргументы команды.
+
+        :param parser: ArgumentParser.
+        :return: None.
+        """
+        parser.add_argument('path', help='путь к файлу или - для stdout')
+        parser.add_argument('--format', choices=CATALOGUE_FORMATS)
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options) -> None:
+        """
+        Выполняет выгрузку каталога.
+
+        :param args: Any.
+        :param options: dict.
+        :return: None.
+        """
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        started = perf_counter()
+        if path == '-':
+            count = write_catalogue(sys.stdout, fmt, export_rows())
+        else:
+            with open(
+                    path, 'w', encoding=options['encoding'], newline=''
+            ) as stream:
+                count = write_catalogue(stream, fmt, export_rows())
+        elapsed = perf_counter() - started
+        self.stderr.write(
+            f'Выгружено товаров: {count} за {elapsed:.2f} с '
+            f'({count / max(elapsed, 1e-9):.0f} в секунду)'
+        )
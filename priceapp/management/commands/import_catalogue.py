@@ -0,0 +1,81 @@
+"""Команда для загрузки каталога товаров из CSV или JSONL."""
+
+import sys
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from priceapp.catalogue import (
+    CATALOGUE_FORMATS,
+    CatalogueError,
+    CatalogueImporter,
+    CatalogueProgress,
+    guess_format,
+    read_catalogue,
+)
+from priceapp.importer import BULK_BATCH_SIZE, IMPORT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    """Загружает товары, категории и страны из файла каталога. \
+    Товары с уже существующим штрихкодом обновляются."""
+
+    help = 'Загрузка каталога товаров из CSV (разделитель ;) или JSONL.'
+
+    def add_arguments(self, parser) -> None:
+        """
+        Добавляет аргументы команды.
+
+        :param parser: ArgumentParser.
+        :return: None.
+        """
+        parser.add_argument('path', help='путь к файлу или - для stdin')
+        parser.add_argument('--format', choices=CATALOGUE_FORMATS)
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument(
+            '--chunk-size', type=int, default=IMPORT_CHUNK_SIZE
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BULK_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Выполняет загрузку каталога с выводом хода загрузки.
+
+        :param args: Any.
+        :param options: dict.
+        :return: None.
+        """
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        importer = CatalogueImporter(
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size']
+        )
+        started = perf_counter()
+
+        def report(progress: CatalogueProgress) -> None:
+            elapsed = perf_counter() - started
+            self.stderr.write(
+                f'Загружено товаров: {progress.rows} '
+                f'({progress.rows / elapsed:.0f} в секунду)'
+            )
+
+        if path == '-':
+            stream = sys.stdin
+        else:
+            stream = open(path, encoding=options['encoding'], newline='')
+        try:
+            result = importer.run(read_catalogue(stream, fmt), report)
+        except (CatalogueError, KeyError, ValueError) as error:
+            raise CommandError(error) from error
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено товаров: {result.rows} за {elapsed:.2f} с, '
+            f'создано категорий: {result.created_categories}, '
+            f'стран: {result.created_countries}'
+        ))
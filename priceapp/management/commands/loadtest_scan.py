@@ -0,0 +1,130 @@
+"""Команда нагрузочного теста сканирования под WSGI и ASGI."""
+
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from priceapp.benchmark import environment
+from priceapp.loadtest import ENDPOINTS, MODES, ScanLoadTest
+from priceapp.synthetic import generate_catalogue
+
+CLIENTS = (1, 8, 32)
+
+
+class Command(BaseCommand):
+    """Создает временную БД с синтетическим каталогом, выполняет сканы \
+    нескольких терминалов одновременно в режимах WSGI и ASGI и выводит \
+    пропускную способность и задержку запросов."""
+
+    help = 'Нагрузочный тест сканирования под WSGI и ASGI.'
+
+    def add_arguments(self, parser) -> None:
+        """
+        Добавляет аргументы команды.
+
+        :param parser: ArgumentParser.
+        :return: None.
+        """
+        parser.add_argument('--scale', type=int, default=10000)
+        parser.add_argument(
+            '--clients',
+            type=int,
+            action='append',
+            help=f'Количество одновременно работающих терминалов, можно '
+                 f'указать несколько раз '
+                 f'(по умолчанию {", ".join(map(str, CLIENTS))}).'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Количество сканов каждого терминала.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков WSGI сервера.'
+        )
+        parser.add_argument(
+            '--endpoint',
+            choices=tuple(ENDPOINTS),
+            default='api',
+            help='page - страница сканирования, api - JSON API.'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=MODES,
+            action='append',
+            help='Режим, можно указать несколько раз (по умолчанию все).'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для сохранения JSON.')
+
+    def handle(self, *args, **options) -> None:
+        """
+        Создает временную БД, выполняет тест и выводит результат.
+
+        :param args: Any.
+        :param options: dict.
+        :return: None.
+        """
+        result = {
+            'environment': environment(),
+            'options': {
+                'scale': options['scale'],
+                'requests': options['requests'],
+                'workers': options['workers'],
+                'endpoint': options['endpoint'],
+                'seed': options['seed'],
+            },
+            'runs': [],
+        }
+        # Потоки терминалов открывают собственные соединения, поэтому
+        # временная БД создается в файле, а не в памяти.
+        descriptor, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(descriptor)
+        connection.settings_dict['TEST']['NAME'] = path
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            generate_catalogue(options['scale'], options['seed'])
+            for clients in options['clients'] or CLIENTS:
+                test = ScanLoadTest(
+                    options['scale'],
+                    clients,
+                    requests=options['requests'],
+                    workers=options['workers'],
+                    endpoint=options['endpoint'],
+                    seed=options['seed'],
+                )
+                for mode in options['mode'] or MODES:
+                    run = test.run(mode)
+                    result['runs'].append(run)
+                    self.stderr.write(
+                        f'{mode:<4} терминалов {clients:>4}  '
+                        f'{run["throughput_rps"]:>8.1f} запр/с  '
+                        f'p50 {run["latency_ms"]["p50"]:>8.1f} мс  '
+                        f'p95 {run["latency_ms"]["p95"]:>8.1f} мс  '
+                        f'ошибок {run["errors"]}'
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            if os.path.exists(path):
+                os.remove(path)
+        output = json.dumps(result, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
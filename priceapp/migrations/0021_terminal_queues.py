@@ -0,0 +1,46 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('priceapp', '0020_alter_product_ean_alter_product_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='missingproduct',
+            name='terminal',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='терминал'),
+        ),
+        migrations.AddField(
+            model_name='printsheet',
+            name='terminal',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=32, verbose_name='терминал'),
+        ),
+        migrations.AddField(
+            model_name='updateproduct',
+            name='terminal',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='терминал'),
+        ),
+        migrations.AlterField(
+            model_name='missingproduct',
+            name='ean',
+            field=models.CharField(blank=True, help_text='4548736081680', max_length=13, null=True, verbose_name='штрихкод'),
+        ),
+        migrations.AlterField(
+            model_name='updateproduct',
+            name='name',
+            field=models.CharField(max_length=100, verbose_name='наименование'),
+        ),
+        migrations.AddConstraint(
+            model_name='missingproduct',
+            constraint=models.UniqueConstraint(fields=('terminal', 'ean'), name='unique_missingproduct_terminal_ean'),
+        ),
+        migrations.AddConstraint(
+            model_name='updateproduct',
+            constraint=models.UniqueConstraint(fields=('terminal', 'name'), name='unique_updateproduct_terminal_name'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:45
+
+from django.db import migrations, models
+
+
+def fill_name_key(apps, schema_editor):
+    Product = apps.get_model('priceapp', 'Product')
+    product_list = list(Product.objects.only('id', 'name'))
+    for product in product_list:
+        product.name_key = product.name.casefold()
+    Product.objects.bulk_update(product_list, ['name_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('priceapp', '0021_terminal_queues'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='name_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100, verbose_name='наименование для поиска'),
+        ),
+        migrations.RunPython(fill_name_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('priceapp', '0022_product_name_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=0, max_digits=7, verbose_name='цена')),
+                ('old_price', models.DecimalField(decimal_places=0, default=0, max_digits=7, verbose_name='старая цена')),
+                ('red_price', models.BooleanField(default=False, verbose_name='красный ценник')),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='дата изменения')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='priceapp.product', verbose_name='товар')),
+            ],
+            options={
+                'verbose_name': 'изменение цены',
+                'verbose_name_plural': 'история цен',
+                'ordering': ('-recorded_at',),
+                'indexes': [models.Index(fields=['product', 'recorded_at'], name='pricehistory_product_recorded')],
+            },
+        ),
+    ]
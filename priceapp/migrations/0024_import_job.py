@@ -0,0 +1,36 @@
+# Generated by Django 4.2.2 on 2026-10-18 20:00
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('priceapp', '0023_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('terminal', models.CharField(db_index=True, max_length=32, verbose_name='терминал')),
+                ('status', models.CharField(choices=[('pending', 'в очереди'), ('running', 'выполняется'), ('done', 'завершена'), ('failed', 'ошибка')], default='pending', max_length=10, verbose_name='статус')),
+                ('file_path', models.CharField(max_length=255, verbose_name='файл')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='строк в файле')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='обработано строк')),
+                ('updated', models.PositiveIntegerField(default=0, verbose_name='обновляемых товаров')),
+                ('missing', models.PositiveIntegerField(default=0, verbose_name='ненайденных товаров')),
+                ('unchanged', models.PositiveIntegerField(default=0, verbose_name='товаров без изменения цены')),
+                ('error', models.TextField(blank=True, verbose_name='ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='дата создания')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='дата завершения')),
+            ],
+            options={
+                'verbose_name': 'загрузка файла обновления',
+                'verbose_name_plural': 'загрузки файлов обновления',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
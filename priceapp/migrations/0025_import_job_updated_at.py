@@ -0,0 +1,19 @@
+# Generated by Django 4.2.2 on 2026-10-18 21:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('priceapp', '0024_import_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='последнее изменение хода загрузки'),
+        ),
+    ]
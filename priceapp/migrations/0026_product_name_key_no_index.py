@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('priceapp', '0025_import_job_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=100, verbose_name='наименование для поиска'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.2 on 2026-10-18 21:20
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('priceapp', '0026_product_name_key_no_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='height',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(290)], verbose_name='высота'),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='width',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(180)], verbose_name='ширина'),
+        ),
+    ]
@@ -1,7 +1,13 @@
 """Модуль для описания моделей с которыми взаимодействует\
 приложения."""
 
+from uuid import uuid4
+
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
+
+from .layout import PAGE_HEIGHT, PAGE_WIDTH
 
 
 class Country(models.Model):
@@ -59,6 +65,73 @@ class Category(models.Model):
         return self.name
 
 
+def normalize_name(name: str) -> str:
+    """
+    Приводит наименование товара к виду для поиска без учета регистра.
+
+    :param name: str.
+    :return: str.
+    """
+    return name.casefold()
+
+
+class ProductQuerySet(models.QuerySet):
+    """QuerySet товаров, поддерживающий в актуальном состоянии \
+    поле `name_key` при массовых операциях. Поле читают индексы \
+    в памяти процесса (lookup.py, search.py) для поиска по наименованию \
+    без учета регистра."""
+
+    @staticmethod
+    def _fill_name_key(objs) -> list:
+        """
+        Заполняет `name_key` у объектов по их наименованию.
+
+        :param objs: Iterable[Product].
+        :return: list[Product].
+        """
+        objs = list(objs)
+        for obj in objs:
+            obj.name_key = normalize_name(obj.name)
+        return objs
+
+    def bulk_create(self, objs, *args, **kwargs) -> list:
+        """
+        Массовое создание товаров с заполнением `name_key`.
+
+        :param objs: Iterable[Product].
+        :return: list[Product].
+        """
+        return super().bulk_create(self._fill_name_key(objs), *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs) -> int:
+        """
+        Массовое обновление товаров, при изменении наименования \
+        обновляется и `name_key`.
+
+        :param objs: Iterable[Product].
+        :param fields: Iterable[str] - обновляемые поля.
+        :return: int.
+        """
+        fields = list(fields)
+        if 'name' in fields:
+            objs = self._fill_name_key(objs)
+            if 'name_key' not in fields:
+                fields.append('name_key')
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs) -> int:
+        """
+        Обновление товаров запросом, при изменении наименования \
+        обновляется и `name_key`.
+
+        :param kwargs: Any - обновляемые поля.
+        :return: int.
+        """
+        if isinstance(kwargs.get('name'), str):
+            kwargs['name_key'] = normalize_name(kwargs['name'])
+        return super().update(**kwargs)
+
+
 class Product(models.Model):
     """Модель хранит в себе информацию о продаваемых товаров, \
     включая цены на них."""
@@ -83,6 +156,14 @@ class Product(models.Model):
         verbose_name='наименование',
         help_text='IER-M7'
     )
+    # Поле читается только при построении индексов в памяти полным
+    # проходом по таблице, поэтому индекс БД для него не нужен.
+    name_key = models.CharField(
+        max_length=100,
+        editable=False,
+        default='',
+        verbose_name='наименование для поиска'
+    )
     old_price = models.DecimalField(
         max_digits=7,
         decimal_places=0,
@@ -115,6 +196,8 @@ class Product(models.Model):
         verbose_name='последнее обновление'
     )
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         """Meta класс для хранения правил сортировки, \
         названий объектов в единичном и множественном \
@@ -132,6 +215,20 @@ class Product(models.Model):
         """
         return f'({self.sku}) {self.name}'
 
+    def save(self, *args, **kwargs) -> None:
+        """
+        Сохраняет товар, обновляя `name_key` по наименованию.
+
+        :param args: Any.
+        :param kwargs: Any.
+        :return: None.
+        """
+        self.name_key = normalize_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'name_key'}
+        super().save(*args, **kwargs)
+
 
 class Tag(models.Model):
     """Модель хранит в себе информацию о макетах ценников, \
@@ -142,9 +239,11 @@ class Tag(models.Model):
         verbose_name='название ценника'
     )
     width = models.IntegerField(
+        validators=(MinValueValidator(1), MaxValueValidator(PAGE_WIDTH)),
         verbose_name='ширина'
     )
     height = models.IntegerField(
+        validators=(MinValueValidator(1), MaxValueValidator(PAGE_HEIGHT)),
         verbose_name='высота'
     )
     size = models.CharField(
@@ -233,6 +332,13 @@ class PrintSheet(models.Model):
         on_delete=models.SET_NULL,
         verbose_name='ценник'
     )
+    terminal = models.CharField(
+        max_length=32,
+        db_index=True,
+        blank=True,
+        default='',
+        verbose_name='терминал'
+    )
 
     class Meta:
         """Meta класс для хранения правил сортировки, \
@@ -258,7 +364,6 @@ class UpdateProduct(models.Model):
 
     name = models.CharField(
         max_length=100,
-        unique=True,
         verbose_name='наименование'
     )
     price = models.DecimalField(
@@ -279,13 +384,26 @@ class UpdateProduct(models.Model):
         auto_now_add=True,
         verbose_name='дата обновления'
     )
+    terminal = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        verbose_name='терминал'
+    )
 
     class Meta:
         """Meta класс для хранения правил сортировки, \
         названий объектов в единичном и множественном \
-        числах."""
+        числах, а также ограничения уникальности товара \
+        в очереди терминала."""
 
         ordering = 'update_at',
+        constraints = (
+            models.UniqueConstraint(
+                fields=('terminal', 'name'),
+                name='unique_updateproduct_terminal_name'
+            ),
+        )
         verbose_name = 'обновляемый товар'
         verbose_name_plural = 'список обновления'
 
@@ -310,7 +428,6 @@ class MissingProduct(models.Model):
     )
     ean = models.CharField(
         max_length=13,
-        unique=True,
         null=True,
         blank=True,
         verbose_name='штрихкод',
@@ -361,12 +478,25 @@ class MissingProduct(models.Model):
         blank=True,
         verbose_name='категория'
     )
+    terminal = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        verbose_name='терминал'
+    )
 
     class Meta:
         """Meta класс для хранения правил сортировки, \
         названий объектов в единичном и множественном \
-        числах."""
-
+        числах, а также ограничения уникальности штрихкода \
+        в очереди терминала."""
+
+        constraints = (
+            models.UniqueConstraint(
+                fields=('terminal', 'ean'),
+                name='unique_missingproduct_terminal_ean'
+            ),
+        )
         verbose_name = 'отсутствующий товар'
         verbose_name_plural = 'отсутствующие товары'
 
@@ -377,3 +507,199 @@ class MissingProduct(models.Model):
         :return: str.
         """
         return self.sku
+
+
+class PriceHistoryQuerySet(models.QuerySet):
+    """QuerySet истории цен с выборками по индексу (товар, дата)."""
+
+    def for_product(self, product) -> 'PriceHistoryQuerySet':
+        """
+        Записи истории товара от новых к старым.
+
+        :param product: Product | int - товар или его id.
+        :return: PriceHistoryQuerySet.
+        """
+        return self.filter(product=product).order_by('-recorded_at', '-id')
+
+    def as_of(self, product, moment):
+        """
+        Цена товара, действовавшая на указанный момент.
+
+        :param product: Product | int - товар или его id.
+        :param moment: datetime.
+        :return: PriceHistory | None.
+        """
+        return (
+            self.for_product(product)
+            .filter(recorded_at__lte=moment)
+            .first()
+        )
+
+    def last_changes(self, product, count: int = 10) -> 'PriceHistoryQuerySet':
+        """
+        Последние изменения цены товара.
+
+        :param product: Product | int - товар или его id.
+        :param count: int - количество записей.
+        :return: PriceHistoryQuerySet.
+        """
+        return self.for_product(product)[:count]
+
+
+class PriceHistory(models.Model):
+    """Модель хранит историю изменения цен товаров. Записи только \
+    добавляются, каждая запись - цена товара с момента `recorded_at`."""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='price_history',
+        verbose_name='товар'
+    )
+    price = models.DecimalField(
+        max_digits=7,
+        decimal_places=0,
+        verbose_name='цена'
+    )
+    old_price = models.DecimalField(
+        max_digits=7,
+        decimal_places=0,
+        default=0,
+        verbose_name='старая цена'
+    )
+    red_price = models.BooleanField(
+        default=False,
+        verbose_name='красный ценник'
+    )
+    recorded_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='дата изменения'
+    )
+
+    objects = PriceHistoryQuerySet.as_manager()
+
+    class Meta:
+        """Meta класс для хранения правил сортировки, \
+        названий объектов в единичном и множественном \
+        числах, а также индекса для выборок истории товара."""
+
+        ordering = '-recorded_at',
+        indexes = (
+            models.Index(
+                fields=('product', 'recorded_at'),
+                name='pricehistory_product_recorded'
+            ),
+        )
+        verbose_name = 'изменение цены'
+        verbose_name_plural = 'история цен'
+
+    def __str__(self) -> str:
+        """
+        Вывод представления объекта.
+
+        :return: str.
+        """
+        return f'{self.product_id} {self.price} ({self.recorded_at:%d.%m.%Y})'
+
+
+class ImportJob(models.Model):
+    """Модель хранит состояние фоновой загрузки файла обновления цен."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid4,
+        editable=False
+    )
+    terminal = models.CharField(
+        max_length=32,
+        db_index=True,
+        verbose_name='терминал'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=(
+            (PENDING, 'в очереди'),
+            (RUNNING, 'выполняется'),
+            (DONE, 'завершена'),
+            (FAILED, 'ошибка'),
+        ),
+        default=PENDING,
+        verbose_name='статус'
+    )
+    file_path = models.CharField(
+        max_length=255,
+        verbose_name='файл'
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name='строк в файле'
+    )
+    processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='обработано строк'
+    )
+    updated = models.PositiveIntegerField(
+        default=0,
+        verbose_name='обновляемых товаров'
+    )
+    missing = models.PositiveIntegerField(
+        default=0,
+        verbose_name='ненайденных товаров'
+    )
+    unchanged = models.PositiveIntegerField(
+        default=0,
+        verbose_name='товаров без изменения цены'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='ошибка'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='дата создания'
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='последнее изменение хода загрузки'
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='дата завершения'
+    )
+
+    class Meta:
+        """Meta класс для хранения правил сортировки, \
+        названий объектов в единичном и множественном \
+        числах."""
+
+        ordering = '-created_at',
+        verbose_name = 'загрузка файла обновления'
+        verbose_name_plural = 'загрузки файлов обновления'
+
+    def __str__(self) -> str:
+        """
+        Вывод представления объекта.
+
+        :return: str.
+        """
+        return f'{self.id} ({self.status})'
+
+    @property
+    def percent(self) -> int:
+        """
+        Процент обработанных строк.
+
+        :return: int.
+        """
+        if self.status == self.DONE:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.processed * 100 // self.total)
@@ -0,0 +1,353 @@
+"""
+Модуль формирует PDF с листами ценников без участия браузера.
+
+Ценники рисуются по раскладке из layout.py. Каждый уникальный ценник
+(макет, наименование, цены, признак красной цены и т.д.) рисуется один
+раз в виде PDF Form XObject, а на листах размещаются только ссылки на него,
+поэтому повторяющиеся ценники не увеличивают время формирования и размер
+файла.
+"""
+
+from io import BytesIO
+from typing import Iterable, NamedTuple, Optional
+
+from django.contrib.staticfiles import finders
+from django.utils import formats, timezone
+from reportlab.lib.colors import Color, black, blue, gray, red, yellow
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from .layout import PAGE_HEIGHT, PAGE_WIDTH, Page
+from .tag_render import tag_key
+
+FONT = 'Roboto'
+FONT_BOLD = 'Roboto-Bold'
+FONT_FILES = {
+    FONT: 'assets/fonts/Roboto/Roboto-Regular.ttf',
+    FONT_BOLD: 'assets/fonts/Roboto/Roboto-Bold.ttf',
+}
+SIGNATURE_FILE = 'signature.png'
+SIGNATURE_WIDTH = 15 * mm
+# Отступы рабочей области от края листа A4.
+MARGIN_LEFT = (A4[0] - PAGE_WIDTH * mm) / 2
+MARGIN_TOP = (A4[1] - PAGE_HEIGHT * mm) / 2
+
+
+class Cell(NamedTuple):
+    """Ячейка строки ценника."""
+
+    field: str
+    width: float
+    font: str
+    max_size: float
+    color: Color = black
+    background: Optional[Color] = None
+    align: str = 'center'
+    red_price: bool = False
+    strike: bool = False
+
+
+# Макеты ценников по (размер, двойной ценник): строки сверху вниз,
+# высота строки в мм и ее ячейки. Размеры повторяют basic.css для ценников
+# 90*45 и 45*33 мм, для ценника другого размера строки, ячейки и шрифты
+# масштабируются по `Tag.width` и `Tag.height` (см. layout_size).
+TAG_LAYOUTS = {
+    ('big', False): (
+        (8, (Cell('category', 90, FONT, 18),)),
+        (10, (Cell('name', 90, FONT_BOLD, 30, color=blue),)),
+        (20, (Cell('price', 90, FONT_BOLD, 52, red_price=True),)),
+        (7, (
+            Cell('country', 45, FONT, 9, align='left'),
+            Cell('date', 45, FONT, 9, align='right'),
+        )),
+    ),
+    ('big', True): (
+        (8, (
+            Cell('category', 45, FONT, 18),
+            Cell(
+                'discount_type', 45, FONT_BOLD, 18,
+                color=red, background=yellow
+            ),
+        )),
+        (10, (Cell('name', 90, FONT_BOLD, 30, color=blue),)),
+        (20, (
+            Cell('old_price', 45, FONT_BOLD, 40, strike=True),
+            Cell(
+                'price', 45, FONT_BOLD, 40,
+                background=yellow, red_price=True
+            ),
+        )),
+        (7, (
+            Cell('country', 45, FONT, 9, align='left'),
+            Cell('date', 45, FONT, 9, align='right'),
+        )),
+    ),
+    ('small', False): (
+        (5, (Cell('category', 45, FONT, 12),)),
+        (5, (Cell('name', 45, FONT_BOLD, 18),)),
+        (20, (Cell('price', 45, FONT_BOLD, 56, red_price=True),)),
+        (3, (
+            Cell('country', 22.5, FONT, 6, align='left'),
+            Cell('date', 22.5, FONT, 6, align='right'),
+        )),
+    ),
+    ('small', True): (
+        (9, (Cell('old_price', 45, FONT_BOLD, 30, strike=True),)),
+        (15, (
+            Cell(
+                'price', 45, FONT_BOLD, 44,
+                background=yellow, red_price=True
+            ),
+        )),
+        (3, (
+            Cell('country', 22.5, FONT, 6, align='left'),
+            Cell('date', 22.5, FONT, 6, align='right'),
+        )),
+        (6, (Cell('name', 45, FONT_BOLD, 20),)),
+    ),
+}
+
+
+def layout_size(rows: tuple) -> tuple[float, float]:
+    """
+    Возвращает размер, на который рассчитан макет ценника.
+
+    :param rows: tuple - строки макета из TAG_LAYOUTS.
+    :return: tuple[float, float] - ширина и высота, мм.
+    """
+    return (
+        max(sum(cell.width for cell in cells) for _, cells in rows),
+        sum(row_height for row_height, _ in rows),
+    )
+
+
+# Отступ текста от края ячейки, мм.
+CELL_PADDING = 1.5
+# Шрифты Roboto из static содержат не все символы (нет пробелов), поэтому
+# слова выводятся по отдельности с интервалом WORD_SPACING от размера шрифта.
+WORD_SPACING = 0.25
+
+
+def register_fonts() -> None:
+    """
+    Регистрирует шрифты Roboto с поддержкой кириллицы.
+
+    :return: None.
+    """
+    registered = pdfmetrics.getRegisteredFontNames()
+    for name, path in FONT_FILES.items():
+        if name not in registered:
+            pdfmetrics.registerFont(TTFont(name, finders.find(path)))
+
+
+def format_value(item, field: str, date: str) -> str:
+    """
+    Возвращает текст ячейки ценника.
+
+    :param item: PrintSheet.
+    :param field: str - поле PrintSheet или 'date'.
+    :param date: str - дата печати.
+    :return: str.
+    """
+    if field == 'date':
+        return date
+    value = getattr(item, field)
+    if field in ('price', 'old_price'):
+        return formats.number_format(value)
+    return str(value)
+
+
+def text_width(text: str, font: str, size: float) -> float:
+    """
+    Вычисляет ширину текста с учетом интервалов между словами.
+
+    :param text: str.
+    :param font: str - имя шрифта.
+    :param size: float - размер шрифта, pt.
+    :return: float.
+    """
+    words = text.split()
+    width = sum(pdfmetrics.stringWidth(word, font, size) for word in words)
+    return width + WORD_SPACING * size * max(len(words) - 1, 0)
+
+
+def fit_font_size(text: str, font: str, max_size: float, width: float,
+                  height: float) -> float:
+    """
+    Подбирает размер шрифта, при котором текст помещается в ячейку.
+
+    :param text: str.
+    :param font: str - имя шрифта.
+    :param max_size: float - максимальный размер шрифта, pt.
+    :param width: float - ширина ячейки, pt.
+    :param height: float - высота ячейки, pt.
+    :return: float.
+    """
+    size = min(max_size, height * 0.9)
+    full_width = text_width(text, font, size)
+    if full_width > width:
+        size *= width / full_width
+    return size
+
+
+class TagRenderer:
+    """Рисует ценники на холсте reportlab, кешируя каждый уникальный \
+    ценник в виде Form XObject."""
+
+    def __init__(self, canvas: Canvas) -> None:
+        """
+        Создает объект отрисовки для холста.
+
+        :param canvas: Canvas.
+        """
+        self.canvas = canvas
+        self.date = timezone.localdate().strftime('%d.%m.%Y')
+        self.signature = finders.find(SIGNATURE_FILE)
+        self.forms: dict = {}
+
+    def get_form(self, item) -> str:
+        """
+        Возвращает имя Form XObject ценника, рисуя его при первом \
+        обращении.
+
+        :param item: PrintSheet.
+        :return: str.
+        """
+        key = tag_key(item)
+        name = self.forms.get(key)
+        if name is None:
+            name = f'tag{len(self.forms)}'
+            self.canvas.beginForm(name)
+            self.draw_tag(item)
+            self.canvas.endForm()
+            self.forms[key] = name
+        return name
+
+    def draw_tag(self, item) -> None:
+        """
+        Рисует ценник в координатах от левого нижнего угла ценника.
+
+        :param item: PrintSheet.
+        :return: None.
+        """
+        canvas = self.canvas
+        width = item.tag.width * mm
+        height = item.tag.height * mm
+        rows = TAG_LAYOUTS[(item.tag.size, item.tag.is_discount)]
+        layout_width, layout_height = layout_size(rows)
+        scale_x = item.tag.width / layout_width
+        scale_y = item.tag.height / layout_height
+        if self.signature:
+            canvas.drawImage(
+                self.signature, 0, 0,
+                width=SIGNATURE_WIDTH,
+                height=SIGNATURE_WIDTH,
+                preserveAspectRatio=True,
+                anchor='sw',
+                mask='auto'
+            )
+        top = height
+        for row_height, cells in rows:
+            row_height *= mm * scale_y
+            left = 0
+            for cell in cells:
+                cell_width = cell.width * mm * scale_x
+                self.draw_cell(
+                    item, cell, left, top - row_height,
+                    cell_width, row_height, min(scale_x, scale_y)
+                )
+                left += cell_width
+            top -= row_height
+        canvas.setStrokeColor(gray)
+        canvas.setLineWidth(0.1 * mm)
+        canvas.rect(0, 0, width, height)
+
+    def draw_cell(self, item, cell: Cell, x: float, y: float,
+                  width: float, height: float, scale: float = 1) -> None:
+        """
+        Рисует ячейку ценника.
+
+        :param item: PrintSheet.
+        :param cell: Cell.
+        :param x: float - левая граница ячейки, pt.
+        :param y: float - нижняя граница ячейки, pt.
+        :param width: float - ширина ячейки, pt.
+        :param height: float - высота ячейки, pt.
+        :param scale: float - масштаб макета, на который умножается \
+        максимальный размер шрифта.
+        :return: None.
+        """
+        canvas = self.canvas
+        if cell.background is not None:
+            canvas.setFillColor(cell.background)
+            canvas.rect(x, y, width, height, stroke=0, fill=1)
+        text = format_value(item, cell.field, self.date)
+        padding = CELL_PADDING * mm
+        size = fit_font_size(
+            text, cell.font, cell.max_size * scale,
+            width - 2 * padding, height
+        )
+        color = red if cell.red_price and item.red_price else cell.color
+        canvas.setFillColor(color)
+        canvas.setFont(cell.font, size)
+        baseline = y + (height - size * 0.7) / 2
+        full_width = text_width(text, cell.font, size)
+        if cell.align == 'left':
+            left = x + padding
+        elif cell.align == 'right':
+            left = x + width - padding - full_width
+        else:
+            left = x + (width - full_width) / 2
+        for word in text.split():
+            canvas.drawString(left, baseline, word)
+            left += (
+                pdfmetrics.stringWidth(word, cell.font, size)
+                + WORD_SPACING * size
+            )
+        if cell.strike:
+            canvas.setStrokeColor(red)
+            canvas.setLineWidth(1.5)
+            canvas.line(
+                x + padding, y + height * 0.25,
+                x + width - padding, y + height * 0.75
+            )
+
+    def draw_page(self, page: Page) -> None:
+        """
+        Размещает ценники листа и завершает страницу.
+
+        :param page: Page.
+        :return: None.
+        """
+        page_top = A4[1] - MARGIN_TOP
+        for placement in page:
+            name = self.get_form(placement.item)
+            self.canvas.saveState()
+            self.canvas.translate(
+                MARGIN_LEFT + placement.x * mm,
+                page_top - (placement.y + placement.height) * mm
+            )
+            self.canvas.doForm(name)
+            self.canvas.restoreState()
+        self.canvas.showPage()
+
+
+def render_pdf(page_list: Iterable[Page]) -> bytes:
+    """
+    Формирует PDF документ с листами ценников.
+
+    :param page_list: Iterable[Page] - результат раскладки ценников.
+    :return: bytes.
+    """
+    register_fonts()
+    buffer = BytesIO()
+    canvas = Canvas(buffer, pagesize=A4)
+    canvas.setTitle('Печать')
+    renderer = TagRenderer(canvas)
+    for page in page_list:
+        renderer.draw_page(page)
+    canvas.save()
+    return buffer.getvalue()
@@ -0,0 +1,323 @@
+"""
+Модуль собирает показатели производительности запросов.
+
+Для каждого запроса `PerformanceMiddleware` замеряет общее время, количество
+и время SQL запросов и время отрисовки шаблонов. Показатели хранятся
+в памяти процесса по имени URL в кольцевых буферах ограниченного размера,
+по ним рассчитываются перцентили для страницы отчета и выгрузки в JSON.
+
+SQL запросы считает обертка `record_query`, которая подключается
+к соединению с БД потока, выполняющего запросы к БД. Под ASGI сервером это
+не поток цикла событий, а поток sync_to_async, поэтому middleware
+подключает обертку через sync_to_async. Показатели текущего запроса обертка
+берет из `current_stats`, значение которого передается в этот поток.
+
+Время отрисовки шаблонов замеряет бэкенд `TimedDjangoTemplates`, который
+подключается в настройке TEMPLATES вместо стандартного.
+"""
+
+import threading
+from collections import deque
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Optional
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils import timezone
+
+# Количество запросов, хранимых по каждому URL.
+DEFAULT_BUFFER_SIZE = 500
+PERCENTILES = (50, 90, 95, 99)
+METRICS = ('wall_ms', 'queries', 'sql_ms', 'template_ms')
+UNRESOLVED = '<unresolved>'
+
+
+class RequestStats:
+    """Показатели одного запроса."""
+
+    __slots__ = ('queries', 'sql_time', 'template_time', 'rendering')
+
+    def __init__(self) -> None:
+        """Создает пустые показатели."""
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+
+
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    'priceapp_request_stats', default=None
+)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Обертка выполнения SQL запроса (см. connection.execute_wrapper), \
+    считающая количество и время запросов в показателях текущего запроса.
+
+    :return: Any - результат выполнения запроса.
+    """
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_time += perf_counter() - start
+        stats.queries += 1
+
+
+def install_query_wrapper() -> None:
+    """
+    Подключает `record_query` к соединению с БД текущего потока, если \
+    он еще не подключен. Обертка остается в соединении между запросами.
+
+    :return: None.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def percentile(values: list, percent: int) -> float:
+    """
+    Возвращает перцентиль методом ближайшего ранга.
+
+    :param values: list - отсортированные значения.
+    :param percent: int - перцентиль от 0 до 100.
+    :return: float.
+    """
+    if not values:
+        return 0
+    rank = max(0, -(-percent * len(values) // 100) - 1)
+    return values[rank]
+
+
+class PerformanceRecorder:
+    """Хранит показатели запросов по имени URL в кольцевых буферах."""
+
+    def __init__(self, size: int = DEFAULT_BUFFER_SIZE) -> None:
+        """
+        Создает пустое хранилище.
+
+        :param size: int - количество запросов, хранимых по каждому URL.
+        """
+        self.size = size
+        self._lock = threading.Lock()
+        self._samples: dict = {}
+
+    def record(self, name: str, sample: tuple) -> None:
+        """
+        Добавляет показатели запроса.
+
+        :param name: str - имя URL.
+        :param sample: tuple - значения METRICS.
+        :return: None.
+        """
+        with self._lock:
+            buffer = self._samples.get(name)
+            if buffer is None:
+                buffer = self._samples[name] = deque(maxlen=self.size)
+            buffer.append(sample)
+
+    def clear(self) -> None:
+        """
+        Удаляет все показатели.
+
+        :return: None.
+        """
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает копию показателей.
+
+        :return: dict - имя URL -> list[tuple].
+        """
+        with self._lock:
+            return {
+                name: list(buffer)
+                for name, buffer in self._samples.items()
+            }
+
+    def report(self, samples: bool = False) -> dict:
+        """
+        Рассчитывает перцентили показателей по каждому URL.
+
+        :param samples: bool - добавить в отчет сами показатели запросов.
+        :return: dict.
+        """
+        views = {}
+        for name, sample_list in sorted(self.snapshot().items()):
+            view = {'count': len(sample_list)}
+            for index, metric in enumerate(METRICS):
+                values = sorted(sample[index] for sample in sample_list)
+                view[metric] = {
+                    **{
+                        f'p{percent}': percentile(values, percent)
+                        for percent in PERCENTILES
+                    },
+                    'mean': round(sum(values) / len(values), 3),
+                    'max': values[-1],
+                }
+            if samples:
+                view['samples'] = [
+                    dict(zip(METRICS, sample)) for sample in sample_list
+                ]
+            views[name] = view
+        return {
+            'generated_at': timezone.now().isoformat(),
+            'buffer_size': self.size,
+            'views': views,
+        }
+
+
+recorder = PerformanceRecorder(
+    getattr(settings, 'PRICEAPP_PERF_BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+)
+
+
+class PerformanceMiddleware:
+    """Замеряет время, SQL запросы и отрисовку шаблонов каждого \
+    запроса и сохраняет их в `recorder`. Работает как под WSGI, \
+    так и под ASGI сервером без перевода асинхронных представлений \
+    в синхронный режим."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        """
+        Создает middleware.
+
+        :param get_response: Callable - следующий обработчик.
+        """
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Обрабатывает запрос с замером показателей.
+
+        :param request: HttpRequest.
+        :return: HttpResponse.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install_query_wrapper()
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            wall_time = perf_counter() - start
+            current_stats.reset(token)
+        self.record(request, stats, wall_time)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Обрабатывает запрос с замером показателей под ASGI сервером. \
+        Запросы к БД выполняются в потоке sync_to_async, поэтому обертка \
+        подсчета запросов подключается к соединению этого потока.
+
+        :param request: HttpRequest.
+        :return: HttpResponse.
+        """
+        await sync_to_async(install_query_wrapper)()
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            wall_time = perf_counter() - start
+            current_stats.reset(token)
+        self.record(request, stats, wall_time)
+        return response
+
+    @staticmethod
+    def record(
+            request: HttpRequest,
+            stats: RequestStats,
+            wall_time: float,
+    ) -> None:
+        """
+        Сохраняет показатели запроса по имени URL.
+
+        :param request: HttpRequest.
+        :param stats: RequestStats - показатели запроса.
+        :param wall_time: float - общее время запроса в секундах.
+        :return: None.
+        """
+        match = getattr(request, 'resolver_match', None)
+        recorder.record(
+            match.view_name if match else UNRESOLVED,
+            (
+                round(wall_time * 1000, 3),
+                stats.queries,
+                round(stats.sql_time * 1000, 3),
+                round(stats.template_time * 1000, 3),
+            )
+        )
+
+
+class TimedTemplate(DjangoTemplate):
+    """Шаблон, время отрисовки которого учитывается в показателях \
+    текущего запроса."""
+
+    def render(self, context=None, request=None) -> str:
+        """
+        Отрисовывает шаблон с замером времени. Вложенные отрисовки \
+        не учитываются повторно.
+
+        :param context: dict | None.
+        :param request: HttpRequest | None.
+        :return: SafeString.
+        """
+        stats = current_stats.get()
+        if stats is None or stats.rendering:
+            return super().render(context, request)
+        stats.rendering = True
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_time += perf_counter() - start
+            stats.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, возвращающий TimedTemplate."""
+
+    def from_string(self, template_code: str) -> TimedTemplate:
+        """
+        Создает шаблон из строки.
+
+        :param template_code: str.
+        :return: TimedTemplate.
+        """
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name: str) -> TimedTemplate:
+        """
+        Загружает шаблон по имени.
+
+        :param template_name: str.
+        :return: TimedTemplate.
+        """
+        return TimedTemplate(
+            super().get_template(template_name).template, self
+        )
@@ -0,0 +1,168 @@
+"""
+Модуль реализует сверку строк обновления цен с товарами в БД.
+
+Строки (из csv-файла поставки или текста ICQ) сопоставляются с товарами
+по ключевому полю пакетными запросами `IN`, размер пакета ограничен, чтобы
+не превышать лимит переменных SQLite в одном запросе.
+"""
+
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .models import Product
+
+# SQLite до версии 3.32 ограничивает запрос 999 переменными.
+CHUNK_SIZE = 500
+
+
+def chunked(iterable: Iterable, size: int = CHUNK_SIZE) -> Iterator[list]:
+    """
+    Разбивает последовательность на списки фиксированного размера.
+
+    :param iterable: Iterable.
+    :param size: int - размер пакета.
+    :return: Iterator[list].
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def to_decimal(value) -> Optional[Decimal]:
+    """
+    Приводит значение цены к Decimal.
+
+    :param value: Any - значение цены.
+    :return: Decimal | None - None, если значение не является числом.
+    """
+    try:
+        return Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return None
+
+
+class ReconcileResult(NamedTuple):
+    """Результат сверки строк с товарами.
+
+    matched - найденные товары: ключ -> (list[Product], строка);
+    missing - ненайденные строки: ключ -> строка;
+    changed - id найденных товаров, у которых отличается цена.
+    """
+
+    matched: dict
+    missing: dict
+    changed: set
+
+    def changed_products(self) -> list:
+        """
+        Найденные товары с измененной ценой и их строки. Товары \
+        подтверждаются по наименованию, поэтому из товаров с одинаковым \
+        наименованием возвращается первый.
+
+        :return: list[tuple[Product, dict]].
+        """
+        products = {}
+        for product_list, row in self.matched.values():
+            for product in product_list:
+                if product.pk in self.changed:
+                    products.setdefault(product.name, (product, row))
+        return list(products.values())
+
+    @property
+    def unchanged_count(self) -> int:
+        """
+        Количество найденных товаров, цены которых не изменились.
+
+        :return: int.
+        """
+        matched_count = sum(
+            len(product_list) for product_list, _ in self.matched.values()
+        )
+        return matched_count - len(self.changed)
+
+
+class ProductReconciler:
+    """Сверяет строки обновления цен с товарами по ключевому полю \
+    (`sku` для файла поставки, `name` для текста ICQ)."""
+
+    product_fields = ('name', 'price', 'old_price', 'red_price')
+    price_fields = ('price', 'old_price')
+
+    def __init__(self, key: str = 'sku', chunk_size: int = CHUNK_SIZE):
+        """
+        Создает объект сверки.
+
+        :param key: str - поле Product и строки, по которому идет сверка.
+        :param chunk_size: int - количество ключей в одном запросе.
+        """
+        self.key = key
+        self.chunk_size = chunk_size
+
+    def load_products(self, keys: Iterable[str]) -> dict:
+        """
+        Загружает товары по списку ключей пакетными запросами.
+
+        Ключ может быть не уникальным (например, `sku`), поэтому \
+        для каждого ключа возвращаются все товары в порядке сортировки \
+        модели.
+
+        :param keys: Iterable[str] - значения ключевого поля.
+        :return: dict - ключ -> list[Product].
+        """
+        fields = {self.key, *self.product_fields}
+        products = {}
+        for chunk in chunked(keys, self.chunk_size):
+            queryset = (
+                Product.objects
+                .only(*fields)
+                .filter(**{f'{self.key}__in': chunk})
+            )
+            for product in queryset:
+                products.setdefault(getattr(product, self.key), []).append(
+                    product
+                )
+        return products
+
+    def is_changed(self, product: Product, row: dict) -> bool:
+        """
+        Проверяет, отличаются ли цены в строке от цен товара.
+
+        :param product: Product.
+        :param row: dict - строка обновления.
+        :return: bool.
+        """
+        for field in self.price_fields:
+            if field not in row:
+                continue
+            if to_decimal(row[field]) != getattr(product, field):
+                return True
+        return False
+
+    def reconcile(self, rows: Iterable[dict]) -> ReconcileResult:
+        """
+        Сверяет строки с товарами за один проход.
+
+        Повторяющиеся ключи схлопываются, используется последняя строка.
+
+        :param rows: Iterable[dict] - строки обновления (например, \
+        из DictReader).
+        :return: ReconcileResult.
+        """
+        data_list = {row[self.key]: row for row in rows}
+        products = self.load_products(data_list.keys())
+        matched = {}
+        missing = {}
+        changed = set()
+        for key, row in data_list.items():
+            product_list = products.get(key)
+            if not product_list:
+                missing[key] = row
+                continue
+            matched[key] = (product_list, row)
+            changed.update(
+                product.pk
+                for product in product_list
+                if self.is_changed(product, row)
+            )
+        return ReconcileResult(matched, missing, changed)
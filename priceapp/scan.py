@@ -0,0 +1,80 @@
+"""
+Модуль реализует добавление товаров в Лист печати из асинхронных представлений.
+
+Товар и макет ценника ищутся в индексе в памяти процесса (см. lookup.py),
+ценник сохраняется асинхронным методом ORM, поэтому при работе под ASGI
+сервером сканирование не занимает поток на время запроса.
+"""
+
+from decimal import Decimal
+from typing import Optional
+
+from .lookup import product_index
+from .models import PrintSheet, Tag
+from .state import WorkflowState
+
+
+async def scan_product(
+        state: WorkflowState,
+        input_line: str,
+        size: str,
+        is_discount: bool,
+) -> Optional[PrintSheet]:
+    """
+    Добавляет в Лист печати товар по штрихкоду или наименованию.
+
+    :param state: WorkflowState - состояние терминала.
+    :param input_line: str - штрихкод или наименование товара.
+    :param size: str - размер ценника.
+    :param is_discount: bool - двойной ценник.
+    :return: PrintSheet | None - None, если товар не найден.
+    """
+    tag = await product_index.aget_tag(size, is_discount)
+    product = await product_index.afind(input_line)
+    state.set_last_scan(tag, product['name'] if product else None)
+    if product is None:
+        return None
+    return await PrintSheet.objects.acreate(
+        tag=tag,
+        terminal=state.terminal,
+        **product
+    )
+
+
+async def scan_discounted_product(
+        state: WorkflowState,
+        tag: Tag,
+        name: str,
+        price: Decimal,
+        old_price: Decimal,
+        red_price: bool,
+        discount_type: str,
+) -> Optional[PrintSheet]:
+    """
+    Добавляет в Лист печати ценник по уценке с указанными ценами.
+
+    :param state: WorkflowState - состояние терминала.
+    :param tag: Tag - макет ценника.
+    :param name: str - наименование товара.
+    :param price: Decimal - цена.
+    :param old_price: Decimal - старая цена.
+    :param red_price: bool - красный ценник.
+    :param discount_type: str - причина скидки.
+    :return: PrintSheet | None - None, если товар не найден.
+    """
+    product = await product_index.afind_by_name(name)
+    if product is None:
+        state.set_last_scan(tag)
+        return None
+    if tag.size == 'small':
+        product['name'] = f'{product["name"]} {discount_type}'
+    product['price'] = price
+    product['old_price'] = old_price
+    product['red_price'] = red_price
+    state.set_last_scan(tag, product['name'])
+    return await PrintSheet.objects.acreate(
+        tag=tag,
+        terminal=state.terminal,
+        discount_type=discount_type,
+        **product
+    )
@@ -0,0 +1,160 @@
+"""
+Модуль реализует поиск товаров для подсказок при вводе в поле сканера.
+
+Индекс строится в памяти процесса одним запросом и перестраивается вместе
+с индексом сканирования (см. lookup.py). Поиск выполняется в два этапа:
+совпадение начала наименования, SKU или штрихкода (бинарный поиск по
+отсортированному списку ключей), затем нечеткий поиск по триграммам
+наименования и SKU для запросов с опечатками.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+
+from .lookup import VersionedIndex
+from .models import Product, normalize_name
+
+# Минимальное сходство по триграммам для нечеткого поиска.
+MIN_SIMILARITY = 0.3
+# Максимальное количество ключей, просматриваемых при поиске по началу.
+MAX_PREFIX_SCAN = 500
+
+
+def trigrams(text: str) -> set:
+    """
+    Возвращает множество триграмм строки (с дополнением пробелами, \
+    как в pg_trgm).
+
+    :param text: str - нормализованная строка.
+    :return: set[str].
+    """
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ProductSearchIndex(VersionedIndex):
+    """Индекс для поиска товаров по началу и по сходству \
+    наименования, SKU и штрихкода."""
+
+    def __init__(self) -> None:
+        """Создает пустой индекс, заполнение происходит при первом поиске."""
+        super().__init__()
+        self._products: dict = {}
+        self._keys: list = []
+        self._trigrams: dict = {}
+        self._documents: list = []
+
+    def _build(self) -> None:
+        """
+        Загружает товары и формирует отсортированный список ключей \
+        и инвертированный индекс триграмм.
+
+        :return: None.
+        """
+        rows = Product.objects.values(
+            'id', 'ean', 'sku', 'name', 'name_key', 'price'
+        )
+        products = {}
+        keys = []
+        trigram_index: dict = {}
+        # Наименование и SKU индексируются отдельно: (id товара,
+        # количество триграмм ключа).
+        documents = []
+        for row in rows:
+            product_id = row['id']
+            products[product_id] = {
+                'name': row['name'],
+                'ean': row['ean'],
+                'sku': row['sku'],
+                'price': row['price'],
+            }
+            sku_key = normalize_name(row['sku'] or '')
+            keys.append((row['name_key'], product_id))
+            keys.append((row['ean'], product_id))
+            if sku_key:
+                keys.append((sku_key, product_id))
+            for key in (row['name_key'], sku_key):
+                if not key:
+                    continue
+                grams = trigrams(key)
+                document_id = len(documents)
+                documents.append((product_id, len(grams)))
+                for gram in grams:
+                    trigram_index.setdefault(gram, []).append(document_id)
+        keys.sort()
+        self._products = products
+        self._keys = keys
+        self._trigrams = trigram_index
+        self._documents = documents
+
+    def _prefix_scores(self, query: str) -> dict:
+        """
+        Находит товары, у которых наименование, SKU или штрихкод \
+        начинаются с запроса.
+
+        Полное совпадение получает оценку 3, совпадение начала - от 2 \
+        до 3 в зависимости от доли совпавшей части.
+
+        :param query: str - нормализованный запрос.
+        :return: dict - id товара -> оценка.
+        """
+        scores = {}
+        index = bisect_left(self._keys, (query,))
+        end = min(len(self._keys), index + MAX_PREFIX_SCAN)
+        while index < end:
+            key, product_id = self._keys[index]
+            if not key.startswith(query):
+                break
+            score = 2 + len(query) / len(key)
+            if score > scores.get(product_id, 0):
+                scores[product_id] = score
+            index += 1
+        return scores
+
+    def _fuzzy_scores(self, query: str) -> dict:
+        """
+        Находит товары, наименование или SKU которых похожи на запрос \
+        по триграммам (коэффициент Жаккара не меньше MIN_SIMILARITY).
+
+        :param query: str - нормализованный запрос.
+        :return: dict - id товара -> оценка от 0 до 1.
+        """
+        grams = trigrams(query)
+        counter = Counter()
+        for gram in grams:
+            counter.update(self._trigrams.get(gram, ()))
+        scores = {}
+        for document_id, common in counter.items():
+            product_id, count = self._documents[document_id]
+            similarity = common / (len(grams) + count - common)
+            if similarity >= max(MIN_SIMILARITY, scores.get(product_id, 0)):
+                scores[product_id] = similarity
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Возвращает товары, отсортированные по убыванию релевантности.
+
+        :param query: str - введенная строка.
+        :param limit: int - максимальное количество результатов.
+        :return: list[dict].
+        """
+        query = normalize_name(query.strip())
+        if not query:
+            return []
+        self._refresh()
+        scores = self._prefix_scores(query)
+        if len(scores) < limit and len(query) >= 3:
+            for product_id, score in self._fuzzy_scores(query).items():
+                scores.setdefault(product_id, score)
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (-item[1], self._products[item[0]]['name'])
+        )
+        return [
+            dict(self._products[product_id])
+            for product_id, _ in ranked[:limit]
+        ]
+
+
+product_search_index = ProductSearchIndex()
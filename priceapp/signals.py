@@ -0,0 +1,64 @@
+"""Модуль содержит обработчики сигналов моделей приложения."""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .choices import invalidate_choices
+from .lookup import invalidate_product_index
+from .models import Category, Country, Product, Tag
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reset_product_index(sender, **kwargs) -> None:
+    """
+    Сбрасывает индекс товаров при изменении товаров, категорий, \
+    стран или макетов ценников.
+
+    :param sender: класс модели.
+    :param kwargs: Any.
+    :return: None.
+    """
+    invalidate_product_index()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def reset_choices(sender, **kwargs) -> None:
+    """
+    Сбрасывает кеш вариантов выбора при изменении категорий или стран.
+
+    :param sender: класс модели.
+    :param kwargs: Any.
+    :return: None.
+    """
+    invalidate_choices()
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs) -> None:
+    """
+    Выполняет PRAGMA из настройки `SQLITE_PRAGMAS` при открытии \
+    соединения с SQLite.
+
+    :param sender: класс обертки БД.
+    :param connection: DatabaseWrapper - открытое соединение.
+    :param kwargs: Any.
+    :return: None.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
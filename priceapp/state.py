@@ -0,0 +1,187 @@
+"""
+Модуль хранит состояние рабочего процесса терминала.
+
+Состояние (идентификатор терминала, последний отсканированный товар,
+адрес возврата после обновления цен, признак наличия ненайденных
+товаров и количество товаров с неизменившимися ценами) хранится в сессии,
+поэтому оно общее для всех процессов и потоков сервера и не смешивается
+между разными терминалами.
+
+Очереди терминалов, сессии которых истекли или удалены, а также очереди
+без терминала, оставшиеся от версий до разделения очередей, удаляются
+функцией `delete_abandoned_queues` (команда cleanup_terminal_queues).
+"""
+
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.contrib.sessions.models import Session
+from django.http import HttpRequest
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import MissingProduct, PrintSheet, UpdateProduct
+
+TERMINAL_KEY = 'terminal'
+LAST_SCAN_KEY = 'last_scan'
+BEFORE_REDIRECT_URL_KEY = 'before_redirect_url'
+MISSING_PRODUCTS_FLAG_KEY = 'missing_products_flag'
+UNCHANGED_PRODUCTS_COUNT_KEY = 'unchanged_products_count'
+EMPTY_SCAN = {
+    'tag': {
+        'size': 'big',
+        'is_discount': False
+    },
+    'product': 'Список пуст'
+}
+
+
+class WorkflowState:
+    """Состояние рабочего процесса, привязанное к сессии терминала."""
+
+    def __init__(self, request: HttpRequest) -> None:
+        """
+        Создает объект состояния для сессии запроса.
+
+        :param request: HttpRequest.
+        """
+        self.session = request.session
+
+    @classmethod
+    async def aload(cls, request: HttpRequest) -> 'WorkflowState':
+        """
+        Создает объект состояния в асинхронном представлении. Сессия \
+        загружается из БД в потоке, после чего состояние читается \
+        и изменяется без обращений к БД.
+
+        :param request: HttpRequest.
+        :return: WorkflowState.
+        """
+        await sync_to_async(request.session.keys)()
+        return cls(request)
+
+    @property
+    def terminal(self) -> str:
+        """
+        Идентификатор терминала, к которому привязаны очереди \
+        Ценников для печати, Обновляемых и Ненайденных товаров.
+
+        Создается при первом обращении и не меняется при смене \
+        ключа сессии.
+
+        :return: str.
+        """
+        terminal = self.session.get(TERMINAL_KEY)
+        if terminal is None:
+            terminal = uuid4().hex
+            self.session[TERMINAL_KEY] = terminal
+        return terminal
+
+    @property
+    def last_scan(self) -> dict:
+        """
+        Последний добавленный в печать товар и использованный макет.
+
+        :return: dict.
+        """
+        return self.session.get(LAST_SCAN_KEY, EMPTY_SCAN)
+
+    def set_last_scan(self, tag, product_name: str = None) -> None:
+        """
+        Сохраняет последний использованный макет и товар.
+
+        :param tag: Tag - использованный макет ценника.
+        :param product_name: str | None - наименование товара, если \
+        товар был добавлен.
+        :return: None.
+        """
+        last_scan = {
+            'tag': {
+                'size': tag.size,
+                'is_discount': tag.is_discount,
+            },
+            'product': product_name or self.last_scan['product'],
+        }
+        self.session[LAST_SCAN_KEY] = last_scan
+
+    def reset_last_scan(self) -> None:
+        """
+        Сбрасывает последний скан к начальному состоянию.
+
+        :return: None.
+        """
+        self.session[LAST_SCAN_KEY] = EMPTY_SCAN
+
+    @property
+    def before_redirect_url(self) -> str:
+        """
+        Адрес страницы, с которой было начато обновление цен.
+
+        :return: str.
+        """
+        return self.session.get(
+            BEFORE_REDIRECT_URL_KEY,
+            reverse('priceapp:product_update')
+        )
+
+    @before_redirect_url.setter
+    def before_redirect_url(self, url: str) -> None:
+        self.session[BEFORE_REDIRECT_URL_KEY] = url
+
+    @property
+    def missing_products_flag(self) -> bool:
+        """
+        Признак наличия ненайденных при обновлении товаров.
+
+        :return: bool.
+        """
+        return self.session.get(MISSING_PRODUCTS_FLAG_KEY, False)
+
+    @missing_products_flag.setter
+    def missing_products_flag(self, value: bool) -> None:
+        self.session[MISSING_PRODUCTS_FLAG_KEY] = value
+
+    @property
+    def unchanged_products_count(self) -> int:
+        """
+        Количество найденных при обновлении товаров, цены которых \
+        не изменились.
+
+        :return: int.
+        """
+        return self.session.get(UNCHANGED_PRODUCTS_COUNT_KEY, 0)
+
+    @unchanged_products_count.setter
+    def unchanged_products_count(self, value: int) -> None:
+        self.session[UNCHANGED_PRODUCTS_COUNT_KEY] = value
+
+
+def active_terminals() -> set:
+    """
+    Возвращает идентификаторы терминалов неистекших сессий.
+
+    :return: set[str].
+    """
+    terminals = set()
+    sessions = Session.objects.filter(expire_date__gt=timezone.now())
+    for session in sessions.iterator():
+        terminal = session.get_decoded().get(TERMINAL_KEY)
+        if terminal:
+            terminals.add(terminal)
+    return terminals
+
+
+def delete_abandoned_queues() -> dict:
+    """
+    Удаляет Ценники для печати, Обновляемые и Ненайденные товары \
+    терминалов без неистекшей сессии.
+
+    :return: dict - название модели -> количество удаленных записей.
+    """
+    terminals = active_terminals()
+    return {
+        model._meta.verbose_name_plural: (
+            model.objects.exclude(terminal__in=terminals).delete()[0]
+        )
+        for model in (PrintSheet, UpdateProduct, MissingProduct)
+    }
@@ -0,0 +1,136 @@
+"""
+Модуль формирует синтетический каталог для замеров и тестов.
+
+Каталог заданного размера (товары, категории, страны и четыре стандартных
+макета ценника) создается массовыми INSERT пакетами, поэтому даже каталог
+из 100 тысяч товаров создается за секунды. При одинаковом `seed` данные
+совпадают между запусками.
+"""
+
+import random
+from decimal import Decimal
+
+from .choices import invalidate_choices
+from .lookup import invalidate_product_index
+from .models import (
+    Category,
+    Country,
+    MissingProduct,
+    PriceHistory,
+    PrintSheet,
+    Product,
+    Tag,
+    UpdateProduct,
+)
+from .reconcile import chunked
+
+CATEGORY_COUNT = 40
+COUNTRY_COUNT = 15
+EAN_START = 4600000000000
+TAG_LIST = (
+    ('Большой', 90, 45, 'big', False),
+    ('Большой двойной', 90, 45, 'big', True),
+    ('Маленький', 45, 33, 'small', False),
+    ('Маленький двойной', 45, 33, 'small', True),
+)
+
+
+def product_ean(number: int) -> str:
+    """
+    Штрихкод синтетического товара.
+
+    :param number: int - номер товара.
+    :return: str.
+    """
+    return str(EAN_START + number)
+
+
+def product_sku(number: int) -> str:
+    """
+    SKU синтетического товара.
+
+    :param number: int - номер товара.
+    :return: str.
+    """
+    return f'SKU{number:06d}'
+
+
+def product_name(number: int) -> str:
+    """
+    Наименование синтетического товара.
+
+    :param number: int - номер товара.
+    :return: str.
+    """
+    return f'WH-{number}XM'
+
+
+def clear_catalogue() -> None:
+    """
+    Удаляет все товары, справочники, макеты и очереди терминалов.
+
+    :return: None.
+    """
+    for model in (
+            PrintSheet,
+            UpdateProduct,
+            MissingProduct,
+            PriceHistory,
+            Product,
+            Category,
+            Country,
+            Tag,
+    ):
+        model.objects.all().delete()
+    invalidate_choices()
+    invalidate_product_index()
+
+
+def generate_catalogue(
+        size: int,
+        seed: int = 0,
+        batch_size: int = 1000,
+) -> None:
+    """
+    Создает синтетический каталог из `size` товаров.
+
+    :param size: int - количество товаров.
+    :param seed: int - начальное значение генератора случайных чисел.
+    :param batch_size: int - количество товаров в одном INSERT.
+    :return: None.
+    """
+    generator = random.Random(seed)
+    Tag.objects.bulk_create([
+        Tag(
+            name=name,
+            width=width,
+            height=height,
+            size=tag_size,
+            is_discount=is_discount
+        )
+        for name, width, height, tag_size, is_discount in TAG_LIST
+    ])
+    categories = Category.objects.bulk_create([
+        Category(name=f'Категория {number}')
+        for number in range(CATEGORY_COUNT)
+    ])
+    countries = Country.objects.bulk_create([
+        Country(name=f'Страна {number}')
+        for number in range(COUNTRY_COUNT)
+    ])
+    for numbers in chunked(range(size), batch_size):
+        Product.objects.bulk_create([
+            Product(
+                sku=product_sku(number),
+                ean=product_ean(number),
+                name=product_name(number),
+                category=generator.choice(categories),
+                country=generator.choice(countries),
+                price=Decimal(generator.randrange(990, 99990, 10)),
+                old_price=0,
+                red_price=not number % 7,
+            )
+            for number in numbers
+        ])
+    invalidate_choices()
+    invalidate_product_index()
@@ -0,0 +1,105 @@
+"""
+Модуль формирует HTML фрагменты ценников для страницы печати.
+
+Шаблон макета выбирается по ключу (размер, двойной ценник) без проверок
+в шаблоне страницы и без `{% include %}` на каждый ценник. Одинаковые
+ценники в рамках одной страницы печати отрисовываются один раз, после чего
+готовый фрагмент используется повторно.
+"""
+
+from typing import Iterable
+
+from django.template.loader import get_template
+from django.utils.safestring import SafeString
+
+from .layout import Page
+
+TAG_TEMPLATES = {
+    ('big', False): 'priceapp/big_tags.html',
+    ('big', True): 'priceapp/big_sale_tags.html',
+    ('small', False): 'priceapp/small_tags.html',
+    ('small', True): 'priceapp/small_sale_tags.html',
+}
+
+
+def tag_key(item) -> tuple:
+    """
+    Ключ уникальности ценника: ценники с одинаковым ключом \
+    выглядят одинаково и отрисовываются один раз.
+
+    :param item: PrintSheet.
+    :return: tuple.
+    """
+    return (
+        item.tag.size,
+        item.tag.is_discount,
+        item.tag.width,
+        item.tag.height,
+        item.name,
+        item.category,
+        item.country,
+        item.price,
+        item.old_price,
+        item.red_price,
+        item.discount_type,
+    )
+
+
+class TagHTMLRenderer:
+    """Отрисовывает ценники в HTML фрагменты по шаблонам макетов."""
+
+    def __init__(self) -> None:
+        """Создает объект отрисовки с пустым кешем фрагментов."""
+        self.templates: dict = {}
+        self.fragments: dict = {}
+
+    def get_template(self, size: str, is_discount: bool):
+        """
+        Возвращает шаблон макета ценника.
+
+        Компиляция шаблона выполняется один раз на процесс кеширующим \
+        загрузчиком Django, поиск шаблона - один раз на страницу печати.
+
+        :param size: str - размер ценника.
+        :param is_discount: bool - двойной ценник.
+        :return: Template.
+        """
+        key = (size, is_discount)
+        template = self.templates.get(key)
+        if template is None:
+            template = get_template(TAG_TEMPLATES[key])
+            self.templates[key] = template
+        return template
+
+    def render(self, item) -> SafeString:
+        """
+        Возвращает HTML фрагмент ценника.
+
+        :param item: PrintSheet.
+        :return: SafeString.
+        """
+        key = tag_key(item)
+        fragment = self.fragments.get(key)
+        if fragment is None:
+            template = self.get_template(item.tag.size, item.tag.is_discount)
+            fragment = template.render({'tag': item})
+            self.fragments[key] = fragment
+        return fragment
+
+    def render_pages(self, page_list: Iterable[Page]) -> list:
+        """
+        Отрисовывает все ценники листов за один проход.
+
+        :param page_list: Iterable[Page] - результат раскладки ценников.
+        :return: list[tuple[Page, list[tuple[Placement, SafeString]]]].
+        """
+        return [
+            (
+                page,
+                [
+                    (placement, self.render(placement.item))
+                    for placement in page
+                ]
+            )
+            for page in page_list
+        ]
@@ -1,3 +1,2159 @@
-from django.test import TestCase
+"""
+Тесты приложения.
 
-# Create your tests here.
+Тесты количества SQL запросов: для каждого URL из priceapp/urls.py рядом
+с представлением объявлен бюджет запросов (атрибут `query_budget`: HTTP
+метод -> максимальное количество запросов, включая запросы сессии). Тесты
+выполняют каждый запрос на малом и большом объеме входных данных
+и проверяют, что количество запросов не превышает бюджет и не растет вместе
+с объемом данных. Остальные тесты проверяют поведение модулей приложения.
+"""
+
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+from itertools import count
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from reportlab.lib.units import mm
+from reportlab.pdfgen.canvas import Canvas
+
+from . import urls
+from .catalogue import CATALOGUE_FORMATS, CatalogueImporter, export_rows
+from .history import compact_price_history, record_price_history
+from .importer import import_price_rows
+from .layout import (
+    LAYOUT_ENGINES,
+    PAGE_HEIGHT,
+    PAGE_WIDTH,
+    get_layout_engine,
+)
+from .lookup import (
+    INDEX_VERSION_KEY,
+    get_index_version,
+    invalidate_product_index,
+    product_index,
+)
+from .jobs import (
+    IMPORT_JOB_RETENTION,
+    IMPORT_TIMEOUT,
+    run_import_job,
+)
+from .models import (
+    Category,
+    Country,
+    ImportJob,
+    MissingProduct,
+    PriceHistory,
+    PrintSheet,
+    Product,
+    Tag,
+    UpdateProduct,
+)
+from .pdf import TAG_LAYOUTS, TagRenderer, register_fonts, render_pdf
+from .perf import METRICS, recorder
+from .synthetic import (
+    generate_catalogue,
+    product_ean,
+    product_name,
+    product_sku,
+)
+from .views import (
+    ProductConfirmUpdateView,
+    ProductSearchView,
+    ProductUpdateView,
+)
+
+CATALOGUE_SIZE = 200
+# Объемы входных данных (строк файла, ценников, форм и т.д.).
+SMALL = 3
+LARGE = 30
+
+# Кеш версий индексов тестов во временном каталоге: версии в кеше сервера,
+# работающего с этой же копией проекта, тестами не изменяются.
+index_cache_dir = TemporaryDirectory(prefix='priceapp-index-cache-')
+test_caches = override_settings(CACHES={
+    **settings.CACHES,
+    settings.PRICEAPP_INDEX_CACHE: {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': index_cache_dir.name,
+    },
+})
+
+
+def setUpModule() -> None:
+    """
+    Подключает кеш версий индексов во временном каталоге.
+
+    :return: None.
+    """
+    test_caches.enable()
+
+
+def tearDownModule() -> None:
+    """
+    Восстанавливает настройки кешей и удаляет временный каталог.
+
+    :return: None.
+    """
+    test_caches.disable()
+    index_cache_dir.cleanup()
+
+
+def get_query_budget(url_name: str) -> dict:
+    """
+    Возвращает бюджет запросов представления по имени URL.
+
+    :param url_name: str - имя URL без пространства имен.
+    :return: dict - HTTP метод -> количество запросов.
+    """
+    func = next(
+        pattern.callback
+        for pattern in urls.urlpatterns
+        if pattern.name == url_name
+    )
+    view = getattr(func, 'view_class', func)
+    return getattr(view, 'query_budget', {})
+
+
+class QueryBudgetTestCase(TestCase):
+    """Базовый класс тестов бюджета запросов."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Создает синтетический каталог.
+
+        :return: None.
+        """
+        generate_catalogue(CATALOGUE_SIZE)
+
+    def setUp(self) -> None:
+        """
+        Открывает сессию терминала.
+
+        :return: None.
+        """
+        self.client.get(reverse('priceapp:printsheet_delete'))
+        self.terminal = self.client.session['terminal']
+        # Номера новых товаров, которых нет в каталоге.
+        self.new_numbers = count(CATALOGUE_SIZE)
+        # Цены обновлений ICQ: каждое обновление меняет цены товаров.
+        self.update_prices = count(5000, 1000)
+
+    def count_queries(self, request) -> int:
+        """
+        Выполняет запрос и возвращает количество SQL запросов.
+
+        :param request: Callable[[], HttpResponse].
+        :return: int.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = request()
+        self.assertLess(response.status_code, 400)
+        return len(context)
+
+    def assertQueryBudget(
+            self,
+            url_name: str,
+            method: str,
+            prepare,
+            request,
+    ) -> None:
+        """
+        Проверяет бюджет запросов на малом и большом объеме данных.
+
+        :param url_name: str - имя URL без пространства имен.
+        :param method: str - HTTP метод в нижнем регистре.
+        :param prepare: Callable[[int], Any] - подготовка данных \
+        заданного объема, результат передается в request.
+        :param request: Callable[[Any], HttpResponse] - запрос.
+        :return: None.
+        """
+        budget = get_query_budget(url_name).get(method)
+        self.assertIsNotNone(
+            budget, f'{url_name}: не объявлен бюджет для {method}'
+        )
+        # Первый запрос строит индексы в памяти процесса (см. lookup.py),
+        # поэтому не учитывается.
+        request(prepare(SMALL))
+        counts = []
+        for size in (SMALL, LARGE):
+            data = prepare(size)
+            counts.append(self.count_queries(lambda: request(data)))
+        self.assertEqual(
+            counts[0],
+            counts[1],
+            f'{url_name} {method}: количество запросов растет с объемом '
+            f'данных ({SMALL}: {counts[0]}, {LARGE}: {counts[1]})'
+        )
+        self.assertLessEqual(
+            counts[1],
+            budget,
+            f'{url_name} {method}: {counts[1]} запросов, бюджет {budget}'
+        )
+
+    def fill_print_sheet(self, size: int) -> int:
+        """
+        Заполняет список печати терминала.
+
+        :param size: int - количество ценников.
+        :return: int - количество ценников.
+        """
+        PrintSheet.objects.filter(terminal=self.terminal).delete()
+        tag_list = list(Tag.objects.all())
+        PrintSheet.objects.bulk_create([
+            PrintSheet(
+                name=product_name(number),
+                category='Категория',
+                country='Страна',
+                price=1000 + number,
+                old_price=2000 + number,
+                tag=tag_list[number % len(tag_list)],
+                terminal=self.terminal,
+            )
+            for number in range(size)
+        ])
+        return size
+
+    def icq_text(self, size: int, missing: int = 0) -> str:
+        """
+        Текст обновления цен ICQ.
+
+        :param size: int - количество найденных товаров.
+        :param missing: int - количество ненайденных товаров.
+        :return: str.
+        """
+        price = next(self.update_prices)
+        lines = [
+            f'{product_name(number)} - {price + number}'
+            for number in range(size)
+        ]
+        lines += [
+            f'{product_name(next(self.new_numbers))} - 10'
+            for _ in range(missing)
+        ]
+        return '\r\n'.join(lines)
+
+    def fill_update_queue(self, size: int) -> int:
+        """
+        Заполняет очередь Обновляемых товаров через обновление из ICQ.
+
+        :param size: int - количество товаров.
+        :return: int - количество товаров.
+        """
+        self.client.get(reverse('priceapp:product_icq_update'))
+        self.client.post(
+            reverse('priceapp:product_icq_update'),
+            {'text': self.icq_text(size)}
+        )
+        return size
+
+    def confirm_page_data(self) -> dict:
+        """
+        Данные текущей страницы подтверждения обновления цен \
+        без изменений.
+
+        :return: dict.
+        """
+        response = self.client.get(reverse('priceapp:product_confirm_update'))
+        formset = response.context['formset']
+        data = {
+            'form-TOTAL_FORMS': formset.initial_form_count(),
+            'form-INITIAL_FORMS': formset.initial_form_count(),
+        }
+        for form in formset.initial_forms:
+            for name in form.fields:
+                value = form[name].value()
+                # Неотмеченный флажок не передается, нулевая цена - да.
+                if value is not None and value is not False:
+                    data[form.add_prefix(name)] = value
+        return data
+
+    def fill_missing_queue(self, size: int) -> int:
+        """
+        Заполняет список Ненайденных товаров через обновление из ICQ.
+
+        :param size: int - количество товаров.
+        :return: int - количество товаров.
+        """
+        self.client.get(reverse('priceapp:product_icq_update'))
+        self.client.post(
+            reverse('priceapp:product_icq_update'),
+            {'text': self.icq_text(0, missing=size)}
+        )
+        return size
+
+
+class URLBudgetTest(TestCase):
+    """Проверка наличия бюджета у каждого URL приложения."""
+
+    def test_every_url_has_budget(self) -> None:
+        """
+        У каждого URL приложения объявлен бюджет запросов.
+
+        :return: None.
+        """
+        for pattern in urls.urlpatterns:
+            self.assertIsInstance(pattern, URLPattern)
+            with self.subTest(url=pattern.name):
+                self.assertTrue(get_query_budget(pattern.name))
+
+
+class PrintSheetQueryTest(QueryBudgetTestCase):
+    """Бюджет запросов сканирования и печати ценников."""
+
+    def test_delete(self) -> None:
+        """
+        Очистка очередей терминала.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'printsheet_delete',
+            'get',
+            self.fill_print_sheet,
+            lambda _: self.client.get(reverse('priceapp:printsheet_delete'))
+        )
+
+    def test_scan_page(self) -> None:
+        """
+        Страница сканирования.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'printsheet_create',
+            'get',
+            self.fill_print_sheet,
+            lambda _: self.client.get(reverse('priceapp:printsheet_create'))
+        )
+
+    def test_scan(self) -> None:
+        """
+        Сканирование штрихкода при заполненном списке печати.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'printsheet_create',
+            'post',
+            self.fill_print_sheet,
+            lambda size: self.client.post(
+                reverse('priceapp:printsheet_create'),
+                {
+                    'input_line': product_ean(size),
+                    'size': 'small',
+                    'is_discount': 'false',
+                }
+            )
+        )
+
+    def test_scan_free_form(self) -> None:
+        """
+        Добавление ценника с ручным вводом (двойной ценник).
+
+        :return: None.
+        """
+        tag = Tag.objects.filter(is_discount=True).first()
+        self.assertQueryBudget(
+            'printsheet_create',
+            'post',
+            self.fill_print_sheet,
+            lambda size: self.client.post(
+                reverse('priceapp:printsheet_create'),
+                {
+                    'name': product_name(size),
+                    'discount_type': 'Акция',
+                    'old_price': 9000,
+                    'price': 8000,
+                    'tag': tag.pk,
+                }
+            )
+        )
+
+    def test_scan_api(self) -> None:
+        """
+        Сканирование штрихкода через JSON API.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'printsheet_scan',
+            'post',
+            self.fill_print_sheet,
+            lambda size: self.client.post(
+                reverse('priceapp:printsheet_scan'),
+                {
+                    'input_line': product_ean(size),
+                    'size': 'small',
+                    'is_discount': 'false',
+                }
+            )
+        )
+
+    def test_oversized_tag(self) -> None:
+        """
+        Размер ценника больше листа не проходит проверку модели, \
+        а сохраненный ценник такого размера выводит сообщение вместо \
+        ошибки сервера.
+
+        :return: None.
+        """
+        tag = Tag.objects.first()
+        tag.width = PAGE_WIDTH + 1
+        with self.assertRaises(ValidationError):
+            tag.full_clean()
+        tag.save()
+        self.fill_print_sheet(SMALL)
+        for url_name in ('printsheet_print', 'printsheet_pdf'):
+            with self.subTest(url_name):
+                response = self.client.get(reverse(f'priceapp:{url_name}'))
+                self.assertRedirects(
+                    response,
+                    reverse('priceapp:printsheet_create'),
+                    fetch_redirect_response=False
+                )
+                response = self.client.get(
+                    reverse('priceapp:printsheet_create')
+                )
+                self.assertContains(response, 'не помещается на лист')
+
+    def test_scan_api_response(self) -> None:
+        """
+        JSON API возвращает добавленный ценник и размер очереди, \
+        для ненайденного товара - статус 404.
+
+        :return: None.
+        """
+        size = self.fill_print_sheet(SMALL)
+        url = reverse('priceapp:printsheet_scan')
+        data = {'input_line': product_ean(1), 'size': 'big'}
+        response = self.client.post(url, {**data, 'is_discount': 'true'})
+        self.assertEqual(response.status_code, 201)
+        result = response.json()
+        self.assertEqual(result['queue_count'], size + 1)
+        self.assertEqual(result['row']['name'], product_name(1))
+        self.assertEqual(
+            result['row']['tag'], {'size': 'big', 'is_discount': True}
+        )
+        response = self.client.post(
+            url, {**data, 'input_line': 'NOT-FOUND', 'is_discount': 'false'}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            response.json(),
+            {
+                'found': False,
+                'input_line': 'NOT-FOUND',
+                'queue_count': size + 1,
+            }
+        )
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('is_discount', response.json()['errors'])
+
+    def test_scan_api_fields(self) -> None:
+        """
+        JSON API принимает штрихкод или наименование товара.
+
+        :return: None.
+        """
+        url = reverse('priceapp:printsheet_scan')
+        data = {'size': 'small', 'is_discount': 'false'}
+        for field, value in (
+                ('ean', product_ean(2)),
+                ('name', product_name(3).lower()),
+        ):
+            with self.subTest(field=field):
+                response = self.client.post(url, {**data, field: value})
+                self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(
+                PrintSheet.objects
+                .filter(terminal=self.terminal)
+                .values_list('name', flat=True)
+            ),
+            [product_name(2), product_name(3)]
+        )
+        for invalid in ({}, {'ean': product_ean(2), 'size': 'huge'}):
+            with self.subTest(data=invalid):
+                response = self.client.post(url, {**data, **invalid})
+                self.assertEqual(response.status_code, 400)
+        page = self.client.get(reverse('priceapp:printsheet_create'))
+        self.assertEqual(page.context['queue_count'], 2)
+
+    def test_print(self) -> None:
+        """
+        Страница печати.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'printsheet_print',
+            'get',
+            self.fill_print_sheet,
+            lambda _: self.client.get(reverse('priceapp:printsheet_print'))
+        )
+
+    def test_pdf(self) -> None:
+        """
+        PDF для печати.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'printsheet_pdf',
+            'get',
+            self.fill_print_sheet,
+            lambda _: self.client.get(reverse('priceapp:printsheet_pdf'))
+        )
+
+    def test_search(self) -> None:
+        """
+        Подсказки товаров.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'product_search',
+            'get',
+            lambda size: product_name(size)[:4],
+            lambda query: self.client.get(
+                reverse('priceapp:product_search'), {'q': query}
+            )
+        )
+
+
+class ProductUpdateQueryTest(QueryBudgetTestCase):
+    """Бюджет запросов обновления цен."""
+
+    def test_csv_page(self) -> None:
+        """
+        Страница загрузки файла обновления.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'product_update',
+            'get',
+            self.fill_update_queue,
+            lambda _: self.client.get(reverse('priceapp:product_update'))
+        )
+
+    def test_csv_update(self) -> None:
+        """
+        Загрузка файла с найденными и ненайденными товарами.
+
+        :return: None.
+        """
+        def prepare(size: int) -> bytes:
+            self.client.get(reverse('priceapp:product_update'))
+            lines = ['sku;price;old_price']
+            lines += [
+                f'{product_sku(number)};{7000 + number};0'
+                for number in range(size)
+            ]
+            lines += [f'NEW{number};10;0' for number in range(size)]
+            return '\n'.join(lines).encode()
+
+        self.assertQueryBudget(
+            'product_update',
+            'post',
+            prepare,
+            lambda content: self.client.post(
+                reverse('priceapp:product_update'),
+                {'file': SimpleUploadedFile('update.csv', content)}
+            )
+        )
+
+    def test_icq_page(self) -> None:
+        """
+        Страница обновления из ICQ.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'product_icq_update',
+            'get',
+            self.fill_update_queue,
+            lambda _: self.client.get(reverse('priceapp:product_icq_update'))
+        )
+
+    def test_icq_update(self) -> None:
+        """
+        Обновление из текста ICQ с найденными и ненайденными товарами.
+
+        :return: None.
+        """
+        def prepare(size: int) -> str:
+            self.client.get(reverse('priceapp:product_icq_update'))
+            return self.icq_text(size, missing=size)
+
+        self.assertQueryBudget(
+            'product_icq_update',
+            'post',
+            prepare,
+            lambda text: self.client.post(
+                reverse('priceapp:product_icq_update'), {'text': text}
+            )
+        )
+
+    def test_confirm_page(self) -> None:
+        """
+        Страница подтверждения обновления.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'product_confirm_update',
+            'get',
+            self.fill_update_queue,
+            lambda _: self.client.get(
+                reverse('priceapp:product_confirm_update')
+            )
+        )
+
+    def test_confirm(self) -> None:
+        """
+        Подтверждение обновления цен.
+
+        :return: None.
+        """
+        def prepare(size: int) -> dict:
+            self.fill_update_queue(size)
+            return self.confirm_page_data()
+
+        self.assertQueryBudget(
+            'product_confirm_update',
+            'post',
+            prepare,
+            lambda data: self.client.post(
+                reverse('priceapp:product_confirm_update'), data
+            )
+        )
+
+    def test_missing_page(self) -> None:
+        """
+        Страница добавления ненайденных товаров.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'missingproduct_form',
+            'get',
+            self.fill_missing_queue,
+            lambda _: self.client.get(
+                reverse('priceapp:missingproduct_form')
+            )
+        )
+
+    def test_missing(self) -> None:
+        """
+        Добавление ненайденных товаров.
+
+        :return: None.
+        """
+        category = Category.objects.first()
+        country = Country.objects.first()
+
+        def prepare(size: int) -> dict:
+            self.fill_missing_queue(size)
+            missing_list = MissingProduct.objects.filter(
+                terminal=self.terminal
+            )
+            data = {
+                'form-TOTAL_FORMS': size,
+                'form-INITIAL_FORMS': size,
+            }
+            for index, missing in enumerate(missing_list):
+                data.update({
+                    f'form-{index}-id': missing.pk,
+                    f'form-{index}-ean': f'2{missing.pk:012d}',
+                    f'form-{index}-name': missing.name,
+                    f'form-{index}-category': category.pk,
+                    f'form-{index}-country': country.pk,
+                    f'form-{index}-price': 10,
+                    f'form-{index}-old_price': 0,
+                })
+            return data
+
+        self.assertQueryBudget(
+            'missingproduct_form',
+            'post',
+            prepare,
+            lambda data: self.client.post(
+                reverse('priceapp:missingproduct_form'), data
+            )
+        )
+
+
+class OtherViewsQueryTest(QueryBudgetTestCase):
+    """Бюджет запросов остальных страниц приложения."""
+
+    def test_product_create_page(self) -> None:
+        """
+        Страница создания товара.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'product_create',
+            'get',
+            lambda size: size,
+            lambda _: self.client.get(reverse('priceapp:product_create'))
+        )
+
+    def test_product_create(self) -> None:
+        """
+        Создание товара.
+
+        :return: None.
+        """
+        category = Category.objects.first()
+        country = Country.objects.first()
+        self.assertQueryBudget(
+            'product_create',
+            'post',
+            lambda size: next(self.new_numbers),
+            lambda number: self.client.post(
+                reverse('priceapp:product_create'),
+                {
+                    'ean': product_ean(number),
+                    'name': product_name(number),
+                    'category': category.pk,
+                    'country': country.pk,
+                    'price': 100,
+                    'old_price': 0,
+                }
+            )
+        )
+
+    def test_update_instruction(self) -> None:
+        """
+        Страница инструкции.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'update_instruction',
+            'get',
+            lambda size: size,
+            lambda _: self.client.get(reverse('priceapp:update_instruction'))
+        )
+
+    def test_performance_report(self) -> None:
+        """
+        Отчет о производительности.
+
+        :return: None.
+        """
+        self.client.force_login(
+            User.objects.create_user('staff', is_staff=True)
+        )
+        self.assertQueryBudget(
+            'performance_report',
+            'get',
+            lambda size: [
+                self.client.get(reverse('priceapp:printsheet_create'))
+                for _ in range(size)
+            ],
+            lambda _: self.client.get(
+                reverse('priceapp:performance_report'), {'format': 'json'}
+            )
+        )
+
+    def test_performance_asgi_queries(self) -> None:
+        """
+        Под ASGI обработчиком учитываются SQL запросы асинхронного \
+        представления, выполняемые в потоке sync_to_async.
+
+        :return: None.
+        """
+        recorder.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = async_to_sync(self.async_client.post)(
+                reverse('priceapp:printsheet_scan'),
+                {
+                    'input_line': product_ean(1),
+                    'size': 'small',
+                    'is_discount': 'false',
+                }
+            )
+        self.assertEqual(response.status_code, 201)
+        (sample,) = recorder.snapshot()['priceapp:printsheet_scan']
+        stats = dict(zip(METRICS, sample))
+        self.assertEqual(stats['queries'], len(context))
+        self.assertGreater(stats['sql_ms'], 0)
+
+
+class ImportJobQueryTest(QueryBudgetTestCase):
+    """Бюджет запросов и результат фоновой загрузки файла."""
+
+    def create_job(self, size: int) -> ImportJob:
+        """
+        Создает и выполняет задачу загрузки файла.
+
+        :param size: int - количество строк найденных и ненайденных товаров.
+        :return: ImportJob.
+        """
+        lines = ['sku;price;old_price']
+        lines += [
+            f'{product_sku(number)};{7000 + number};0'
+            for number in range(size)
+        ]
+        lines += [f'NEW{number};10;0' for number in range(size)]
+        with NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('\n'.join(lines))
+        job = ImportJob.objects.create(
+            terminal=self.terminal, file_path=file.name
+        )
+        with patch('priceapp.jobs.connection'):
+            run_import_job(job.pk, 'utf-8')
+        job.refresh_from_db()
+        return job
+
+    def test_run_job(self) -> None:
+        """
+        Задача сверяет файл, сохраняет результат и удаляет файл.
+
+        :return: None.
+        """
+        job = self.create_job(SMALL)
+        self.assertEqual(job.status, ImportJob.DONE)
+        self.assertEqual(
+            (job.total, job.processed, job.updated, job.missing),
+            (SMALL * 2, SMALL * 2, SMALL, SMALL)
+        )
+        self.assertFalse(os.path.exists(job.file_path))
+        response = self.client.get(
+            reverse('priceapp:import_job', args=(job.pk,))
+        )
+        self.assertRedirects(
+            response,
+            reverse('priceapp:product_confirm_update'),
+            fetch_redirect_response=False
+        )
+
+    def test_failed_job(self) -> None:
+        """
+        Ошибка в файле сохраняется в задаче.
+
+        :return: None.
+        """
+        job = ImportJob.objects.create(
+            terminal=self.terminal, file_path='/nonexistent/update.csv'
+        )
+        with patch('priceapp.jobs.connection'):
+            run_import_job(job.pk, 'utf-8')
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertTrue(job.error)
+
+    def test_large_file_starts_job(self) -> None:
+        """
+        Файл от порогового размера обрабатывается в фоновой задаче.
+
+        :return: None.
+        """
+        content = b'sku;price;old_price\nSKU000001;100;0'
+        with patch('priceapp.jobs.executor') as executor, \
+                patch.object(ProductUpdateView, 'background_size', 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('priceapp:product_update'),
+                    {'file': SimpleUploadedFile('update.csv', content)}
+                )
+        job = ImportJob.objects.get(terminal=self.terminal)
+        self.assertRedirects(
+            response,
+            reverse('priceapp:import_job', args=(job.pk,)),
+            fetch_redirect_response=False
+        )
+        executor.submit.assert_called_once_with(
+            run_import_job, job.pk, 'utf-8'
+        )
+        with open(job.file_path, 'rb') as file:
+            self.assertEqual(file.read(), content)
+        os.remove(job.file_path)
+
+    def test_job_page(self) -> None:
+        """
+        Страница хода загрузки.
+
+        :return: None.
+        """
+        job = ImportJob.objects.create(terminal=self.terminal, total=10)
+        self.assertQueryBudget(
+            'import_job',
+            'get',
+            lambda size: ImportJob.objects.filter(pk=job.pk).update(
+                processed=size
+            ),
+            lambda _: self.client.get(
+                reverse('priceapp:import_job', args=(job.pk,))
+            )
+        )
+
+    def test_job_done(self) -> None:
+        """
+        Переход к подтверждению после загрузки.
+
+        :return: None.
+        """
+        self.assertQueryBudget(
+            'import_job',
+            'get',
+            self.create_job,
+            lambda job: self.client.get(
+                reverse('priceapp:import_job', args=(job.pk,))
+            )
+        )
+
+    def test_job_progress(self) -> None:
+        """
+        Ход загрузки в JSON.
+
+        :return: None.
+        """
+        job = ImportJob.objects.create(
+            terminal=self.terminal, status=ImportJob.RUNNING, total=LARGE
+        )
+        self.assertQueryBudget(
+            'import_job_progress',
+            'get',
+            lambda size: ImportJob.objects.filter(pk=job.pk).update(
+                processed=size
+            ),
+            lambda _: self.client.get(
+                reverse('priceapp:import_job_progress', args=(job.pk,))
+            )
+        )
+        response = self.client.get(
+            reverse('priceapp:import_job_progress', args=(job.pk,))
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                'status': ImportJob.RUNNING,
+                'processed': LARGE,
+                'total': LARGE,
+                'percent': 100,
+                'error': '',
+            }
+        )
+
+    def test_total_counts_records(self) -> None:
+        """
+        Количество строк задачи - количество записей CSV, а не строк \
+        файла: перевод строки в кавычках и пустые строки не считаются.
+
+        :return: None.
+        """
+        lines = [
+            'sku;price;old_price;name',
+            f'{product_sku(0)};7000;0;"Товар\nв две строки"',
+            '',
+            f'{product_sku(1)};7001;0;Товар',
+            '',
+        ]
+        with NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('\n'.join(lines))
+        job = ImportJob.objects.create(
+            terminal=self.terminal, file_path=file.name
+        )
+        with patch('priceapp.jobs.connection'):
+            run_import_job(job.pk, 'utf-8')
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.DONE)
+        self.assertEqual((job.total, job.processed), (2, 2))
+        self.assertEqual(job.percent, 100)
+
+    def test_stale_job_failed(self) -> None:
+        """
+        Задача, ход которой не менялся дольше IMPORT_TIMEOUT (процесс \
+        сервера перезапущен), отмечается ошибкой, ее файл удаляется.
+
+        :return: None.
+        """
+        with NamedTemporaryFile(suffix='.csv', delete=False) as file:
+            pass
+        job = ImportJob.objects.create(
+            terminal=self.terminal,
+            status=ImportJob.RUNNING,
+            file_path=file.name,
+            updated_at=timezone.now() - IMPORT_TIMEOUT - timedelta(minutes=1)
+        )
+        active = ImportJob.objects.create(
+            terminal=self.terminal, status=ImportJob.RUNNING
+        )
+        response = self.client.get(
+            reverse('priceapp:import_job_progress', args=(job.pk,))
+        )
+        self.assertEqual(response.json()['status'], ImportJob.FAILED)
+        self.assertFalse(os.path.exists(file.name))
+        response = self.client.get(
+            reverse('priceapp:import_job', args=(job.pk,))
+        )
+        self.assertRedirects(
+            response,
+            reverse('priceapp:product_update'),
+            fetch_redirect_response=False
+        )
+        active.refresh_from_db()
+        self.assertEqual(active.status, ImportJob.RUNNING)
+
+    def test_cleanup_jobs(self) -> None:
+        """
+        Команда cleanup_import_jobs отмечает ошибкой прерванные задачи \
+        и удаляет завершенные задачи старше времени хранения.
+
+        :return: None.
+        """
+        now = timezone.now()
+        stale = ImportJob.objects.create(
+            terminal=self.terminal,
+            updated_at=now - IMPORT_TIMEOUT - timedelta(minutes=1)
+        )
+        ImportJob.objects.create(
+            terminal=self.terminal,
+            status=ImportJob.DONE,
+            finished_at=now - IMPORT_JOB_RETENTION - timedelta(days=1)
+        )
+        recent = ImportJob.objects.create(
+            terminal=self.terminal,
+            status=ImportJob.FAILED,
+            finished_at=now
+        )
+        call_command('cleanup_import_jobs', stdout=StringIO())
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, ImportJob.FAILED)
+        self.assertEqual(
+            set(ImportJob.objects.values_list('pk', flat=True)),
+            {stale.pk, recent.pk}
+        )
+
+
+class TerminalQueueTest(QueryBudgetTestCase):
+    """Разделение очередей терминалов и удаление брошенных очередей."""
+
+    def setUp(self) -> None:
+        """
+        Открывает сессии двух терминалов.
+
+        :return: None.
+        """
+        super().setUp()
+        self.other_client = Client()
+        self.other_client.get(reverse('priceapp:printsheet_delete'))
+        self.other_terminal = self.other_client.session['terminal']
+
+    def fill_queues(self, terminal: str) -> None:
+        """
+        Заполняет очереди печати и обновления цен терминала.
+
+        :param terminal: str.
+        :return: None.
+        """
+        PrintSheet.objects.create(
+            name=product_name(0),
+            category='Категория',
+            country='Страна',
+            price=1000,
+            old_price=2000,
+            tag=Tag.objects.first(),
+            terminal=terminal,
+        )
+        UpdateProduct.objects.create(
+            name=product_name(0), price=1, old_price=0, terminal=terminal
+        )
+        MissingProduct.objects.create(
+            ean=f'47{terminal[:11]}', name='Новый', terminal=terminal
+        )
+
+    def queue_counts(self, terminal: str) -> list:
+        """
+        Возвращает размеры очередей терминала.
+
+        :param terminal: str.
+        :return: list[int].
+        """
+        return [
+            model.objects.filter(terminal=terminal).count()
+            for model in (PrintSheet, UpdateProduct, MissingProduct)
+        ]
+
+    def test_isolated_queues(self) -> None:
+        """
+        Терминал видит и очищает только свои очереди.
+
+        :return: None.
+        """
+        self.fill_print_sheet(SMALL)
+        self.other_client.post(
+            reverse('priceapp:printsheet_scan'),
+            {
+                'input_line': product_ean(1),
+                'size': 'small',
+                'is_discount': 'false',
+            }
+        )
+        url = reverse('priceapp:printsheet_create')
+        self.assertEqual(self.client.get(url).context['queue_count'], SMALL)
+        self.assertEqual(
+            self.other_client.get(url).context['queue_count'], 1
+        )
+        self.fill_queues(self.other_terminal)
+        self.client.get(reverse('priceapp:printsheet_delete'))
+        self.assertEqual(self.queue_counts(self.terminal), [0, 0, 0])
+        self.assertEqual(self.queue_counts(self.other_terminal), [2, 1, 1])
+
+    def test_delete_abandoned_queues(self) -> None:
+        """
+        Команда cleanup_terminal_queues удаляет очереди истекших сессий \
+        и очереди без терминала.
+
+        :return: None.
+        """
+        for terminal in (self.terminal, self.other_terminal, ''):
+            self.fill_queues(terminal)
+        Session.objects.filter(
+            session_key=self.other_client.session.session_key
+        ).update(expire_date=timezone.now() - timedelta(seconds=1))
+        call_command('cleanup_terminal_queues', stdout=StringIO())
+        self.assertEqual(self.queue_counts(self.terminal), [1, 1, 1])
+        self.assertEqual(self.queue_counts(self.other_terminal), [0, 0, 0])
+        self.assertEqual(self.queue_counts(''), [0, 0, 0])
+
+
+class IndexVersionTest(TestCase):
+    """Сброс индексов в памяти процесса из другого процесса сервера."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Создает синтетический каталог.
+
+        :return: None.
+        """
+        generate_catalogue(SMALL)
+
+    def test_version_changed_by_other_process(self) -> None:
+        """
+        Версия, измененная в другом процессе, перестраивает индекс.
+
+        :return: None.
+        """
+        ean = product_ean(0)
+        product_index.find(ean)
+        # update не отправляет сигналы и версия в этом процессе не меняется.
+        Product.objects.filter(ean=ean).update(price=12345)
+        self.assertNotEqual(product_index.find(ean)['price'], 12345)
+        version = get_index_version()
+        subprocess.run(
+            [
+                sys.executable,
+                '-c',
+                'import json, sys, django; django.setup(); '
+                'from django.test import override_settings; '
+                'from priceapp.lookup import invalidate_product_index; '
+                'override_settings(CACHES=json.loads(sys.argv[1])).enable(); '
+                'invalidate_product_index()',
+                json.dumps(settings.CACHES, default=str),
+            ],
+            check=True,
+            cwd=settings.BASE_DIR,
+        )
+        self.assertNotEqual(get_index_version(INDEX_VERSION_KEY), version)
+        self.assertEqual(product_index.find(ean)['price'], 12345)
+
+
+class ReconcileTest(TestCase):
+    """Сверка строк обновления цен с товарами."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Создает синтетический каталог и товар с повторяющимся sku.
+
+        :return: None.
+        """
+        generate_catalogue(SMALL)
+        Product.objects.create(
+            sku=product_sku(0),
+            ean='4700000000000',
+            name='Дубль',
+            category=Category.objects.first(),
+            country=Country.objects.first(),
+            price=100,
+            red_price=False,
+        )
+
+    def test_duplicate_sku(self) -> None:
+        """
+        В очередь попадают все товары с одинаковым sku.
+
+        :return: None.
+        """
+        result = import_price_rows(
+            [
+                {'sku': product_sku(0), 'price': '777', 'old_price': '0'},
+                {'sku': 'NEW', 'price': '10', 'old_price': '0'},
+            ],
+            terminal='terminal'
+        )
+        self.assertEqual(tuple(result), (2, 1, 0))
+        self.assertEqual(
+            set(
+                UpdateProduct.objects
+                .filter(terminal='terminal')
+                .values_list('name', flat=True)
+            ),
+            {product_name(0), 'Дубль'}
+        )
+
+    def test_repeated_sku_chunks(self) -> None:
+        """
+        Повторяющийся sku определяется последней строкой при любом \
+        размере пакета, в результате учитываются записанные товары.
+
+        :return: None.
+        """
+        sku = product_sku(1)
+        current_price = Product.objects.get(sku=sku).price
+        files = {
+            'last': ['111', '222'],
+            'unchanged': ['111', str(current_price)],
+        }
+        for name, prices in files.items():
+            rows = [
+                {'sku': sku, 'price': price, 'old_price': '0'}
+                for price in prices
+            ]
+            rows.insert(1, {
+                'sku': product_sku(2), 'price': '333', 'old_price': '0'
+            })
+            rows.append({'sku': 'NEW', 'price': '10', 'old_price': '0'})
+            rows.append({'sku': 'NEW', 'price': '20', 'old_price': '0'})
+            results = set()
+            for chunk_size in (1, 2, len(rows)):
+                with self.subTest(name, chunk_size=chunk_size):
+                    terminal = f'{name}-{chunk_size}'
+                    result = import_price_rows(
+                        rows, terminal=terminal, chunk_size=chunk_size
+                    )
+                    queue = dict(
+                        UpdateProduct.objects
+                        .filter(terminal=terminal)
+                        .values_list('name', 'price')
+                    )
+                    self.assertEqual(result.updated, len(queue))
+                    missing = MissingProduct.objects.filter(
+                        terminal=terminal
+                    )
+                    self.assertEqual(result.missing, missing.count())
+                    results.add((
+                        tuple(result),
+                        tuple(sorted(queue.items())),
+                        tuple(missing.values_list('price', flat=True)),
+                    ))
+            self.assertEqual(len(results), 1, results)
+            (result, queue, missing), = results
+            self.assertEqual(missing, (20,))
+            if name == 'last':
+                self.assertEqual(result, (2, 1, 0))
+                self.assertIn((product_name(1), 222), queue)
+            else:
+                self.assertEqual(result, (1, 1, 1))
+                self.assertNotIn(product_name(1), dict(queue))
+
+
+class LayoutTest(SimpleTestCase):
+    """Раскладка ценников по листам печати."""
+
+    def assertValidLayout(self, pages: list, sizes: list) -> None:
+        """
+        Проверяет, что каждый ценник размещен один раз в пределах листа \
+        и ценники одного листа не пересекаются.
+
+        :param pages: list[Page].
+        :param sizes: list[tuple[int, int]] - размеры ценников по номеру.
+        :return: None.
+        """
+        placed = sorted(
+            placement.item for page in pages for placement in page
+        )
+        self.assertEqual(placed, list(range(len(sizes))))
+        for page in pages:
+            self.assertTrue(page.placements)
+            for placement in page:
+                self.assertEqual(
+                    (placement.width, placement.height),
+                    sizes[placement.item]
+                )
+                self.assertGreaterEqual(min(placement.x, placement.y), 0)
+                self.assertLessEqual(
+                    placement.x + placement.width, PAGE_WIDTH
+                )
+                self.assertLessEqual(
+                    placement.y + placement.height, PAGE_HEIGHT
+                )
+            for index, first in enumerate(page.placements):
+                for second in page.placements[index + 1:]:
+                    self.assertFalse(
+                        first.x < second.x + second.width
+                        and second.x < first.x + first.width
+                        and first.y < second.y + second.height
+                        and second.y < first.y + first.height,
+                        f'ценники {first} и {second} пересекаются'
+                    )
+
+    def test_engines(self) -> None:
+        """
+        Раскладка стандартных и случайных размеров ценников.
+
+        :return: None.
+        """
+        generator = random.Random(0)
+        size_lists = {
+            'standard': [
+                generator.choice(((90, 45), (45, 33)))
+                for _ in range(150)
+            ],
+            'random': [
+                (generator.randint(10, 120), generator.randint(10, 150))
+                for _ in range(150)
+            ],
+        }
+        for name, engine_class in LAYOUT_ENGINES.items():
+            for kind, sizes in size_lists.items():
+                with self.subTest(engine=name, sizes=kind):
+                    pages = engine_class().pack(
+                        range(len(sizes)), lambda item: sizes[item]
+                    )
+                    self.assertValidLayout(pages, sizes)
+
+    def test_empty_and_oversized(self) -> None:
+        """
+        Пустой список дает ноль листов, ценник больше листа - ошибку.
+
+        :return: None.
+        """
+        for name, engine_class in LAYOUT_ENGINES.items():
+            with self.subTest(engine=name):
+                engine = engine_class()
+                self.assertEqual(engine.pack([], lambda item: item), [])
+                with self.assertRaises(ValueError):
+                    engine.pack([(PAGE_WIDTH + 1, 10)], lambda item: item)
+
+    def test_benchmark_print(self) -> None:
+        """
+        Команда замера отрисовки страницы печати находит движок \
+        шаблонов по стандартному имени.
+
+        :return: None.
+        """
+        stdout = StringIO()
+        call_command('benchmark_print', count=20, repeat=1, stdout=stdout)
+        self.assertIn('renderer', stdout.getvalue())
+
+
+class PdfTest(TestCase):
+    """Формирование PDF с листами ценников."""
+
+    def test_pages_and_forms(self) -> None:
+        """
+        Количество страниц PDF совпадает с раскладкой, повторяющиеся \
+        ценники рисуются одним Form XObject.
+
+        :return: None.
+        """
+        tag = Tag.objects.create(
+            name='Большой', width=90, height=45, size='big'
+        )
+        printsheet_list = [
+            PrintSheet(
+                name=product_name(number % 3),
+                category='Категория',
+                country='Страна',
+                price=1000 + number % 3,
+                old_price=0,
+                tag=tag,
+            )
+            for number in range(30)
+        ]
+        page_list = get_layout_engine().pack(printsheet_list)
+        self.assertGreater(len(page_list), 1)
+        content = render_pdf(page_list)
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertEqual(
+            len(re.findall(rb'/Type /Page\b(?!s)', content)),
+            len(page_list)
+        )
+        self.assertEqual(content.count(b'/Subtype /Form'), 3)
+
+    def test_tag_size_scale(self) -> None:
+        """
+        Строки и ячейки ценника любого размера заполняют ценник, \
+        ценники разного размера рисуются разными Form XObject.
+
+        :return: None.
+        """
+        register_fonts()
+        for size, is_discount in TAG_LAYOUTS:
+            for width, height in ((60, 30), (120, 80)):
+                with self.subTest(size, discount=is_discount, width=width):
+                    tag = Tag(
+                        name='Ценник', width=width, height=height,
+                        size=size, is_discount=is_discount
+                    )
+                    item = PrintSheet(
+                        name=product_name(0),
+                        category='Категория',
+                        country='Страна',
+                        price=1000,
+                        old_price=2000,
+                        tag=tag,
+                    )
+                    renderer = TagRenderer(
+                        Canvas(BytesIO())
+                    )
+                    with patch.object(renderer, 'draw_cell') as draw_cell:
+                        renderer.draw_tag(item)
+                    cells = [
+                        call.args[2:6] for call in draw_cell.call_args_list
+                    ]
+                    self.assertAlmostEqual(
+                        max(x + cell_width for x, _, cell_width, _ in cells),
+                        width * mm
+                    )
+                    self.assertAlmostEqual(
+                        max(y + row_height for _, y, _, row_height in cells),
+                        height * mm
+                    )
+                    self.assertAlmostEqual(min(y for _, y, _, _ in cells), 0)
+        item_list = [
+            PrintSheet(
+                name=product_name(0),
+                category='Категория',
+                country='Страна',
+                price=1000,
+                old_price=0,
+                tag=Tag(name='Ценник', width=width, height=45, size='big'),
+            )
+            for width in (90, 60)
+        ]
+        content = render_pdf(get_layout_engine().pack(item_list))
+        self.assertEqual(content.count(b'/Subtype /Form'), 2)
+
+
+class ProductNameKeyTest(TestCase):
+    """Поле `name_key` товара при сохранении и массовых операциях."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Создает категорию и страну.
+
+        :return: None.
+        """
+        cls.category = Category.objects.create(name='Категория')
+        cls.country = Country.objects.create(name='Страна')
+
+    def create_product(self, number: int, name: str) -> Product:
+        """
+        Создает несохраненный товар.
+
+        :param number: int - номер товара.
+        :param name: str - наименование.
+        :return: Product.
+        """
+        return Product(
+            ean=product_ean(number),
+            name=name,
+            price=100,
+            red_price=False,
+            category=self.category,
+            country=self.country,
+        )
+
+    def assertNameKeys(self, expected: dict) -> None:
+        """
+        Проверяет `name_key` товаров в БД.
+
+        :param expected: dict - штрихкод -> name_key.
+        :return: None.
+        """
+        self.assertEqual(
+            dict(Product.objects.values_list('ean', 'name_key')),
+            expected
+        )
+
+    def test_name_key(self) -> None:
+        """
+        `save`, `bulk_create`, `bulk_update` и `update` обновляют \
+        `name_key` по наименованию.
+
+        :return: None.
+        """
+        product = self.create_product(0, 'Sony IER-M7')
+        product.save()
+        Product.objects.bulk_create([self.create_product(1, 'ÉTUI')])
+        self.assertNameKeys({
+            product_ean(0): 'sony ier-m7',
+            product_ean(1): 'étui',
+        })
+        product.name = 'Sony IER-M9'
+        product.save(update_fields=['name'])
+        self.assertNameKeys({
+            product_ean(0): 'sony ier-m9',
+            product_ean(1): 'étui',
+        })
+        product_list = list(Product.objects.order_by('ean'))
+        for product in product_list:
+            product.name = f'{product.name} NEW'
+        Product.objects.bulk_update(product_list, ['name'])
+        self.assertNameKeys({
+            product_ean(0): 'sony ier-m9 new',
+            product_ean(1): 'étui new',
+        })
+        Product.objects.filter(ean=product_ean(1)).update(name='STRASSE')
+        self.assertNameKeys({
+            product_ean(0): 'sony ier-m9 new',
+            product_ean(1): 'strasse',
+        })
+
+
+class SearchTest(TestCase):
+    """Подсказки товаров для поля сканера."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Создает товары с похожими наименованиями.
+
+        :return: None.
+        """
+        category = Category.objects.create(name='Категория')
+        country = Country.objects.create(name='Страна')
+        names = ['Sony IER-M7', 'Sony IER-M9', 'New Sony IER-M5']
+        names += [f'Кабель {number:02d}' for number in range(60)]
+        Product.objects.bulk_create([
+            Product(
+                ean=product_ean(number),
+                name=name,
+                price=100,
+                red_price=False,
+                category=category,
+                country=country,
+            )
+            for number, name in enumerate(names)
+        ])
+
+    def setUp(self) -> None:
+        """
+        Сбрасывает индексы, построенные по данным других тестов.
+
+        :return: None.
+        """
+        invalidate_product_index()
+
+    def search(self, **params) -> list:
+        """
+        Выполняет запрос подсказок.
+
+        :param params: Any - параметры запроса.
+        :return: list[str] - наименования найденных товаров.
+        """
+        response = self.client.get(reverse('priceapp:product_search'), params)
+        self.assertEqual(response.status_code, 200)
+        return [product['name'] for product in response.json()['results']]
+
+    def test_prefix_before_fuzzy(self) -> None:
+        """
+        Совпадения начала идут раньше совпадений по триграммам, \
+        запрос с опечаткой находит товар по триграммам.
+
+        :return: None.
+        """
+        self.assertEqual(
+            self.search(q='sony ier'),
+            ['Sony IER-M7', 'Sony IER-M9', 'New Sony IER-M5']
+        )
+        self.assertEqual(self.search(q='SONY IER-M9')[0], 'Sony IER-M9')
+        self.assertEqual(self.search(q='soni ier-m7')[0], 'Sony IER-M7')
+
+    def test_limit(self) -> None:
+        """
+        Количество результатов ограничено параметром `limit` \
+        и максимумом представления.
+
+        :return: None.
+        """
+        self.assertEqual(len(self.search(q='кабель')), 10)
+        self.assertEqual(len(self.search(q='кабель', limit=3)), 3)
+        self.assertEqual(len(self.search(q='кабель', limit=0)), 1)
+        self.assertEqual(len(self.search(q='кабель', limit='abc')), 10)
+        self.assertEqual(
+            len(self.search(q='кабель', limit=1000)),
+            ProductSearchView.max_limit
+        )
+        self.assertEqual(self.search(q='  '), [])
+
+
+class PriceHistoryTest(TestCase):
+    """Запись, выборки и прореживание истории цен."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Создает товар.
+
+        :return: None.
+        """
+        cls.category = Category.objects.create(name='Категория')
+        cls.country = Country.objects.create(name='Страна')
+        cls.product = Product.objects.create(
+            ean=product_ean(0),
+            name=product_name(0),
+            price=100,
+            red_price=False,
+            category=cls.category,
+            country=cls.country,
+        )
+
+    def record(self, price: int, moment: datetime) -> None:
+        """
+        Записывает цену товара в историю.
+
+        :param price: int.
+        :param moment: datetime - момент изменения.
+        :return: None.
+        """
+        self.product.price = price
+        record_price_history([self.product], recorded_at=moment)
+
+    def prices(self) -> list:
+        """
+        Цены товара в истории от старых к новым.
+
+        :return: list[int].
+        """
+        return [
+            int(price) for price in PriceHistory.objects
+            .filter(product=self.product)
+            .order_by('recorded_at', 'id')
+            .values_list('price', flat=True)
+        ]
+
+    def test_as_of_and_last_changes(self) -> None:
+        """
+        Цена на момент и последние изменения.
+
+        :return: None.
+        """
+        start = timezone.make_aware(datetime(2026, 1, 10, 12))
+        for days, price in enumerate((100, 200, 300)):
+            self.record(price, start + timedelta(days=days))
+        history = PriceHistory.objects
+        self.assertIsNone(
+            history.as_of(self.product, start - timedelta(seconds=1))
+        )
+        for moment, price in (
+                (start, 100),
+                (start + timedelta(hours=36), 200),
+                (start + timedelta(days=5), 300),
+        ):
+            with self.subTest(moment=moment):
+                self.assertEqual(
+                    history.as_of(self.product.pk, moment).price, price
+                )
+        self.assertEqual(
+            [item.price for item in history.last_changes(self.product, 2)],
+            [300, 200]
+        )
+
+    def test_compact(self) -> None:
+        """
+        Прореживание оставляет последнюю запись товара за период \
+        и не изменяет записи новее указанной даты.
+
+        :return: None.
+        """
+        start = timezone.make_aware(datetime(2026, 1, 10, 9))
+        for day in range(3):
+            for hour in range(3):
+                self.record(
+                    100 * (day + 1) + hour,
+                    start + timedelta(days=day, hours=hour)
+                )
+        self.assertEqual(
+            compact_price_history(start + timedelta(days=2), 'day'), 4
+        )
+        self.assertEqual(self.prices(), [102, 202, 300, 301, 302])
+        self.assertEqual(
+            compact_price_history(start + timedelta(days=40), 'month'), 4
+        )
+        self.assertEqual(self.prices(), [302])
+
+    def test_sources(self) -> None:
+        """
+        История записывается при создании товара, изменении цены \
+        в админке и загрузке каталога.
+
+        :return: None.
+        """
+        self.client.post(
+            reverse('priceapp:product_create'),
+            {
+                'ean': product_ean(1),
+                'name': product_name(1),
+                'category': self.category.pk,
+                'country': self.country.pk,
+                'price': 150,
+                'old_price': 0,
+            }
+        )
+        created = Product.objects.get(ean=product_ean(1))
+        self.assertEqual(
+            list(created.price_history.values_list('price', flat=True)),
+            [150]
+        )
+        self.client.force_login(
+            User.objects.create_superuser('admin', password='admin')
+        )
+        url = reverse('admin:priceapp_product_change', args=(created.pk,))
+        data = {
+            'sku': '',
+            'ean': created.ean,
+            'name': created.name,
+            'category': self.category.pk,
+            'country': self.country.pk,
+            'price': 150,
+            'old_price': 0,
+        }
+        self.client.post(url, {**data, 'name': 'Новое наименование'})
+        self.client.post(url, {**data, 'price': 170})
+        self.assertEqual(
+            list(created.price_history.values_list('price', flat=True)),
+            [170, 150]
+        )
+        rows = [
+            {
+                'ean': product_ean(0),
+                'name': product_name(0),
+                'category': 'Категория',
+                'country': 'Страна',
+                'price': price,
+            }
+            for price in (100, 120)
+        ]
+        CatalogueImporter().run(rows[:1])
+        self.assertFalse(self.product.price_history.exists())
+        CatalogueImporter().run(rows[1:])
+        self.assertEqual(
+            list(self.product.price_history.values_list('price', flat=True)),
+            [120]
+        )
+
+
+class CatalogueTest(TestCase):
+    """Выгрузка и загрузка каталога товаров."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Создает синтетический каталог.
+
+        :return: None.
+        """
+        generate_catalogue(LARGE)
+
+    def test_round_trip(self) -> None:
+        """
+        Загрузка выгруженного каталога в пустую БД восстанавливает \
+        товары, категории и страны, повторная загрузка не создает \
+        дублей.
+
+        :return: None.
+        """
+        rows = list(export_rows())
+        category_count = len({row['category'] for row in rows})
+        country_count = len({row['country'] for row in rows})
+        for fmt in CATALOGUE_FORMATS:
+            with self.subTest(format=fmt), \
+                    TemporaryDirectory() as directory:
+                path = os.path.join(directory, f'catalogue.{fmt}')
+                call_command('export_catalogue', path, stderr=StringIO())
+                Product.objects.all().delete()
+                Category.objects.all().delete()
+                Country.objects.all().delete()
+                for created in (
+                        (category_count, country_count),
+                        (0, 0),
+                ):
+                    # Пакеты меньше каталога: категории и страны
+                    # создаются в нескольких пакетах.
+                    stdout = StringIO()
+                    call_command(
+                        'import_catalogue', path,
+                        chunk_size=7, batch_size=3,
+                        stdout=stdout, stderr=StringIO()
+                    )
+                    self.assertIn(
+                        f'создано категорий: {created[0]}, '
+                        f'стран: {created[1]}',
+                        stdout.getvalue()
+                    )
+                    self.assertEqual(list(export_rows()), rows)
+
+    def test_invalid_row(self) -> None:
+        """
+        Строка без цены прерывает загрузку с ошибкой команды.
+
+        :return: None.
+        """
+        with NamedTemporaryFile(
+                'w', suffix='.jsonl', delete=False
+        ) as file:
+            file.write(json.dumps({
+                'ean': product_ean(LARGE),
+                'name': product_name(LARGE),
+                'category': 'Новая категория',
+                'country': 'Новая страна',
+            }))
+        self.addCleanup(os.remove, file.name)
+        with self.assertRaises(CommandError):
+            call_command('import_catalogue', file.name, stderr=StringIO())
+        self.assertFalse(
+            Product.objects.filter(ean=product_ean(LARGE)).exists()
+        )
+
+
+class UnchangedProductsTest(QueryBudgetTestCase):
+    """Товары, цены которых не изменились при обновлении."""
+
+    def csv_file(self, numbers: range, changed: int = 0,
+                 missing: int = 0) -> SimpleUploadedFile:
+        """
+        Файл обновления с текущими ценами товаров.
+
+        :param numbers: range - номера товаров с текущими ценами.
+        :param changed: int - номер товара с новой ценой.
+        :param missing: int - количество ненайденных товаров.
+        :return: SimpleUploadedFile.
+        """
+        lines = ['sku;price;old_price']
+        for product in Product.objects.filter(
+                sku__in=[product_sku(number) for number in numbers]
+        ):
+            lines.append(f'{product.sku};{product.price};{product.old_price}')
+        if changed:
+            lines.append(f'{product_sku(changed)};1;0')
+        lines += [f'NEW{number};10;0' for number in range(missing)]
+        return SimpleUploadedFile(
+            'update.csv', '\n'.join(lines).encode()
+        )
+
+    def test_not_queued(self) -> None:
+        """
+        Товары без изменения цены не попадают в Обновляемые товары, \
+        их количество выводится на странице подтверждения.
+
+        :return: None.
+        """
+        response = self.client.post(
+            reverse('priceapp:product_update'),
+            {'file': self.csv_file(range(SMALL), changed=SMALL)},
+            follow=True
+        )
+        self.assertEqual(
+            list(UpdateProduct.objects.values_list('name', flat=True)),
+            [product_name(SMALL)]
+        )
+        self.assertEqual(response.context['unchanged_count'], SMALL)
+
+    def test_all_unchanged(self) -> None:
+        """
+        Если менять нечего, пользователь возвращается на страницу \
+        обновления с количеством товаров без изменения цены.
+
+        :return: None.
+        """
+        response = self.client.post(
+            reverse('priceapp:product_update'),
+            {'file': self.csv_file(range(SMALL))},
+            follow=True
+        )
+        self.assertRedirects(response, reverse('priceapp:product_update'))
+        self.assertContains(
+            response, f'товаров без изменения цены: {SMALL}'
+        )
+        self.assertFalse(UpdateProduct.objects.exists())
+        response = self.client.post(
+            reverse('priceapp:product_icq_update'),
+            {'text': '\r\n'.join(
+                f'{product.name} - {product.price}'
+                for product in Product.objects.order_by('pk')[:SMALL]
+            )},
+            follow=True
+        )
+        self.assertRedirects(
+            response, reverse('priceapp:product_icq_update')
+        )
+        self.assertContains(
+            response, f'товаров без изменения цены: {SMALL}'
+        )
+        self.assertFalse(UpdateProduct.objects.exists())
+
+    def test_unchanged_and_missing(self) -> None:
+        """
+        Количество товаров без изменения цены выводится на странице \
+        Ненайденных товаров.
+
+        :return: None.
+        """
+        response = self.client.post(
+            reverse('priceapp:product_update'),
+            {'file': self.csv_file(range(SMALL), missing=1)},
+            follow=True
+        )
+        self.assertRedirects(
+            response, reverse('priceapp:missingproduct_form')
+        )
+        self.assertEqual(response.context['unchanged_count'], SMALL)
+        self.assertFalse(UpdateProduct.objects.exists())
+
+
+class ConfirmPagesTest(QueryBudgetTestCase):
+    """Постраничное подтверждение обновления цен."""
+
+    @staticmethod
+    def updated_numbers(size: int) -> list:
+        """
+        Отмечает товары с номерами меньше size, цены которых обновлены \
+        первым обновлением ICQ.
+
+        :param size: int - количество товаров.
+        :return: list[bool].
+        """
+        return [
+            product.price == 5000 + number
+            for number, product in enumerate(
+                Product.objects.filter(
+                    name__in=[product_name(number) for number in range(size)]
+                ).order_by('ean')
+            )
+        ]
+
+    def test_pages(self) -> None:
+        """
+        Каждая отправленная страница обновляет свои товары и удаляется \
+        из очереди, следующие страницы не изменяются.
+
+        :return: None.
+        """
+        size = 5
+        self.fill_update_queue(size)
+        queue = UpdateProduct.objects.filter(terminal=self.terminal)
+        url = reverse('priceapp:product_confirm_update')
+        with patch.object(ProductConfirmUpdateView, 'paginate_by', 2):
+            for remaining in (3, 1, 0):
+                page_size = min(2, queue.count())
+                data = self.confirm_page_data()
+                self.assertEqual(data['form-TOTAL_FORMS'], page_size)
+                response = self.client.post(url, data)
+                self.assertRedirects(
+                    response,
+                    url if remaining
+                    else reverse('priceapp:product_icq_update'),
+                    fetch_redirect_response=False
+                )
+                self.assertEqual(queue.count(), remaining)
+                self.assertEqual(
+                    self.updated_numbers(size),
+                    [number < size - remaining for number in range(size)]
+                )
+
+    def test_repeated_page(self) -> None:
+        """
+        Повторно отправленная страница не удаляет из очереди следующую \
+        страницу без обновления товаров.
+
+        :return: None.
+        """
+        self.fill_update_queue(4)
+        queue = UpdateProduct.objects.filter(terminal=self.terminal)
+        url = reverse('priceapp:product_confirm_update')
+        with patch.object(ProductConfirmUpdateView, 'paginate_by', 2):
+            data = self.confirm_page_data()
+            self.client.post(url, data)
+            self.assertEqual(queue.count(), 2)
+            response = self.client.post(url, data)
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(queue.count(), 2)
+        self.assertEqual(self.updated_numbers(4), [True, True, False, False])
+
+    def test_invalid_page(self) -> None:
+        """
+        Страница с ошибкой выводится повторно с ошибками форм, \
+        очередь не изменяется.
+
+        :return: None.
+        """
+        self.fill_update_queue(3)
+        queue = UpdateProduct.objects.filter(terminal=self.terminal)
+        data = self.confirm_page_data()
+        data['form-1-price'] = 'цена'
+        response = self.client.post(
+            reverse('priceapp:product_confirm_update'), data
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].forms[1].errors)
+        self.assertContains(response, 'form-error')
+        self.assertEqual(queue.count(), 3)
+        self.assertEqual(self.updated_numbers(3), [False] * 3)
+
+
+class MissingProductFormTest(QueryBudgetTestCase):
+    """Проверка страницы Ненайденных товаров перед созданием товаров."""
+
+    def setUp(self) -> None:
+        """
+        Заполняет список Ненайденных товаров.
+
+        :return: None.
+        """
+        super().setUp()
+        self.fill_missing_queue(2)
+        self.category = Category.objects.create(name='Новая категория')
+        self.country = Country.objects.first()
+        self.url = reverse('priceapp:missingproduct_form')
+
+    def page_data(self, **values) -> dict:
+        """
+        Данные страницы Ненайденных товаров.
+
+        :param values: Any - поля, одинаковые для всех форм.
+        :return: dict.
+        """
+        missing_list = MissingProduct.objects.filter(terminal=self.terminal)
+        data = {
+            'form-TOTAL_FORMS': len(missing_list),
+            'form-INITIAL_FORMS': len(missing_list),
+        }
+        for index, missing in enumerate(missing_list):
+            data.update({
+                f'form-{index}-id': missing.pk,
+                f'form-{index}-ean': f'2{missing.pk:012d}',
+                f'form-{index}-name': missing.name,
+                f'form-{index}-category': self.category.pk,
+                f'form-{index}-country': self.country.pk,
+                f'form-{index}-price': 10,
+                f'form-{index}-old_price': 0,
+            })
+            data.update({
+                f'form-{index}-{name}': value
+                for name, value in values.items()
+            })
+        return data
+
+    def assertPageError(self, data: dict, field: str, code: str) -> None:
+        """
+        Проверяет, что страница выводится повторно с ошибкой поля \
+        в каждой форме, а товары не создаются.
+
+        :param data: dict - данные страницы.
+        :param field: str - поле с ошибкой.
+        :param code: str - код ошибки.
+        :return: None.
+        """
+        product_count = Product.objects.count()
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 200)
+        for form in response.context['formset']:
+            self.assertTrue(
+                form.has_error(field, code), form.errors.as_json()
+            )
+        self.assertEqual(Product.objects.count(), product_count)
+        self.assertEqual(
+            MissingProduct.objects.filter(terminal=self.terminal).count(), 2
+        )
+
+    def test_valid(self) -> None:
+        """
+        Страница без ошибок создает товары.
+
+        :return: None.
+        """
+        response = self.client.post(self.url, self.page_data())
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            Product.objects.filter(category=self.category).count(), 2
+        )
+
+    def test_deleted_choice(self) -> None:
+        """
+        Категория, удаленная после загрузки кеша вариантов, \
+        не принимается: при удалении через ORM кеш перестраивается, \
+        при удалении в обход ORM ошибку находит форм-сет.
+
+        :return: None.
+        """
+        self.client.get(self.url)
+        data = self.page_data()
+        self.category.delete()
+        self.assertPageError(data, 'category', 'invalid_choice')
+        self.category = Category.objects.create(name='Новая категория')
+        data = self.page_data()
+        self.client.get(self.url)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM priceapp_category WHERE id = %s',
+                [self.category.pk]
+            )
+        self.assertPageError(data, 'category', 'invalid_choice')
+
+    def test_required(self) -> None:
+        """
+        Поля, обязательные для товара, обязательны в форме.
+
+        :return: None.
+        """
+        for field in ('ean', 'name', 'category', 'country', 'price'):
+            with self.subTest(field=field):
+                self.assertPageError(
+                    self.page_data(**{field: ''}), field, 'required'
+                )
+
+    def test_duplicate_ean(self) -> None:
+        """
+        Штрихкод существующего товара или повторяющийся на странице \
+        возвращает ошибку формы.
+
+        :return: None.
+        """
+        self.assertPageError(
+            self.page_data(ean=product_ean(0)), 'ean', None
+        )
+        self.assertPageError(
+            self.page_data(ean='2999999999999'), 'ean', None
+        )
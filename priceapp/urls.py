@@ -6,7 +6,13 @@ from .views import (
     PrintSheetView,
     PrintSheetDelete,
     PrintSheetList,
+    PrintSheetPDF,
+    PrintSheetScanView,
+    ImportJobProgressView,
+    ImportJobView,
+    PerformanceReportView,
     ProductICQUpdateView,
+    ProductSearchView,
     ProductConfirmUpdateView,
     ProductUpdateView,
     ProductCreateView,
@@ -20,7 +26,14 @@ app_name = 'priceapp'
 urlpatterns = [
     path('', PrintSheetDelete.as_view(), name='printsheet_delete'),
     path('scaner/', PrintSheetView.as_view(), name='printsheet_create'),
+    path(
+        'scaner/scan/',
+        PrintSheetScanView.as_view(),
+        name='printsheet_scan'
+    ),
     path('print/', PrintSheetList.as_view(), name='printsheet_print'),
+    path('print.pdf', PrintSheetPDF.as_view(), name='printsheet_pdf'),
+    path('search/', ProductSearchView.as_view(), name='product_search'),
     path('new-product/', ProductCreateView.as_view(), name='product_create'),
     path('update/', ProductUpdateView.as_view(), name='product_update'),
     path(
@@ -28,6 +41,16 @@ urlpatterns = [
         ProductICQUpdateView.as_view(),
         name='product_icq_update'
     ),
+    path(
+        'update/jobs/<uuid:pk>/',
+        ImportJobView.as_view(),
+        name='import_job'
+    ),
+    path(
+        'update/jobs/<uuid:pk>/progress/',
+        ImportJobProgressView.as_view(),
+        name='import_job_progress'
+    ),
     path(
         'update/confirm/',
         ProductConfirmUpdateView.as_view(),
@@ -38,6 +61,11 @@ urlpatterns = [
         MissingProductFormView.as_view(),
         name='missingproduct_form'
     ),
+    path(
+        'performance/',
+        PerformanceReportView.as_view(),
+        name='performance_report'
+    ),
     path(
         'update/instruction/',
         update_instruction_get,
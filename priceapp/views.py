@@ -8,47 +8,56 @@ import re
 from csv import DictReader
 from io import TextIOWrapper
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.db.models import Q
-from django.http import HttpRequest, HttpResponse
-from django.shortcuts import render, redirect
+from django.db import transaction
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse, reverse_lazy
 
 from django.views import View
 from django.views.generic import CreateView
 
+from .history import price_changed, record_price_history
+from .importer import BULK_BATCH_SIZE, import_price_rows
+from .jobs import BACKGROUND_IMPORT_SIZE, refresh_stale_job, start_import
+from .layout import TagSizeError, get_layout_engine
+from .lookup import invalidate_product_index
+from .pdf import render_pdf
+from .perf import METRICS, recorder
+from .reconcile import ProductReconciler, chunked
+from .scan import scan_discounted_product, scan_product
+from .search import product_search_index
+from .state import WorkflowState
+from .tag_render import TagHTMLRenderer
 from .models import (
+    ImportJob,
     PrintSheet,
     Product,
-    Tag,
     UpdateProduct,
-    MissingProduct, Category, Country,
+    MissingProduct,
 )
 from .forms import (
     PrintSheetForm,
     PrintSheetFreeForm,
+    PrintSheetScanForm,
     ProductICQUpdateForm,
     ProductConfirmUpdateSet,
     FileDownloadForm,
     MissingProductFormSet,
 )
 
-before_redirect_url: str = ''
-last_scan: dict = {
-    'tag': {
-        'size': 'big',
-        'is_discount': False
-    },
-    'product': 'Список пуст'
-}
-missing_products_flag: bool = False
-
 
 class PrintSheetDelete(View):
     """Стартовое представление которое очищает таблицы \
     `Ценники для печати`, `Обновляемые товары` и `Ненайденные товары`, \
     после чего перенаправляет на страницу формирования печати ценников."""
 
+    # Максимальное количество SQL запросов (включая запросы сессии)
+    # по HTTP методам, не зависящее от объема данных (см. tests.py).
+    query_budget = {'get': 7}
+
     def get(self, request: HttpRequest) -> HttpResponse:
         """
         Метод обрабатывает get запрос, очищает таблиц \
@@ -57,22 +66,20 @@ class PrintSheetDelete(View):
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        global last_scan
-        PrintSheet.objects.all().delete()
-        UpdateProduct.objects.all().delete()
-        MissingProduct.objects.all().delete()
-        last_scan = {
-            'tag': {
-                'size': 'big',
-                'is_discount': False
-            },
-            'product': 'Список пуст'
-        }
+        state = WorkflowState(request)
+        PrintSheet.objects.filter(terminal=state.terminal).delete()
+        UpdateProduct.objects.filter(terminal=state.terminal).delete()
+        MissingProduct.objects.filter(terminal=state.terminal).delete()
+        state.reset_last_scan()
         return redirect(reverse('priceapp:printsheet_create'))
 
 
 class PrintSheetView(View):
-    """Представление формирует список ценников для печати."""
+    """Представление формирует список ценников для печати. \
+    Представление асинхронное: под ASGI сервером сканирование \
+    не занимает поток на время запроса (см. scan.py)."""
+
+    query_budget = {'get': 3, 'post': 6}
 
     tag_list = (
         {'size': 'big', 'is_discount': (False, 'false')},
@@ -81,22 +88,36 @@ class PrintSheetView(View):
         {'size': 'small', 'is_discount': (True, 'true')},
     )
 
-    def get(self, request: HttpRequest) -> HttpResponse:
+    async def get(self, request: HttpRequest) -> HttpResponse:
         """
         Метод обрабатывает get запрос, использует две формы \
         для обработки: форма поиска по Товарам и свободная \
         форма для формирования ценников по уценки.
 
+        :param request: HttpRequest.
+        :return: HttpResponse.
+        """
+        return await sync_to_async(self.render_page)(request)
+
+    def render_page(self, request: HttpRequest) -> HttpResponse:
+        """
+        Отрисовывает страницу сканирования. Отрисовка обращается \
+        к сессии и БД, поэтому выполняется в потоке.
+
         :param request: HttpRequest.
         :return: HttpResponse.
         """
         form = PrintSheetForm()
         free_form = PrintSheetFreeForm()
+        state = WorkflowState(request)
         context = {
             'form': form,
             'free_form': free_form,
             'tag_list': self.tag_list,
-            'last_scan': last_scan
+            'last_scan': state.last_scan,
+            'queue_count': (
+                PrintSheet.objects.filter(terminal=state.terminal).count()
+            ),
         }
         if request.session.get('message_user'):
             context['message_user'] = request.session['message_user']
@@ -107,7 +128,7 @@ class PrintSheetView(View):
             context=context
         )
 
-    def post(self, request: HttpRequest) -> HttpResponse:
+    async def post(self, request: HttpRequest) -> HttpResponse:
         """
         Метод формирует список ценников для печати, \
         обрабатывая для этого формы.
@@ -115,111 +136,159 @@ class PrintSheetView(View):
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        global last_scan
-        product = None
+        state = await WorkflowState.aload(request)
         form = PrintSheetForm(request.POST)
-        free_form = PrintSheetFreeForm(request.POST)
-        tag = last_scan['tag']
-        discount_type = 'Акция !!!'
         if form.is_valid():
             form = form.cleaned_data
-            input_line = form['input_line']
-            size = form['size']
-            is_discount = form['is_discount'] == 'true'
-            tag = Tag.objects.get(size=size, is_discount=is_discount)
-            product = (
-                Product.objects.filter(
-                    Q(ean=input_line) | Q(name__iexact=input_line)
-                )
-                .values(
-                    'name',
-                    'category',
-                    'country',
-                    'price',
-                    'old_price',
-                    'red_price'
-                )
-                .first()
+            sheet = await scan_product(
+                state,
+                form['input_line'],
+                form['size'],
+                form['is_discount'] == 'true'
             )
-            if not product:
-                request.session['message_user'] = input_line
-
-        if free_form.is_valid():
+            if sheet is None:
+                request.session['message_user'] = form['input_line']
+            return redirect(reverse('priceapp:printsheet_create'))
+        free_form = PrintSheetFreeForm(request.POST)
+        # Поле макета ценника проверяется запросом к БД.
+        if await sync_to_async(free_form.is_valid)():
             form = free_form.cleaned_data
-            tag = form['tag']
-            product = (
-                Product.objects
-                .filter(name__iexact=form['name'])
-                .values(
-                    'name',
-                    'category',
-                    'country',
-                )
-                .first()
+            sheet = await scan_discounted_product(
+                state,
+                form['tag'],
+                form['name'],
+                form['price'],
+                form['old_price'],
+                form['red_price'],
+                form['discount_type']
             )
-            if product:
-                discount_type = form['discount_type']
-                name = product['name']
-                if tag.size == 'small':
-                    product['name'] = f'{name} {discount_type}'
-                product['price'] = form['price']
-                product['old_price'] = form['old_price']
-                product['red_price'] = form['red_price']
-            else:
+            if sheet is None:
                 request.session['message_user'] = form['name']
-        last_scan['tag'] = tag
-        if product:
-            last_scan['product'] = product['name']
-            product['category'] = (
-                Category.objects.only('name')
-                .get(id=product['category'])
-                .name
-            )
-            product['country'] = (
-                Country.objects.only('name')
-                .get(id=product['country'])
-                .name
-            )
-            PrintSheet.objects.create(
-                tag=tag,
-                discount_type=discount_type,
-                **product
+        return redirect(reverse('priceapp:printsheet_create'))
+
+
+class PrintSheetScanView(View):
+    """Асинхронное представление добавляет товар в Лист печати \
+    по штрихкоду или наименованию и возвращает результат в JSON, \
+    без перенаправления и отрисовки страницы сканирования. \
+    Используется страницей сканирования для обновления на месте."""
+
+    query_budget = {'post': 7}
+
+    async def post(self, request: HttpRequest) -> JsonResponse:
+        """
+        Метод обрабатывает post запрос с полями формы \
+        `PrintSheetScanForm`. Возвращает добавленный ценник и \
+        количество ценников терминала в Листе печати; если товар \
+        не найден - статус 404.
+
+        :param request: HttpRequest.
+        :return: JsonResponse.
+        """
+        form = PrintSheetScanForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        state = await WorkflowState.aload(request)
+        form = form.cleaned_data
+        sheet = await scan_product(
+            state,
+            form['input_line'],
+            form['size'],
+            form['is_discount'] == 'true'
+        )
+        queue_count = await (
+            PrintSheet.objects.filter(terminal=state.terminal).acount()
+        )
+        if sheet is None:
+            return JsonResponse(
+                {
+                    'found': False,
+                    'input_line': form['input_line'],
+                    'queue_count': queue_count,
+                },
+                status=404
             )
+        return JsonResponse(
+            {
+                'found': True,
+                'row': {
+                    'id': sheet.pk,
+                    'name': sheet.name,
+                    'category': sheet.category,
+                    'country': sheet.country,
+                    'price': sheet.price,
+                    'old_price': sheet.old_price,
+                    'red_price': sheet.red_price,
+                    'discount_type': sheet.discount_type,
+                    'tag': {
+                        'size': sheet.tag.size,
+                        'is_discount': sheet.tag.is_discount,
+                    },
+                },
+                'queue_count': queue_count,
+            },
+            status=201
+        )
 
-        return redirect(reverse('priceapp:printsheet_create'))
+
+def pack_print_sheet(request: HttpRequest) -> list:
+    """
+    Раскладывает ценники терминала по листам алгоритмом из настройки \
+    `PRICEAPP_LAYOUT_ENGINE`.
+
+    :param request: HttpRequest.
+    :return: list[Page].
+    :raises TagSizeError: ценник больше рабочей области листа.
+    """
+    printsheet_list = (
+        PrintSheet.objects
+        .select_related('tag')
+        .filter(
+            terminal=WorkflowState(request).terminal,
+            tag__isnull=False
+        )
+    )
+    return get_layout_engine().pack(printsheet_list)
+
+
+def redirect_tag_size_error(
+        request: HttpRequest,
+        error: TagSizeError,
+) -> HttpResponse:
+    """
+    Возвращает на страницу сканирования с сообщением о ценнике, \
+    который не помещается на лист.
+
+    :param request: HttpRequest.
+    :param error: TagSizeError.
+    :return: HttpResponse.
+    """
+    request.session['message_user'] = (
+        f'{error}. Исправьте размер ценника в администрировании!'
+    )
+    return redirect(reverse('priceapp:printsheet_create'))
 
 
 class PrintSheetList(View):
     """Представление формирует лист печати ценников."""
 
+    query_budget = {'get': 2}
+
     def get(self, request: HttpRequest) -> HttpResponse:
         """
         Метод обрабатывает get запрос, проходит по списку \
-        ценников для печати и формирует листы размером A4.
+        ценников для печати и раскладывает их по листам A4 \
+        алгоритмом из настройки `PRICEAPP_LAYOUT_ENGINE`.
 
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        max_height = 290
-        max_width = 180
-        printsheet_list = PrintSheet.objects.all()
-        size_list = ['big', 'small']
-        page_list = [[]]
-        height = 0
-        width = 0
-        for size in size_list:
-            tag_list = printsheet_list.filter(tag__size=size)
-            for tag in tag_list:
-                page_list[-1].append(tag)
-                width += tag.tag.width
-                if width == max_width:
-                    height += tag.tag.height
-                    width = 0
-                if height + tag.tag.height > max_height:
-                    page_list.append([])
-                    height = 0
+        try:
+            page_list = pack_print_sheet(request)
+        except TagSizeError as error:
+            return redirect_tag_size_error(request, error)
         context = {
-            'page_list': page_list
+            'page_list': TagHTMLRenderer().render_pages(page_list)
         }
         return render(
             request,
@@ -228,10 +297,92 @@ class PrintSheetList(View):
         )
 
 
+class PrintSheetPDF(View):
+    """Представление формирует PDF с листами ценников для отправки \
+    на печать без диалога печати браузера."""
+
+    query_budget = {'get': 2}
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Метод обрабатывает get запрос, раскладывает ценники по листам \
+        и возвращает PDF документ.
+
+        :param request: HttpRequest.
+        :return: HttpResponse.
+        """
+        try:
+            page_list = pack_print_sheet(request)
+        except TagSizeError as error:
+            return redirect_tag_size_error(request, error)
+        response = HttpResponse(
+            render_pdf(page_list),
+            content_type='application/pdf'
+        )
+        response['Content-Disposition'] = 'inline; filename="print.pdf"'
+        return response
+
+
+class ProductSearchView(View):
+    """Представление возвращает подсказки товаров для поля сканера."""
+
+    query_budget = {'get': 0}
+
+    max_limit = 50
+
+    def get(self, request: HttpRequest) -> JsonResponse:
+        """
+        Метод обрабатывает get запрос с параметрами `q` (строка поиска) \
+        и `limit` (количество результатов) и возвращает список товаров.
+
+        :param request: HttpRequest.
+        :return: JsonResponse.
+        """
+        query = request.GET.get('q', '')
+        try:
+            limit = int(request.GET.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_limit))
+        return JsonResponse(
+            {'results': product_search_index.search(query, limit)}
+        )
+
+
+def redirect_after_reconcile(
+        request: HttpRequest,
+        state: WorkflowState,
+        updated: bool,
+) -> HttpResponse:
+    """
+    Перенаправляет после сверки строк обновления с товарами: \
+    на подтверждение обновления цен, на список Ненайденных товаров \
+    или, если добавлять и обновлять нечего, обратно на страницу \
+    обновления с сообщением о товарах без изменения цены.
+
+    :param request: HttpRequest.
+    :param state: WorkflowState.
+    :param updated: bool - есть товары с изменившейся ценой.
+    :return: HttpResponse.
+    """
+    if updated:
+        return redirect(reverse('priceapp:product_confirm_update'))
+    if state.missing_products_flag:
+        return redirect(reverse('priceapp:missingproduct_form'))
+    if state.unchanged_products_count:
+        request.session['message_user'] = (
+            f'Цены найденных товаров не изменились, товаров без '
+            f'изменения цены: {state.unchanged_products_count}'
+        )
+    return redirect(state.before_redirect_url)
+
+
 class ProductICQUpdateView(View):
     """Представление обрабатывает обновление цен по \
     полученной информации от руководства через ICQ."""
 
+    query_budget = {'get': 3, 'post': 7}
+
     def get(self, request: HttpRequest) -> HttpResponse:
         """
         Метод обрабатывает get запрос. В начале обработки \
@@ -241,12 +392,16 @@ class ProductICQUpdateView(View):
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        UpdateProduct.objects.all().delete()
-        MissingProduct.objects.all().delete()
+        terminal = WorkflowState(request).terminal
+        UpdateProduct.objects.filter(terminal=terminal).delete()
+        MissingProduct.objects.filter(terminal=terminal).delete()
         form = ProductICQUpdateForm()
         context = {
             'form': form
         }
+        if request.session.get('message_user'):
+            context['message_user'] = request.session.get('message_user')
+            request.session.pop('message_user')
         return render(
             request,
             'priceapp/product_icq_update.html',
@@ -263,11 +418,12 @@ class ProductICQUpdateView(View):
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        global before_redirect_url, missing_products_flag
-        before_redirect_url = request.path
+        state = WorkflowState(request)
+        state.before_redirect_url = request.path
         form = ProductICQUpdateForm(request.POST)
         update_product_list = []
         missing_product_list = []
+        unchanged_count = 0
         if form.is_valid():
             form = form.cleaned_data
             text = form['text'].split('\r\n')
@@ -276,42 +432,47 @@ class ProductICQUpdateView(View):
                 lambda x: [elem.strip() for elem in re.split(regex, x)],
                 text
             )
-            for product in update_list:
-                if len(product) == 2:
-                    product.append('0')
-                    name, price, old_price = product
-                else:
-                    continue
-                product = Product.objects.filter(name=name).first()
-                if product:
-                    update_product_list.append(
-                        UpdateProduct(
-                            name=product.name,
-                            price=price,
-                            old_price=old_price,
-                            red_price=product.red_price
-                        )
-                    )
-                else:
-                    missing_product_list.append(
-                        MissingProduct(
-                            name=name,
-                            price=price,
-                            old_price=old_price
-                        )
-                    )
+            row_list = [
+                {'name': product[0], 'price': product[1], 'old_price': '0'}
+                for product in update_list
+                if len(product) == 2
+            ]
+            result = ProductReconciler(key='name').reconcile(row_list)
+            update_product_list = [
+                UpdateProduct(
+                    name=product.name,
+                    price=row['price'],
+                    old_price=row['old_price'],
+                    red_price=product.red_price,
+                    terminal=state.terminal
+                )
+                for product, row in result.changed_products()
+            ]
+            missing_product_list = [
+                MissingProduct(terminal=state.terminal, **row)
+                for row in result.missing.values()
+            ]
+            unchanged_count = result.unchanged_count
+        state.missing_products_flag = bool(missing_product_list)
+        state.unchanged_products_count = unchanged_count
         if missing_product_list:
             MissingProduct.objects.bulk_create(missing_product_list)
-            missing_products_flag = True
         if update_product_list:
             UpdateProduct.objects.bulk_create(update_product_list)
-            return redirect(reverse('priceapp:product_confirm_update'))
-        return redirect(reverse('priceapp:missingproduct_form'))
+        return redirect_after_reconcile(
+            request, state, bool(update_product_list)
+        )
 
 
 class ProductUpdateView(View):
     """Представление обновляет товары из файла при поступлении \
-    новой партии товара. Информацию передает руководство."""
+    новой партии товара. Информацию передает руководство. Файлы \
+    размером от `background_size` байт обрабатываются в фоновой \
+    задаче (см. jobs.py)."""
+
+    query_budget = {'get': 3, 'post': 7}
+
+    background_size = BACKGROUND_IMPORT_SIZE
 
     def get(self, request: HttpRequest) -> HttpResponse:
         """
@@ -322,8 +483,9 @@ class ProductUpdateView(View):
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        UpdateProduct.objects.all().delete()
-        MissingProduct.objects.all().delete()
+        terminal = WorkflowState(request).terminal
+        UpdateProduct.objects.filter(terminal=terminal).delete()
+        MissingProduct.objects.filter(terminal=terminal).delete()
         form = FileDownloadForm()
         context = {
             'form': form,
@@ -347,52 +509,33 @@ class ProductUpdateView(View):
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        global before_redirect_url, missing_products_flag
-        before_redirect_url = request.path
+        state = WorkflowState(request)
+        state.before_redirect_url = request.path
         form = FileDownloadForm(request.POST, request.FILES)
         if (
                 form.is_valid()
-                and form.files['file']._name == 'product_update.csv'
+                and form.files['file'].name.lower().endswith('.csv')
         ):
+            if form.files['file'].size >= self.background_size:
+                job = start_import(
+                    form.files['file'],
+                    terminal=state.terminal,
+                    encoding=request.encoding
+                )
+                return redirect(
+                    reverse('priceapp:import_job', args=(job.pk,))
+                )
             csv_file = TextIOWrapper(
                 form.files['file'].file,
                 encoding=request.encoding
             )
             reader = DictReader(csv_file, delimiter=';')
-            data_list = {row['sku']: row for row in reader}
-            product_sku_list = list(data_list.keys())
-            product_list = (
-                Product.objects
-                .only('sku', 'name')
-                .filter(sku__in=product_sku_list)
+            result = import_price_rows(reader, terminal=state.terminal)
+            state.missing_products_flag = bool(result.missing)
+            state.unchanged_products_count = result.unchanged
+            return redirect_after_reconcile(
+                request, state, bool(result.updated)
             )
-            product_missing_sku_list = [
-                sku
-                for sku in product_sku_list
-                if sku not in product_list.values_list('sku', flat=True)
-            ]
-            update_product_list = [
-                UpdateProduct(
-                    name=product.name,
-                    price=data_list[product.sku]['price'],
-                    old_price=data_list[product.sku]['old_price'],
-                )
-                for product in product_list
-            ]
-            missing_product_list = [
-                MissingProduct(**data_list[sku])
-                for sku in product_missing_sku_list
-            ]
-            if missing_product_list:
-                MissingProduct.objects.bulk_create(missing_product_list)
-                missing_products_flag = True
-            if update_product_list:
-                UpdateProduct.objects.bulk_create(
-                    update_product_list,
-                    ignore_conflicts=True
-                )
-                return redirect(reverse('priceapp:product_confirm_update'))
-            return redirect(reverse('priceapp:missingproduct_form'))
         request.session['message_user'] = (
             'В файле обнаружена ошибка!'
             'Проверьте заполнение и повторите попытку!'
@@ -404,20 +547,135 @@ class ProductUpdateView(View):
         )
 
 
+class ImportJobView(View):
+    """Представление выводит ход фоновой загрузки файла обновления. \
+    После завершения загрузки переводит на подтверждение обновления \
+    цен, при ошибке - обратно на страницу загрузки файла."""
+
+    query_budget = {'get': 5}
+
+    def get(self, request: HttpRequest, pk) -> HttpResponse:
+        """
+        Метод обрабатывает get запрос.
+
+        :param request: HttpRequest.
+        :param pk: UUID - id задачи загрузки.
+        :return: HttpResponse.
+        """
+        state = WorkflowState(request)
+        job = refresh_stale_job(
+            get_object_or_404(ImportJob, pk=pk, terminal=state.terminal)
+        )
+        if job.status == ImportJob.DONE:
+            state.missing_products_flag = bool(job.missing)
+            state.unchanged_products_count = job.unchanged
+            return redirect_after_reconcile(request, state, bool(job.updated))
+        if job.status == ImportJob.FAILED:
+            request.session['message_user'] = (
+                f'Ошибка загрузки файла: {job.error}. '
+                'Проверьте заполнение и повторите попытку!'
+            )
+            return redirect(reverse('priceapp:product_update'))
+        return render(
+            request,
+            'priceapp/import_job.html',
+            context={'job': job}
+        )
+
+
+class ImportJobProgressView(View):
+    """Представление возвращает ход фоновой загрузки файла в JSON \
+    для обновления страницы загрузки."""
+
+    query_budget = {'get': 2}
+
+    def get(self, request: HttpRequest, pk) -> JsonResponse:
+        """
+        Метод обрабатывает get запрос.
+
+        :param request: HttpRequest.
+        :param pk: UUID - id задачи загрузки.
+        :return: JsonResponse.
+        """
+        job = refresh_stale_job(get_object_or_404(
+            ImportJob, pk=pk, terminal=WorkflowState(request).terminal
+        ))
+        return JsonResponse({
+            'status': job.status,
+            'processed': job.processed,
+            'total': job.total,
+            'percent': job.percent,
+            'error': job.error,
+        })
+
+
 class ProductConfirmUpdateView(View):
-    """Представление обрабатывает подтверждение обновления цен."""
+    """Представление обрабатывает подтверждение обновления цен. \
+    Список Обновляемых товаров подтверждается постранично: каждая \
+    отправленная страница сохраняется и удаляется из очереди, после \
+    чего выводится следующая."""
+
+    query_budget = {'get': 3, 'post': 9}
+
+    # Количество товаров в одном UPDATE при массовом обновлении, может
+    # быть переопределено через as_view(batch_size=...).
+    batch_size = BULK_BATCH_SIZE
+    # Количество товаров на странице. Каждая форма содержит 5 полей,
+    # страница должна укладываться в DATA_UPLOAD_MAX_NUMBER_FIELDS.
+    paginate_by = 150
+
+    @staticmethod
+    def get_queue(state: WorkflowState) -> QuerySet:
+        """
+        Возвращает очередь Обновляемых товаров терминала.
+
+        :param state: WorkflowState.
+        :return: QuerySet.
+        """
+        return UpdateProduct.objects.filter(terminal=state.terminal)
+
+    def get_page(self, state: WorkflowState) -> QuerySet:
+        """
+        Возвращает текущую страницу очереди - первые paginate_by товаров.
+
+        :param state: WorkflowState.
+        :return: QuerySet.
+        """
+        return (
+            self.get_queue(state)
+            .order_by('update_at', 'pk')[:self.paginate_by]
+        )
 
     def get(self, request: HttpRequest) -> HttpResponse:
         """
-        Метод обрабатывает get запрос и передает список в виде \
-        формы для проверки корректности данных.
+        Метод обрабатывает get запрос и передает страницу списка \
+        в виде формы для проверки корректности данных.
 
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        formset = ProductConfirmUpdateSet()
+        state = WorkflowState(request)
+        formset = ProductConfirmUpdateSet(queryset=self.get_page(state))
+        return self.render_page(request, state, formset)
+
+    def render_page(
+            self,
+            request: HttpRequest,
+            state: WorkflowState,
+            formset,
+    ) -> HttpResponse:
+        """
+        Выводит страницу подтверждения обновления цен.
+
+        :param request: HttpRequest.
+        :param state: WorkflowState.
+        :param formset: ProductConfirmUpdateSet.
+        :return: HttpResponse.
+        """
         context = {
-            'formset': formset
+            'formset': formset,
+            'queue_count': self.get_queue(state).count(),
+            'unchanged_count': state.unchanged_products_count,
         }
         return render(
             request,
@@ -427,51 +685,122 @@ class ProductConfirmUpdateView(View):
 
     def post(self, request: HttpRequest) -> HttpResponse:
         """
-        Метод обрабатывает post запрос. Проходит по всему \
-        списку полученных форм и формирует список для \
-        массового обновления.
+        Метод обрабатывает post запрос. Проходит по всем формам \
+        страницы, обновляет товары и удаляет из очереди отправленные \
+        товары. При ошибках страница выводится повторно с ошибками \
+        форм. Повторно отправленная страница, товары которой уже \
+        подтверждены, ничего не изменяет. Если в очереди остались \
+        товары, возвращает на следующую страницу.
 
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        formset = ProductConfirmUpdateSet(request.POST)
-        name_list: list = []
+        state = WorkflowState(request)
+        formset = ProductConfirmUpdateSet(
+            request.POST,
+            queryset=self.get_page(state)
+        )
+        if not formset.is_valid():
+            if formset.forms and all(
+                    form.has_error('id', 'invalid_choice')
+                    for form in formset
+            ):
+                return self.redirect_next(state)
+            return self.render_page(request, state, formset)
         data_list: dict = {}
+        page_ids = []
         for form in formset:
-            if form.is_valid():
-                form = form.cleaned_data
-                name = form['name']
-                name_list.append(name)
-                data_list[name] = {
-                    'price': form['price'],
-                    'old_price': form['old_price'],
-                    'red_price': form['red_price'],
-                    'updated_at': form['id'].update_at
-                }
-        product_list = Product.objects.filter(name__in=name_list)
-        for product in product_list:
-            product.price = data_list[product.name]['price']
-            product.old_price = data_list[product.name]['old_price']
-            product.red_price = data_list[product.name]['red_price']
-            product.updated_at = data_list[product.name]['updated_at']
-        Product.objects.bulk_update(
-            product_list,
-            [
-                'price',
-                'old_price',
-                'red_price',
-                'updated_at'
+            form = form.cleaned_data
+            page_ids.append(form['id'].pk)
+            data_list[form['name']] = {
+                'price': form['price'],
+                'old_price': form['old_price'],
+                'red_price': form['red_price'],
+                'updated_at': form['id'].update_at
+            }
+        # Обновление товаров и удаление страницы из очереди выполняются
+        # одной транзакцией: изменения фиксируются целиком и одной
+        # записью на диск.
+        with transaction.atomic():
+            product_list: list = []
+            for name_chunk in chunked(data_list, self.batch_size):
+                product_list.extend(
+                    Product.objects
+                    .filter(name__in=name_chunk)
+                    .only('name', 'price', 'old_price', 'red_price')
+                )
+            changed_product_list = [
+                product for product in product_list
+                if price_changed(product, data_list[product.name])
             ]
-        )
-        UpdateProduct.objects.all().delete()
-        if missing_products_flag:
+            for product in changed_product_list:
+                product.price = data_list[product.name]['price']
+                product.old_price = data_list[product.name]['old_price']
+                product.red_price = data_list[product.name]['red_price']
+                product.updated_at = data_list[product.name]['updated_at']
+            Product.objects.bulk_update(
+                changed_product_list,
+                [
+                    'price',
+                    'old_price',
+                    'red_price',
+                    'updated_at'
+                ],
+                batch_size=self.batch_size
+            )
+            record_price_history(
+                changed_product_list,
+                batch_size=self.batch_size
+            )
+            UpdateProduct.objects.filter(pk__in=page_ids).delete()
+        invalidate_product_index()
+        return self.redirect_next(state)
+
+    def redirect_next(self, state: WorkflowState) -> HttpResponse:
+        """
+        Переводит на следующую страницу очереди, если в ней остались \
+        товары, иначе - на список Ненайденных товаров или на страницу, \
+        с которой началось обновление.
+
+        :param state: WorkflowState.
+        :return: HttpResponse.
+        """
+        if self.get_queue(state).exists():
+            return redirect(reverse('priceapp:product_confirm_update'))
+        if state.missing_products_flag:
             return redirect(reverse('priceapp:missingproduct_form'))
-        return redirect(before_redirect_url)
+        return redirect(state.before_redirect_url)
 
 
 class MissingProductFormView(UserPassesTestMixin, View):
     """Представление служит для добавления товаров, которые \
-    не найдены в базе при обновлении."""
+    не найдены в базе при обновлении. Список заполняется постранично: \
+    каждая отправленная страница сохраняется и удаляется из списка \
+    Ненайденных товаров."""
+
+    query_budget = {'get': 5, 'post': 13}
+
+    # Количество товаров на странице. Каждая форма содержит 9 полей,
+    # страница должна укладываться в DATA_UPLOAD_MAX_NUMBER_FIELDS.
+    paginate_by = 100
+
+    def get_queue(self) -> QuerySet:
+        """
+        Возвращает список Ненайденных товаров терминала.
+
+        :return: QuerySet.
+        """
+        return MissingProduct.objects.filter(
+            terminal=WorkflowState(self.request).terminal
+        )
+
+    def get_page(self) -> QuerySet:
+        """
+        Возвращает текущую страницу списка - первые paginate_by товаров.
+
+        :return: QuerySet.
+        """
+        return self.get_queue().order_by('pk')[:self.paginate_by]
 
     def test_func(self) -> bool:
         """
@@ -479,7 +808,7 @@ class MissingProductFormView(UserPassesTestMixin, View):
 
         :return: bool.
         """
-        return MissingProduct.objects.exists()
+        return self.get_queue().exists()
 
     def dispatch(self, request, *args, **kwargs) -> HttpResponse:
         """
@@ -493,21 +822,34 @@ class MissingProductFormView(UserPassesTestMixin, View):
         """
         user_test_result = self.get_test_func()()
         if not user_test_result:
-            return redirect(before_redirect_url)
+            return redirect(WorkflowState(request).before_redirect_url)
         return super().dispatch(request, *args, **kwargs)
 
     def get(self, request: HttpRequest) -> HttpResponse:
         """
-        Метод обрабатывает get запрос. Формирует список \
+        Метод обрабатывает get запрос. Формирует страницу списка \
         Ненайденных при обновлении товаров для заполнения \
         и создания новых Product.
 
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        formset = MissingProductFormSet()
+        return self.render_page(
+            request, MissingProductFormSet(queryset=self.get_page())
+        )
+
+    def render_page(self, request: HttpRequest, formset) -> HttpResponse:
+        """
+        Выводит страницу списка Ненайденных товаров.
+
+        :param request: HttpRequest.
+        :param formset: MissingProductFormSet.
+        :return: HttpResponse.
+        """
         context = {
-            'formset': formset
+            'formset': formset,
+            'queue_count': self.get_queue().count(),
+            'unchanged_count': WorkflowState(request).unchanged_products_count,
         }
         return render(
             request,
@@ -518,27 +860,83 @@ class MissingProductFormView(UserPassesTestMixin, View):
     def post(self, request: HttpRequest) -> HttpResponse:
         """
         Метод обрабатывает post запрос. Проверяет данные из \
-        списка форм и производит массовое добавление новых \
-        записей в Товары.
+        страницы форм и производит массовое добавление новых \
+        записей в Товары. При ошибках страница выводится повторно \
+        с ошибками форм. Если в списке остались товары, \
+        возвращает на следующую страницу.
 
         :param request: HttpRequest.
         :return: HttpResponse.
         """
-        formset = MissingProductFormSet(request.POST)
+        formset = MissingProductFormSet(
+            request.POST,
+            queryset=self.get_page()
+        )
+        if not formset.is_valid():
+            return self.render_page(request, formset)
         product_list = []
+        page_ids = []
         for form in formset:
-            if form.is_valid():
-                form = form.cleaned_data
-                form.pop('id')
-                product_list.append(Product(**form))
-        Product.objects.bulk_create(product_list)
-        MissingProduct.objects.all().delete()
+            data = dict(form.cleaned_data)
+            page_ids.append(data.pop('id').pk)
+            product_list.append(Product(**data))
+        with transaction.atomic():
+            Product.objects.bulk_create(product_list)
+            record_price_history(product_list)
+            MissingProduct.objects.filter(pk__in=page_ids).delete()
+        invalidate_product_index()
+        if self.get_queue().exists():
+            return redirect(reverse('priceapp:missingproduct_form'))
         return redirect(reverse('priceapp:printsheet_delete'))
 
 
+class PerformanceReportView(UserPassesTestMixin, View):
+    """Представление выводит отчет о производительности запросов \
+    по каждому URL. Доступно только персоналу."""
+
+    query_budget = {'get': 2}
+
+    login_url = reverse_lazy('admin:login')
+
+    def test_func(self) -> bool:
+        """
+        Проверяет, что пользователь относится к персоналу.
+
+        :return: bool.
+        """
+        return self.request.user.is_staff
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Метод обрабатывает get запрос. При параметре `format=json` \
+        возвращает отчет в JSON (с параметром `samples=1` - вместе \
+        с показателями каждого запроса).
+
+        :param request: HttpRequest.
+        :return: HttpResponse.
+        """
+        if request.GET.get('format') == 'json':
+            report = recorder.report(samples=bool(request.GET.get('samples')))
+            return JsonResponse(
+                report,
+                json_dumps_params={'ensure_ascii': False, 'indent': 2}
+            )
+        context = {
+            'report': recorder.report(),
+            'metrics': METRICS,
+        }
+        return render(
+            request,
+            'priceapp/performance_report.html',
+            context=context
+        )
+
+
 class ProductCreateView(CreateView):
     """Представление для создания новых товаров."""
 
+    query_budget = {'get': 2, 'post': 9}
+
     model = Product
     fields = (
         'sku',
@@ -552,9 +950,25 @@ class ProductCreateView(CreateView):
     )
     success_url = reverse_lazy('priceapp:printsheet_delete')
 
+    def form_valid(self, form) -> HttpResponse:
+        """
+        Сохраняет товар и записывает его цену в историю цен \
+        одной транзакцией.
+
+        :param form: ModelForm.
+        :return: HttpResponse.
+        """
+        with transaction.atomic():
+            response = super().form_valid(form)
+            record_price_history([self.object])
+        return response
+
 
 def update_instruction_get(request: HttpRequest) -> HttpResponse:
     return render(
         request,
         'priceapp/product_update_instruction.html'
     )
+
+
+update_instruction_get.query_budget = {'get': 0}